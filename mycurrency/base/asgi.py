@@ -2,6 +2,11 @@
 ASGI config for MyCurrency project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is the production entry point: it enables the asynchronous currency rates
+and converter views and is meant to be served by gunicorn with uvicorn workers
+(see base/gunicorn.conf.py):
+
+    gunicorn -c mycurrency/base/gunicorn.conf.py mycurrency.base.asgi:application
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -18,5 +23,9 @@ sys.path.insert(
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mycurrency.base.settings")
+# Asynchronous rate and converter views, see RATES_ASYNC_VIEWS
+os.environ.setdefault("MYCURRENCY_ASYNC_VIEWS", "1")
+# Threads running the remaining sync code (ORM calls, blocking provider clients)
+os.environ.setdefault("ASGI_THREADS", "16")
 
 application = get_asgi_application()
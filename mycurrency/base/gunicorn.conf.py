@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the production ASGI profile.
+
+Usage (from the repository root):
+    gunicorn -c mycurrency/base/gunicorn.conf.py mycurrency.base.asgi:application
+
+Every setting can be tuned through MYCURRENCY_* environment variables.
+"""
+import multiprocessing
+import os
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Both the project (e.g. `rates`) and its parent (e.g. `mycurrency.base`) packages
+pythonpath = ",".join([os.path.dirname(PROJECT_DIR), PROJECT_DIR])
+
+bind = os.environ.get("MYCURRENCY_BIND", "0.0.0.0:8000")
+
+# Each async worker serves many concurrent requests: one per core is enough
+workers = int(os.environ.get("MYCURRENCY_WORKERS", multiprocessing.cpu_count()))
+worker_class = "mycurrency.base.workers.MyCurrencyUvicornWorker"
+
+# Recycling workers bounds memory growth, the jitter avoids restarting all at once
+max_requests = int(os.environ.get("MYCURRENCY_MAX_REQUESTS", 10000))
+max_requests_jitter = 1000
+
+timeout = int(os.environ.get("MYCURRENCY_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("MYCURRENCY_LOG_LEVEL", "info")
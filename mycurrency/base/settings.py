@@ -31,7 +31,12 @@ DEBUG = True
 ALLOWED_HOSTS = ["testserver", "127.0.0.1"]
 
 REST_FRAMEWORK = {
-    "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.URLPathVersioning"
+    "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.URLPathVersioning",
+    # orjson, falling back to the standard JSONRenderer when it's not installed
+    "DEFAULT_RENDERER_CLASSES": [
+        "rates.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 # Application definition
@@ -52,12 +57,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Compresses the responses with brotli (when installed) or gzip
+    "rates.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Custom middlewares
+    "rates.middleware.QueryCountMetricsMiddleware",
+    "rates.middleware.RequestProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "mycurrency.base.urls"
@@ -79,16 +89,116 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "mycurrency.base.wsgi.application"
+ASGI_APPLICATION = "mycurrency.base.asgi.application"
+
+# Use the asynchronous currency rates and converter views (enabled by base/asgi.py)
+RATES_ASYNC_VIEWS = os.environ.get("MYCURRENCY_ASYNC_VIEWS", "0") == "1"
+# Serve the currency rates and converter views without the DRF request handling,
+# rendering their JSON with orjson right away (see rates.views.render_fast_response)
+RATES_FAST_VIEWS = os.environ.get("MYCURRENCY_FAST_VIEWS", "0") == "1"
+
+# Responses smaller than this aren't compressed (see CompressionMiddleware)
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_BROTLI_QUALITY = 5
 
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# MYCURRENCY_DB_ENGINE selects the database profile: "sqlite" (default) or "postgres"
+DATABASE_PROFILE = os.environ.get("MYCURRENCY_DB_ENGINE", "sqlite")
+
+if DATABASE_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("MYCURRENCY_DB_NAME", "mycurrency"),
+            "USER": os.environ.get("MYCURRENCY_DB_USER", "mycurrency"),
+            "PASSWORD": os.environ.get("MYCURRENCY_DB_PASSWORD", ""),
+            "HOST": os.environ.get("MYCURRENCY_DB_HOST", "localhost"),
+            "PORT": os.environ.get("MYCURRENCY_DB_PORT", "5432"),
+            # Persistent connections, checked before being reused. Set it to 0 when
+            # running behind a pooler such as PgBouncer.
+            "CONN_MAX_AGE": int(os.environ.get("MYCURRENCY_DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            # Server-side cursors don't work with PgBouncer transaction pooling
+            "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("MYCURRENCY_DB_POOLER")
+            == "1",
+        }
     }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("MYCURRENCY_DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {"timeout": 20},
+        }
+    }
+
+# Store the exchange rates as scaled integers with small-int currency ids (see
+# rates.models.CompactExchangeRate). Copy the existing rates with
+# `manage.py compact_rates` before enabling it.
+RATES_COMPACT_STORAGE = os.environ.get("MYCURRENCY_COMPACT_STORAGE", "0") == "1"
+
+# Local memory caches, "rates" holds the latest rates served by the converter
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "rates": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "rates",
+    },
+}
+
+# The converter serves the latest known rate of a pair (see rates.service.latest)
+# while it's from the current day or at most RATES_LATEST_MAX_AGE seconds old,
+# instead of calling a provider
+RATES_LATEST_MAX_AGE = int(os.environ.get("MYCURRENCY_LATEST_MAX_AGE", 6 * 3600))
+RATES_LATEST_CACHE_TIMEOUT = 60
+
+# Cache-Control max-age of the currency rates of ranges ending in the past, which
+# don't change, and of the ranges including the current day
+RATES_PAST_RANGE_MAX_AGE = 30 * 86400
+RATES_CURRENT_RANGE_MAX_AGE = 0
+
+# Converted amounts are rounded to the minor unit of the exchanged currency (ISO 4217,
+# see rates.service.money) with RATES_ROUNDING. RATES_CURRENCY_DECIMAL_PLACES overrides
+# the decimal places of some currencies, e.g. {"JPY": 2}
+RATES_ROUNDING = "ROUND_HALF_EVEN"
+RATES_CURRENCY_DECIMAL_PLACES = {}
+
+# Conversions at a past date (see rates.service.history) look the rate up in a local
+# series of every pair, RATES_HISTORY_MAX_PAIRS of them reloaded every
+# RATES_HISTORY_SERIES_TIMEOUT seconds. Dates without a rate are resolved with
+# RATES_HISTORY_POLICY (exact, previous, nearest or linear), using rates at most
+# RATES_HISTORY_MAX_GAP_DAYS days away
+RATES_HISTORY_POLICY = "previous"
+RATES_HISTORY_MAX_GAP_DAYS = 7
+RATES_HISTORY_MAX_PAIRS = 256
+RATES_HISTORY_SERIES_TIMEOUT = 300
+
+# Ledger revaluations (see rates.service.ledger) are converted by chunks of rows,
+# with the missing rates of every chunk fetched at once
+RATES_LEDGER_CHUNK_SIZE = 10000
+
+# Conversions are counted per currency pair (RatePairUsage), flushed to the database
+# every RATES_USAGE_FLUSH_SIZE conversions or RATES_USAGE_FLUSH_INTERVAL seconds
+RATES_USAGE_TRACKING = True
+RATES_USAGE_FLUSH_SIZE = 100
+RATES_USAGE_FLUSH_INTERVAL = 60
+
+# Warm-up of the workers on startup (see rates.service.warmup): currency registry,
+# latest rates of the RATES_WARMUP_TOP_PAIRS most converted pairs and provider
+# connections, within RATES_WARMUP_BUDGET seconds
+RATES_WARMUP_ON_STARTUP = os.environ.get("MYCURRENCY_WARMUP", "0") == "1"
+RATES_WARMUP_TOP_PAIRS = 50
+RATES_WARMUP_BUDGET = float(os.environ.get("MYCURRENCY_WARMUP_BUDGET", 5))
+
+# PRAGMAs run on every new SQLite connection (see rates.domain.backends): WAL lets
+# the views read while the batch threads write
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
 }
 
 
@@ -160,6 +270,87 @@ logger = logging.getLogger(__name__)
 BATCH_PROCESS_MAX_YEARS_TO_RETRIEVE = 5
 BATCH_PROCESS_SLEEP_TIME = 0.2
 
+# Multi-currency backfills (see rates.service.batch_processor.batch_backfill): the
+# rates of the other source currencies are triangulated from the RATES_BACKFILL_PIVOT
+# ones, and the chunks left are fetched RATES_BACKFILL_CONCURRENCY at a time, spaced
+# out by BATCH_PROCESS_SLEEP_TIME seconds
+RATES_BACKFILL_PIVOT = "USD"
+RATES_BACKFILL_TRIANGULATE = True
+RATES_BACKFILL_CONCURRENCY = 4
+
+# Rate exports and imports (`manage.py export_rates` / `import_rates`, see
+# rates.service.archive) stream the rates by chunks of RATES_ARCHIVE_CHUNK_SIZE rows
+RATES_ARCHIVE_CHUNK_SIZE = 20000
+
+# Scheduled sync of the latest rates (`manage.py sync_latest_rates --loop`): every
+# RATES_SYNC_INTERVAL seconds, the rates since the watermark of every source currency
+# are fetched, going back at most RATES_SYNC_MAX_DAYS days. Keep the interval below
+# RATES_LATEST_MAX_AGE so the converter doesn't call the providers
+RATES_SYNC_INTERVAL = int(os.environ.get("MYCURRENCY_SYNC_INTERVAL", 3600))
+RATES_SYNC_MAX_DAYS = 7
+RATES_SYNC_SLEEP_TIME = 0.2
+
+# Conversions missing today's rate of a source currency within
+# RATES_MICROBATCH_MAX_DELAY seconds of each other, up to RATES_MICROBATCH_MAX_BATCH
+# currencies, are served by a single multi-symbol provider call (see
+# rates.service.microbatch)
+RATES_MICROBATCH_ENABLED = False
+RATES_MICROBATCH_MAX_DELAY = 0.005
+RATES_MICROBATCH_MAX_BATCH = 20
+
+# Rates fetched while serving get_exchange_rates and get_exchange_convertion are served
+# right away and stored every RATES_WRITE_BEHIND_FLUSH_INTERVAL seconds by a background
+# thread, journaled in RATES_WRITE_BEHIND_JOURNAL_DIR until then. Past
+# RATES_WRITE_BEHIND_MAX_QUEUE queued batches, rates are stored right away (see
+# rates.service.write_behind)
+RATES_WRITE_BEHIND_ENABLED = False
+RATES_WRITE_BEHIND_FLUSH_INTERVAL = 0.5
+RATES_WRITE_BEHIND_MAX_QUEUE = 1000
+RATES_WRITE_BEHIND_JOURNAL_DIR = BASE_DIR / "write_behind"
+
+# The enabled providers are cached in memory for RATES_PROVIDER_REGISTRY_TIMEOUT
+# seconds, or until a Provider is saved or deleted (see rates.adapters.provider_registry)
+RATES_PROVIDER_REGISTRY_TIMEOUT = 60
+
+# Adaptive provider selection (see rates.adapters.provider_selector): a provider with
+# RATES_PROVIDER_MAX_ERROR_RATE failed calls among its last RATES_PROVIDER_STATS_WINDOW
+# ones (at least RATES_PROVIDER_MIN_CALLS, within RATES_PROVIDER_STATS_MAX_AGE
+# seconds) is demoted. The providers up to RATES_PROVIDER_PRIORITY_BAND priorities
+# after the first one can also win by being RATES_PROVIDER_LATENCY_MARGIN times faster
+RATES_PROVIDER_STATS_WINDOW = 50
+RATES_PROVIDER_STATS_MAX_AGE = 300
+RATES_PROVIDER_MIN_CALLS = 5
+RATES_PROVIDER_MAX_ERROR_RATE = 0.5
+RATES_PROVIDER_PRIORITY_BAND = 0
+RATES_PROVIDER_LATENCY_MARGIN = 1.5
+
+# On-disk cache of the CurrencyBeacon time series responses (see
+# rates.adapters.response_cache), disabled when RATES_PROVIDER_CACHE_PATH is None.
+# Responses about past dates never expire, the other ones after
+# RATES_PROVIDER_CACHE_TTL seconds; the least recently used ones are evicted beyond
+# RATES_PROVIDER_CACHE_MAX_BYTES
+RATES_PROVIDER_CACHE_PATH = os.environ.get("RATES_PROVIDER_CACHE_PATH") or None
+RATES_PROVIDER_CACHE_TTL = 3600
+RATES_PROVIDER_CACHE_MAX_BYTES = 256 * 1024**2
+
+# Seed making MockProvider rates reproducible (None means random rates)
+MOCK_PROVIDER_SEED = None
+# MockProvider fault injection, overridden by the options in its Provider.key, e.g.
+# "latency=lognormal:40:0.5;error_rate=0.01;throttle_rate=0.05;retry_after=1;max_span_days=365"
+MOCK_PROVIDER_CONFIG = {}
+
+# Metrics exposed at /metrics (Prometheus text exposition format)
+METRICS_ENABLED = True
+
+# Per request profiling: Server-Timing header with SQL queries, DB, provider and
+# wall time. Enabled for every request or on demand with `X-Profile-Request: 1`
+REQUEST_PROFILING_ENABLED = False
+REQUEST_PROFILING_ALLOW_HEADER = DEBUG
+# Requests slower than this get a profile dumped in REQUEST_PROFILING_DUMP_DIR
+REQUEST_PROFILING_SLOW_MS = 500
+REQUEST_PROFILING_DUMP_DIR = None  # e.g. "mycurrency/logs/profiles"
+REQUEST_PROFILING_PROFILER = "cprofile"  # or "pyinstrument" if installed
+
 STATIC_URL = "/static/"
 
 STATICFILES_DIRS = [
@@ -0,0 +1,19 @@
+"""
+Gunicorn worker classes for serving MyCurrency through ASGI.
+"""
+from uvicorn.workers import UvicornWorker
+
+
+class MyCurrencyUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker using the uvloop event loop and the httptools HTTP parser.
+    Django doesn't implement the ASGI lifespan protocol, so it's disabled.
+    """
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "off",
+        "backlog": 2048,
+        "timeout_keep_alive": 5,
+    }
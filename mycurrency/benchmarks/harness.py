@@ -0,0 +1,256 @@
+"""
+This module provides a small load generator used by the benchmark suite.
+
+Requests are replayed by a pool of threads, either in-process through Django's
+test client or against a running server, and every request latency is recorded
+to report throughput and latency percentiles.
+"""
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import requests
+from django.test import AsyncClient, Client
+
+
+BenchRequest = namedtuple(
+    "BenchRequest", ["method", "path", "params", "headers"], defaults=(None,)
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_values: List[float], rank: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0, min(len(sorted_values) - 1, int(round(rank / 100 * len(sorted_values))) - 1)
+    )
+    return sorted_values[index]
+
+
+class DjangoTestClient:
+    """
+    Sends requests in-process through Django's test client (no network involved).
+    """
+
+    def __init__(self):
+        self.client = Client()
+
+    def send(self, request: BenchRequest) -> tuple:
+        headers = request.headers or {}
+        if request.method == "GET":
+            response = self.client.get(request.path, request.params, headers=headers)
+        else:
+            response = self.client.post(request.path, request.params, headers=headers)
+        return response.status_code, len(response.content)
+
+
+class HttpClient:
+    """
+    Sends requests to a running server (e.g. http://127.0.0.1:8000).
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.csrf_token = None
+
+    def send(self, request: BenchRequest) -> tuple:
+        url = self.base_url + request.path
+        headers = dict(request.headers or {})
+        if request.method == "GET":
+            response = self.session.get(url, params=request.params, headers=headers)
+        else:
+            if not request.path.startswith("/api/"):
+                # Forms are CSRF protected: fetching the token once per client
+                if self.csrf_token is None:
+                    self.session.get(url)
+                    self.csrf_token = self.session.cookies.get("csrftoken", "")
+                headers.update({"X-CSRFToken": self.csrf_token, "Referer": url})
+            response = self.session.post(url, data=request.params, headers=headers)
+        # Bytes on the wire: requests decompresses the content
+        return response.status_code, int(
+            response.headers.get("Content-Length", len(response.content))
+        )
+
+
+class LoadGenerator:
+    """
+    Replays a list of requests with a fixed number of concurrent workers.
+    """
+
+    def __init__(self, client_factory: Callable, concurrency: int = 1):
+        self.client_factory = client_factory
+        self.concurrency = concurrency
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.client_factory()
+        return self._local.client
+
+    def _send(self, request: BenchRequest):
+        start = time.perf_counter()
+        try:
+            status_code, size = self._client().send(request)
+        except Exception:
+            status_code, size = 599, 0
+        return time.perf_counter() - start, status_code, size
+
+    def run(self, bench_requests: List[BenchRequest]) -> dict:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            outcomes = list(executor.map(self._send, bench_requests))
+        return summarize(outcomes, time.perf_counter() - start, self.concurrency)
+
+
+class AsyncLoadGenerator:
+    """
+    Replays a list of requests in-process through Django's ASGI handler, with up to
+    `concurrency` requests in flight on a single event loop, like an ASGI server.
+    """
+
+    def __init__(self, concurrency: int = 1):
+        self.concurrency = concurrency
+
+    async def _run(self, bench_requests: List[BenchRequest]):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(request: BenchRequest):
+            async with semaphore:
+                start = time.perf_counter()
+                headers = request.headers or {}
+                try:
+                    if request.method == "GET":
+                        response = await client.get(
+                            request.path, request.params, headers=headers
+                        )
+                    else:
+                        response = await client.post(
+                            request.path, request.params, headers=headers
+                        )
+                    status_code, size = response.status_code, len(response.content)
+                except Exception:
+                    status_code, size = 599, 0
+                return time.perf_counter() - start, status_code, size
+
+        return await asyncio.gather(*(send(request) for request in bench_requests))
+
+    def run(self, bench_requests: List[BenchRequest]) -> dict:
+        start = time.perf_counter()
+        outcomes = asyncio.run(self._run(bench_requests))
+        return summarize(outcomes, time.perf_counter() - start, self.concurrency)
+
+
+def summarize(outcomes: List, duration: float, concurrency: int) -> dict:
+    """
+    Computes throughput, latency percentiles and the mean response size from
+    (latency, status code, response bytes) tuples.
+    """
+    latencies = sorted(latency * 1000 for latency, _, _ in outcomes)
+    errors = sum(1 for _, status_code, _ in outcomes if status_code >= 400)
+    sizes = [size for _, _, size in outcomes]
+    return {
+        "requests": len(outcomes),
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(len(outcomes) / duration, 2) if duration else 0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_bytes": round(sum(sizes) / len(sizes)) if sizes else 0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return "unknown"
+
+
+def write_results(
+    results: dict,
+    params: dict,
+    output: Optional[str] = None,
+    extra: Optional[dict] = None,
+) -> str:
+    """
+    Stores the benchmark results as JSON, named after the current commit, along
+    with `extra` sections (e.g. the rendering benchmark).
+    """
+    commit = git_commit()
+    payload = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": params,
+        },
+        "scenarios": results,
+        **(extra or {}),
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, "{}.json".format(commit))
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return output
+
+
+def compare_results(current: dict, baseline_path: str, threshold: float) -> List[str]:
+    """
+    Compares the current scenarios against a previous results file.
+
+    Returns:
+        List[str]: One line per scenario, flagging throughput drops or p95
+        increases bigger than `threshold` percent as regressions.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+
+    lines = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        throughput_delta = _delta(previous["throughput_rps"], result["throughput_rps"])
+        p95_delta = _delta(previous["p95_ms"], result["p95_ms"])
+        regression = throughput_delta < -threshold or p95_delta > threshold
+        lines.append(
+            "{:<28} throughput {:+7.1f}%  p95 {:+7.1f}%{}".format(
+                name,
+                throughput_delta,
+                p95_delta,
+                "  << REGRESSION" if regression else "",
+            )
+        )
+    return lines
+
+
+def _delta(previous: float, current: float) -> float:
+    if not previous:
+        return 0.0
+    return (current - previous) * 100 / previous
@@ -0,0 +1,46 @@
+"""
+This module measures the revaluation of a ledger: a seeded CSV of random
+(date, currency, amount) rows converted into the first currency with the seeded
+historical rates, parsing and serialization included.
+"""
+import random
+from datetime import date, timedelta
+from typing import List
+
+from rates.service.ledger import CSV_FORMAT, convert_ledger, read_ledger, write_ledger
+
+
+def build_ledger(
+    rng: random.Random, codes: List[str], date_from: date, date_to: date, rows: int
+) -> List[str]:
+    days = (date_to - date_from).days
+    lines = ["id,date,currency,amount\n"]
+    for index in range(rows):
+        lines.append(
+            "{},{},{},{}.{:02d}\n".format(
+                index,
+                date_from + timedelta(days=rng.randint(0, days)),
+                rng.choice(codes),
+                rng.randint(0, 100000),
+                rng.randint(0, 99),
+            )
+        )
+    return lines
+
+
+def benchmark_ledger(
+    codes: List[str], date_from: date, date_to: date, rows: int, seed: int
+) -> dict:
+    lines = build_ledger(random.Random(seed), codes, date_from, date_to, rows)
+    stats = {}
+    chunks = convert_ledger(
+        read_ledger(lines, CSV_FORMAT), codes[0], fill_gaps=False, stats=stats
+    )
+    size = sum(len(content) for content in write_ledger(chunks, CSV_FORMAT))
+    return {
+        "rows": stats["rows"],
+        "failed": stats["failed"],
+        "seconds": round(stats["seconds"], 3),
+        "rows_per_second": round(stats["rows_per_second"], 1),
+        "bytes": size,
+    }
@@ -0,0 +1,53 @@
+"""
+This module measures the rendering of a year of currency rates: render time with
+the standard DRF JSONRenderer and with ORJSONRenderer, and the size of the body
+identity, gzip and brotli encoded.
+"""
+import time
+from datetime import date, timedelta
+from typing import List
+
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from rates.domain.db import get_exchange_rates_grouped_by_date_and_currency
+from rates.renderers import ORJSONRenderer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def time_render(render, data, repeat: int) -> float:
+    """
+    Best render time out of `repeat` runs, in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(data)
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def benchmark_rendering(codes: List[str], date_to: date, repeat: int = 20) -> dict:
+    data = get_exchange_rates_grouped_by_date_and_currency(
+        source_currency=codes[0],
+        date_from=date_to - timedelta(days=364),
+        date_to=date_to,
+    )
+    body = ORJSONRenderer().render(data)
+    sizes = {
+        "identity": len(body),
+        "gzip": len(compress_string(body)),
+    }
+    if brotli is not None:
+        sizes["br"] = len(brotli.compress(body, quality=5))
+    return {
+        "render_ms": {
+            "json": time_render(JSONRenderer().render, data, repeat),
+            "orjson": time_render(ORJSONRenderer().render, data, repeat),
+        },
+        "bytes": sizes,
+    }
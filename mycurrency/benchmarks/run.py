@@ -0,0 +1,236 @@
+"""
+Reproducible benchmark suite for the MyCurrency endpoints.
+
+It seeds a dedicated database with deterministic MockProvider rates for N years x
+M currencies, replays a seeded mix of requests against every endpoint and
+reports throughput and p50/p95/p99 latencies. Results are stored as JSON under
+benchmarks/results/<commit>.json so regressions show up between commits.
+
+Usage (from the repository root):
+    PYTHONPATH=$(pwd) python mycurrency/benchmarks/run.py --years 5 --currencies 4
+    PYTHONPATH=$(pwd) python mycurrency/benchmarks/run.py --compare \
+        mycurrency/benchmarks/results/<previous commit>.json
+
+Concurrency gain of the asynchronous views, served through ASGI, when every
+request has to wait for a slow provider:
+    PYTHONPATH=$(pwd) python mycurrency/benchmarks/run.py --asgi --no-seed \
+        --mock-config "latency=fixed:50" --concurrency 32 --output sync.json
+    PYTHONPATH=$(pwd) python mycurrency/benchmarks/run.py --asgi --no-seed \
+        --mock-config "latency=fixed:50" --concurrency 32 --async-views \
+        --compare sync.json
+
+Bytes on the wire and render time of the currency rates, DRF against the fast
+views rendering with orjson:
+    PYTHONPATH=$(pwd) python mycurrency/benchmarks/run.py --render \
+        --scenario currency-rates-year --scenario currency-rates-compressed
+    PYTHONPATH=$(pwd) python mycurrency/benchmarks/run.py --fast-views \
+        --scenario currency-rates --scenario currency-converter
+
+Rows per second of a ledger revaluation (see rates.service.ledger):
+    PYTHONPATH=$(pwd) python mycurrency/benchmarks/run.py --ledger 1000000 \
+        --scenario currency-converter
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--currencies", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--scenario", action="append", help="scenario to run (default: all)"
+    )
+    parser.add_argument(
+        "--mock-config",
+        default="mock_key",
+        help='MockProvider options, e.g. "latency=uniform:20:80;error_rate=0.01"',
+    )
+    parser.add_argument(
+        "--base-url", help="benchmark a running server instead of in-process"
+    )
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="serve requests through Django's ASGI handler on an event loop",
+    )
+    parser.add_argument(
+        "--async-views",
+        action="store_true",
+        help="use the asynchronous currency rates and converter views",
+    )
+    parser.add_argument(
+        "--fast-views",
+        action="store_true",
+        help="serve the currency rates and converter views without DRF",
+    )
+    parser.add_argument(
+        "--render",
+        action="store_true",
+        help="also measure the JSON rendering and compression of a year of rates",
+    )
+    parser.add_argument(
+        "--ledger",
+        type=int,
+        default=0,
+        metavar="ROWS",
+        help="also measure the conversion of a ledger of ROWS rows",
+    )
+    parser.add_argument(
+        "--compact-storage",
+        action="store_true",
+        help="store the rates in the compact storage (RATES_COMPACT_STORAGE)",
+    )
+    parser.add_argument(
+        "--no-seed",
+        action="store_true",
+        help="start with an empty history, so rates come from the mock provider",
+    )
+    parser.add_argument(
+        "--database",
+        default=os.path.join(os.path.dirname(__file__), "bench.sqlite3"),
+        help="SQLite file used for the benchmark data (recreated on every run). "
+        "With the PostgreSQL profile, point MYCURRENCY_DB_NAME to a dedicated database",
+    )
+    parser.add_argument(
+        "--output", help="results file (default: results/<commit>.json)"
+    )
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="regression threshold in %%"
+    )
+    return parser.parse_args()
+
+
+def setup_django(args):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mycurrency.base.settings")
+    os.environ["MYCURRENCY_ASYNC_VIEWS"] = "1" if args.async_views else "0"
+    os.environ["MYCURRENCY_FAST_VIEWS"] = "1" if args.fast_views else "0"
+    from django.conf import settings
+
+    sqlite = settings.DATABASES["default"]["ENGINE"].endswith("sqlite3")
+    if not args.base_url and sqlite:
+        # Isolated and recreated database so runs are comparable
+        if os.path.exists(args.database):
+            os.remove(args.database)
+        settings.DATABASES["default"]["NAME"] = args.database
+    settings.MOCK_PROVIDER_SEED = args.seed
+    settings.RATES_COMPACT_STORAGE = args.compact_storage
+
+    import django
+
+    django.setup()
+
+    if not args.base_url:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+
+
+def main():
+    args = parse_args()
+    setup_django(args)
+
+    from benchmarks import harness, scenarios
+
+    date_to = date.today()
+    date_from = date_to - timedelta(days=365 * args.years - 1)
+
+    if args.base_url:
+        # The running server keeps its own data and provider configuration
+        codes = scenarios.get_currency_codes(args.currencies, create=False)
+    else:
+        scenarios.use_mock_provider(args.mock_config)
+        codes = scenarios.get_currency_codes(args.currencies)
+        if not args.no_seed:
+            rows = scenarios.populate_history(codes, date_from, date_to)
+            print(
+                "Seeded {} rates: {} currencies from {} to {}".format(
+                    rows, len(codes), date_from, date_to
+                )
+            )
+
+    if args.base_url:
+        client_factory = lambda: harness.HttpClient(args.base_url)  # noqa: E731
+    else:
+        client_factory = harness.DjangoTestClient
+
+    results = {}
+    for name in args.scenario or scenarios.SCENARIOS:
+        rng = random.Random("{}:{}".format(args.seed, name))
+        bench_requests = scenarios.SCENARIOS[name](
+            rng, codes, date_from, date_to, args.requests
+        )
+        if args.asgi and not args.base_url:
+            generator = harness.AsyncLoadGenerator(args.concurrency)
+        else:
+            generator = harness.LoadGenerator(client_factory, args.concurrency)
+        results[name] = generator.run(bench_requests)
+        print(
+            "{:<28} {:>9.1f} req/s  p50 {:>8.2f}ms  p95 {:>8.2f}ms  p99 {:>8.2f}ms"
+            "  {:>8} B  errors {}".format(
+                name,
+                results[name]["throughput_rps"],
+                results[name]["p50_ms"],
+                results[name]["p95_ms"],
+                results[name]["p99_ms"],
+                results[name]["mean_bytes"],
+                results[name]["errors"],
+            )
+        )
+
+    extra = {}
+    if args.render and not args.base_url:
+        from benchmarks.rendering import benchmark_rendering
+
+        extra["render"] = benchmark_rendering(codes, date_to)
+        print(
+            "render a year of rates: json {json}ms, orjson {orjson}ms".format(
+                **extra["render"]["render_ms"]
+            )
+        )
+        print(
+            "body bytes: "
+            + ", ".join(
+                "{} {}".format(encoding, size)
+                for encoding, size in extra["render"]["bytes"].items()
+            )
+        )
+
+    if args.ledger and not args.base_url:
+        from benchmarks.ledger import benchmark_ledger
+
+        extra["ledger"] = benchmark_ledger(
+            codes, date_from, date_to, args.ledger, args.seed
+        )
+        print(
+            "ledger of {rows} rows: {seconds}s, {rows_per_second} rows/s, "
+            "{failed} failed".format(**extra["ledger"])
+        )
+
+    params = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "compare", "database")
+    }
+    output = harness.write_results(results, params, args.output, extra)
+    print("Results stored in {}".format(output))
+
+    if args.compare:
+        for line in harness.compare_results(results, args.compare, args.threshold):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
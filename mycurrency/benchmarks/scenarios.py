@@ -0,0 +1,200 @@
+"""
+This module seeds the benchmark database and builds the request mix replayed
+against each endpoint. Everything derives from a seed, so two runs with the same
+parameters send exactly the same requests against exactly the same data.
+"""
+import random
+import string
+from datetime import date, timedelta
+from itertools import product
+from typing import List
+
+from rates.adapters.currencymock_adapter import CurrencyMockAdapter
+from rates.adapters.provider_registry import invalidate_provider_registry
+from rates.domain.backends import BULK_BATCH_SIZE, bulk_insert_rates
+from rates.domain.db import build_exchange_rate
+from rates.models import Currency, Provider
+
+from .harness import BenchRequest
+
+
+def get_currency_codes(currency_count: int, create: bool = True) -> List[str]:
+    """
+    Returns `currency_count` currency codes, creating synthetic currencies when
+    more currencies than the configured ones are requested and `create` is set.
+    """
+    codes = sorted(Currency.objects.values_list("code", flat=True))
+    if not create:
+        return codes[:currency_count]
+    synthetic_codes = (
+        "Z" + "".join(letters) for letters in product(string.ascii_uppercase, repeat=2)
+    )
+    while len(codes) < currency_count:
+        code = next(synthetic_codes)
+        _, created = Currency.objects.get_or_create(
+            code=code, defaults={"name": "Bench {}".format(code), "symbol": code}
+        )
+        if created:
+            codes.append(code)
+    return codes[:currency_count]
+
+
+def use_mock_provider(mock_config: str = "mock_key"):
+    """
+    Makes the MockProvider the only enabled provider, configured with `mock_config`
+    (see CurrencyMockAdapter for the latency and fault injection options).
+    """
+    Provider.objects.exclude(name="MockProvider").update(is_enabled=False)
+    Provider.objects.filter(name="MockProvider").update(
+        is_enabled=True, key=mock_config
+    )
+    # Queryset updates don't send the signals refreshing the provider registry
+    invalidate_provider_registry()
+
+
+def populate_history(codes: List[str], date_from: date, date_to: date) -> int:
+    """
+    Stores deterministic mock rates for every pair of `codes` between the dates.
+
+    Returns:
+        int: The number of stored exchange rate rows.
+    """
+    adapter = CurrencyMockAdapter(api_key="")
+    currencies = Currency.objects.in_bulk(codes, field_name="code")
+    days = (date_to - date_from).days + 1
+
+    rows = []
+    created_rows = 0
+    for source_code in codes:
+        for exchanged_code in codes:
+            if source_code == exchanged_code:
+                continue
+            for offset in range(days):
+                valuation_date = date_from + timedelta(days=offset)
+                rows.append(
+                    build_exchange_rate(
+                        currencies[source_code].id,
+                        currencies[exchanged_code].id,
+                        valuation_date,
+                        adapter.get_rate(source_code, exchanged_code, valuation_date),
+                    )
+                )
+            if len(rows) >= BULK_BATCH_SIZE:
+                created_rows += bulk_insert_rates(rows)
+                rows = []
+    return created_rows + bulk_insert_rates(rows)
+
+
+def _random_range(rng: random.Random, date_from: date, date_to: date, span_days: int):
+    days = max(0, (date_to - date_from).days - span_days)
+    start = date_from + timedelta(days=rng.randint(0, days))
+    return start, min(start + timedelta(days=span_days), date_to)
+
+
+def currency_rates_requests(
+    rng, codes, date_from, date_to, count, span_days=30, headers=None
+):
+    bench_requests = []
+    for _ in range(count):
+        start, end = _random_range(rng, date_from, date_to, span_days)
+        bench_requests.append(
+            BenchRequest(
+                "GET",
+                "/api/v1/currency-rates/",
+                {
+                    "source_currency": rng.choice(codes),
+                    "date_from": start.isoformat(),
+                    "date_to": end.isoformat(),
+                },
+                headers,
+            )
+        )
+    return bench_requests
+
+
+def compressed_currency_rates_requests(rng, codes, date_from, date_to, count):
+    """
+    Year long currency rates ranges, accepting compressed responses: compare their
+    mean_bytes with the currency-rates-year scenario.
+    """
+    return currency_rates_requests(
+        rng,
+        codes,
+        date_from,
+        date_to,
+        count,
+        span_days=365,
+        headers={"Accept-Encoding": "br, gzip"},
+    )
+
+
+def year_currency_rates_requests(rng, codes, date_from, date_to, count):
+    return currency_rates_requests(rng, codes, date_from, date_to, count, span_days=365)
+
+
+def currency_converter_requests(rng, codes, date_from, date_to, count):
+    bench_requests = []
+    for _ in range(count):
+        source, exchanged = rng.sample(codes, 2)
+        bench_requests.append(
+            BenchRequest(
+                "GET",
+                "/api/v1/currency-converter/",
+                {
+                    "source_currency": source,
+                    "exchanged_currency": exchanged,
+                    "amount": "{:.2f}".format(rng.uniform(1, 10000)),
+                },
+            )
+        )
+    return bench_requests
+
+
+def converter_form_requests(rng, codes, date_from, date_to, count):
+    currency_ids = dict(
+        Currency.objects.filter(code__in=codes).values_list("code", "id")
+    )
+    bench_requests = []
+    for _ in range(count):
+        source = rng.choice(codes)
+        exchanged = [code for code in codes if code != source]
+        bench_requests.append(
+            BenchRequest(
+                "POST",
+                "/converter/",
+                {
+                    "source_currency": currency_ids[source],
+                    "exchanged_currency": [currency_ids[code] for code in exchanged],
+                    "amount": "{:.2f}".format(rng.uniform(1, 10000)),
+                },
+            )
+        )
+    return bench_requests
+
+
+def history_rates_requests(rng, codes, date_from, date_to, count, span_days=365):
+    bench_requests = []
+    for _ in range(count):
+        start, end = _random_range(rng, date_from, date_to, span_days)
+        bench_requests.append(
+            BenchRequest(
+                "POST",
+                "/api/v2/currency-history-rates/",
+                {
+                    "source_currency": rng.choice(codes),
+                    "date_from": start.isoformat(),
+                    "date_to": end.isoformat(),
+                },
+            )
+        )
+    return bench_requests
+
+
+SCENARIOS = {
+    "currency-rates": currency_rates_requests,
+    "currency-rates-year": year_currency_rates_requests,
+    "currency-rates-compressed": compressed_currency_rates_requests,
+    "currency-converter": currency_converter_requests,
+    "converter": converter_form_requests,
+    "currency-history-rates": history_rates_requests,
+}
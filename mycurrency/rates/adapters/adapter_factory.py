@@ -12,8 +12,12 @@ without changing the core logic of the system. The provider used is determined
 dynamically at runtime.
 
 Functions:
-    get_provider: Returns the current provider for fetching exchange rate data.
+    get_provider: Returns the current provider for fetching exchange rate data,
+        chosen by the provider selector (see provider_selector).
+    get_adapter: Returns the adapter of a provider (see provider_registry).
     get_exchange_rate_data: Fetches exchange rate data from the configured provider.
+    aget_exchange_rate_data: Asynchronous version of get_exchange_rate_data.
+    aget_exchange_convertion_data: Asynchronous version of get_exchange_convertion_data.
 
 Constants:
     PROVIDER_MAPPING (dict): A dictionary mapping provider names to their respective adapter classes.
@@ -31,9 +35,19 @@ from datetime import date
 from typing import Union
 from decimal import Decimal
 import logging
+from asgiref.sync import sync_to_async
 from rates.models import Provider
+from rates.service import metrics
+from .base_adapter import BaseExchangeRateAdapter
 from .currencybeacon_adapter import CurrencyBeaconAdapter
 from .currencymock_adapter import CurrencyMockAdapter
+from .provider_registry import (
+    aget_enabled_providers,
+    get_adapter_instance,
+    get_enabled_providers,
+)
+from .provider_selector import select_provider, track_call
+from .snapshot_adapter import SnapshotAdapter
 
 
 logger = logging.getLogger(__name__)
@@ -41,6 +55,7 @@ logger = logging.getLogger(__name__)
 PROVIDER_MAPPING = {
     "CurrencyBeacon": CurrencyBeaconAdapter,
     "MockProvider": CurrencyMockAdapter,
+    "SnapshotProvider": SnapshotAdapter,
 }
 
 
@@ -48,17 +63,51 @@ def get_provider() -> Provider:
     """
     Retrieve the relevant Provider for fetching exchange rate data.
 
-    The fetched Provider will be the enabled provider with the lowest priority.
+    The fetched Provider will be the enabled provider with the lowest priority,
+    unless the provider selector demotes it for its recent errors or latency.
 
     Returns:
         Provider: provider database object.
     """
-    provider = Provider.objects.filter(is_enabled=True).order_by("priority").first()
+    provider = select_provider(get_enabled_providers())
+    log_provider_selection(provider)
+    return provider
+
+
+async def aget_provider() -> Provider:
+    """
+    Asynchronous version of `get_provider`.
+    """
+    provider = select_provider(await aget_enabled_providers())
+    log_provider_selection(provider)
+    return provider
+
+
+def log_provider_selection(provider: Provider):
     if provider:
         logger.info(f"Provider {provider.name} has been selected")
     else:
         logger.warning("No Provider has been selected")
-    return provider
+
+
+def get_adapter(provider: Provider) -> BaseExchangeRateAdapter:
+    """
+    Returns the adapter of a provider, instantiated with the provider's key on
+    first use.
+
+    Raises:
+        ValueError: If there is no provider or the provider is not supported.
+    """
+    if not provider:
+        raise ValueError("No available providers.")
+
+    adapter_class = PROVIDER_MAPPING.get(provider.name)
+
+    if not adapter_class:
+        logger.error(f"Provider {provider.name} is not supported.")
+        raise ValueError(f"Provider {provider.name} is not supported.")
+
+    return get_adapter_instance(provider, adapter_class)
 
 
 def get_exchange_rate_data(
@@ -86,49 +135,103 @@ def get_exchange_rate_data(
         Exception: If there is an error in fetching the exchange rate data from the provider.
     """
     provider = get_provider()
-    if not provider:
-        raise ValueError("No available providers.")
+    adapter_instance = get_adapter(provider)
+
+    # Cached responses aren't provider calls, for the metrics nor the selector
+    data = adapter_instance.get_cached_exchange_rate_data(
+        exchanged_currency=exchanged_currency,
+        source_currency=source_currency,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    if data is not None:
+        return data, provider.name
 
-    adapter_class = PROVIDER_MAPPING.get(provider.name)
+    try:
+        with metrics.track_provider_call(provider.name, "timeseries"), track_call(
+            provider.name
+        ):
+            data = adapter_instance.get_exchange_rate_data(
+                exchanged_currency=exchanged_currency,
+                source_currency=source_currency,
+                date_from=date_from,
+                date_to=date_to,
+            )
+        return data, provider.name
+    except Exception as e:
+        raise e
 
-    if not adapter_class:
-        logger.error(f"Provider {provider.name} is not supported.")
-        raise ValueError(f"Provider {provider.name} is not supported.")
+
+def get_exchange_convertion_data(
+    source_currency: str, exchanged_currency: str, amount: Decimal
+) -> dict:
+    provider = get_provider()
+    adapter_instance = get_adapter(provider)
 
     try:
-        # Instantiate the adapter class with the provider's key
-        adapter_instance = adapter_class(api_key=provider.key)
+        with metrics.track_provider_call(provider.name, "convert"), track_call(
+            provider.name
+        ):
+            data = adapter_instance.get_exchange_convertion_data(
+                source_currency=source_currency,
+                exchanged_currency=exchanged_currency,
+                amount=amount,
+            )
+        return data, provider.name
+    except Exception as e:
+        raise e
 
-        data = adapter_instance.get_exchange_rate_data(
+
+async def aget_exchange_rate_data(
+    source_currency: str, exchanged_currency: str, date_from: date, date_to: date
+) -> Union[dict, str]:
+    """
+    Asynchronous version of `get_exchange_rate_data`, using the adapter's
+    asynchronous client.
+    """
+    provider = await aget_provider()
+    adapter_instance = get_adapter(provider)
+
+    # Cached responses aren't provider calls, for the metrics nor the selector
+    data = await sync_to_async(
+        adapter_instance.get_cached_exchange_rate_data, thread_sensitive=False
+    )(
+        exchanged_currency=exchanged_currency,
+        source_currency=source_currency,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    if data is not None:
+        return data, provider.name
+
+    with metrics.track_provider_call(provider.name, "timeseries"), track_call(
+        provider.name
+    ):
+        data = await adapter_instance.aget_exchange_rate_data(
             exchanged_currency=exchanged_currency,
             source_currency=source_currency,
             date_from=date_from,
             date_to=date_to,
         )
-        return data, provider.name
-    except Exception as e:
-        raise e
+    return data, provider.name
 
 
-def get_exchange_convertion_data(
+async def aget_exchange_convertion_data(
     source_currency: str, exchanged_currency: str, amount: Decimal
 ) -> dict:
-    provider = get_provider()
-    adapter_class = PROVIDER_MAPPING.get(provider.name)
-
-    if not adapter_class:
-        logger.error(f"Provider {provider.name} is not supported.")
-        raise ValueError(f"Provider {provider.name} is not supported.")
-
-    try:
-        # Instantiate the adapter class with the provider's key
-        adapter_instance = adapter_class(api_key=provider.key)
+    """
+    Asynchronous version of `get_exchange_convertion_data`, using the adapter's
+    asynchronous client.
+    """
+    provider = await aget_provider()
+    adapter_instance = get_adapter(provider)
 
-        data = adapter_instance.get_exchange_convertion_data(
+    with metrics.track_provider_call(provider.name, "convert"), track_call(
+        provider.name
+    ):
+        data = await adapter_instance.aget_exchange_convertion_data(
             source_currency=source_currency,
             exchanged_currency=exchanged_currency,
             amount=amount,
         )
-        return data, provider.name
-    except Exception as e:
-        raise e
+    return data, provider.name
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from datetime import date
 from decimal import Decimal
+from typing import Optional
+from asgiref.sync import sync_to_async
 
 
 class BaseExchangeRateAdapter(ABC):
@@ -37,3 +39,57 @@ class BaseExchangeRateAdapter(ABC):
         """
         Fetch exchange convertion from the provider.
         """
+
+    def get_cached_exchange_rate_data(
+        self,
+        source_currency: str,
+        exchanged_currency: str,
+        date_from: date,
+        date_to: date,
+    ) -> Optional[dict]:
+        """
+        Returns the exchange rates of a previous response of the provider, or None.
+        Called before `get_exchange_rate_data`, outside of the tracked provider call.
+        Nothing is cached by default.
+        """
+        return None
+
+    def warm_up(self, timeout: float):
+        """
+        Prepares the adapter to serve requests, e.g. opens the connections to the
+        provider, within `timeout` seconds. Nothing to do by default.
+        """
+
+    async def aget_exchange_rate_data(
+        self,
+        source_currency: str,
+        exchanged_currency: str,
+        date_from: date,
+        date_to: date,
+    ) -> dict:
+        """
+        Asynchronously fetch exchange rates from the provider.
+
+        Adapters without a native asynchronous client run the blocking call in a
+        worker thread, so the event loop is not blocked meanwhile.
+        """
+        return await sync_to_async(self.get_exchange_rate_data, thread_sensitive=False)(
+            source_currency=source_currency,
+            exchanged_currency=exchanged_currency,
+            date_from=date_from,
+            date_to=date_to,
+        )
+
+    async def aget_exchange_convertion_data(
+        self, source_currency: str, exchanged_currency: str, amount: Decimal
+    ) -> dict:
+        """
+        Asynchronously fetch exchange convertion from the provider.
+        """
+        return await sync_to_async(
+            self.get_exchange_convertion_data, thread_sensitive=False
+        )(
+            source_currency=source_currency,
+            exchanged_currency=exchanged_currency,
+            amount=amount,
+        )
@@ -1,14 +1,31 @@
 import logging
 import json
+import threading
 from datetime import date
 from decimal import Decimal
+from typing import Optional
 import requests
+from django.utils import timezone
 
 from .base_adapter import BaseExchangeRateAdapter
+from .exceptions import ProviderThrottledError
+from .response_cache import fingerprint, get_response_cache, get_ttl
 
 
 logger = logging.getLogger(__name__)
 
+# Connections to the API are kept alive and shared by the adapter instances
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+        return _session
+
 
 class CurrencyBeaconAdapter(BaseExchangeRateAdapter):
     """
@@ -23,6 +40,60 @@ class CurrencyBeaconAdapter(BaseExchangeRateAdapter):
     def __init__(self, api_key: str):
         super().__init__(api_key)
 
+    @staticmethod
+    def check_throttling(response: requests.Response):
+        """
+        Raises a ProviderThrottledError when the API rejects a request with a 429.
+        """
+        if response.status_code != 429:
+            return
+        retry_after = response.headers.get("Retry-After", "0")
+        error_msg = "API request failed: 429 - Too Many Requests"
+        logger.error(error_msg)
+        raise ProviderThrottledError(
+            error_msg, retry_after=float(retry_after) if retry_after.isdigit() else 0
+        )
+
+    @staticmethod
+    def get_time_series_params(
+        source_currency: str, exchanged_currency: str, date_from: date, date_to: date
+    ) -> dict:
+        return {
+            "start_date": date_from.strftime("%Y-%m-%d"),
+            "end_date": date_to.strftime("%Y-%m-%d"),
+            "base": source_currency,
+            "symbols": exchanged_currency,
+        }
+
+    def get_cached_exchange_rate_data(
+        self,
+        source_currency: str,
+        exchanged_currency: str,
+        date_from: date,
+        date_to: date,
+    ) -> Optional[dict]:
+        """
+        Returns a time series from the provider response cache when it's enabled
+        (see rates.adapters.response_cache).
+        """
+        cache = get_response_cache()
+        if cache is None:
+            return None
+        params = self.get_time_series_params(
+            source_currency, exchanged_currency, date_from, date_to
+        )
+        return cache.get(fingerprint("CurrencyBeacon", "timeseries", params))
+
+    def warm_up(self, timeout: float):
+        """
+        Opens a connection to the API (DNS resolution and TLS handshake) in the
+        shared session, so the first request doesn't pay for it.
+        """
+        try:
+            get_session().head(CurrencyBeaconAdapter.BASE_URL, timeout=timeout)
+        except requests.RequestException as e:
+            logger.warning(f"CurrencyBeacon warm up failed: {e}")
+
     def get_exchange_rate_data(
         self,
         source_currency: str,
@@ -33,6 +104,9 @@ class CurrencyBeaconAdapter(BaseExchangeRateAdapter):
         """
         Fetch historical exchange rates from CurrencyBeacon API for a given date range.
 
+        Responses are stored in the provider response cache when it's enabled, and
+        served from it by `get_cached_exchange_rate_data`.
+
         Args:
             source_currency (str): The base currency code (e.g., "USD").
             exchanged_currency (str): Comma-separated target currency codes (e.g., "EUR,GBP").
@@ -47,14 +121,13 @@ class CurrencyBeaconAdapter(BaseExchangeRateAdapter):
         """
         try:
             headers = {"Authorization": "Bearer {}".format(self.api_key)}
-            params = {
-                "start_date": date_from.strftime("%Y-%m-%d"),
-                "end_date": date_to.strftime("%Y-%m-%d"),
-                "base": source_currency,
-                "symbols": exchanged_currency,
-            }
+            params = self.get_time_series_params(
+                source_currency, exchanged_currency, date_from, date_to
+            )
+
             endpoint = "{}/timeseries".format(CurrencyBeaconAdapter.BASE_URL)
-            response = requests.get(endpoint, params=params, headers=headers)
+            response = get_session().get(endpoint, params=params, headers=headers)
+            self.check_throttling(response)
 
             if response.status_code != 200:
                 msg = json.loads(response.text)["meta"]["error_detail"]
@@ -67,6 +140,16 @@ class CurrencyBeaconAdapter(BaseExchangeRateAdapter):
             data = response.json()
 
             if "response" in data:
+                cache = get_response_cache()
+                if cache is not None:
+                    # Rates of past dates are final
+                    cache.set(
+                        fingerprint("CurrencyBeacon", "timeseries", params),
+                        data["response"],
+                        ttl=None if date_to < timezone.now().date() else get_ttl(),
+                        provider="CurrencyBeacon",
+                        endpoint="timeseries",
+                    )
                 return data["response"]
 
             raise ValueError("Time Series rates not found")
@@ -105,7 +188,8 @@ class CurrencyBeaconAdapter(BaseExchangeRateAdapter):
                 "amount": amount,
             }
             endpoint = "{}/convert".format(CurrencyBeaconAdapter.BASE_URL)
-            response = requests.get(endpoint, params=params, headers=headers)
+            response = get_session().get(endpoint, params=params, headers=headers)
+            self.check_throttling(response)
 
             if response.status_code != 200:
                 msg = json.loads(response.text)["meta"]["error_detail"]
@@ -130,5 +214,7 @@ class CurrencyBeaconAdapter(BaseExchangeRateAdapter):
 
             raise ValueError("Time Series rates not found")
 
+        except ProviderThrottledError:
+            raise
         except Exception as e:
             raise ValueError(e)
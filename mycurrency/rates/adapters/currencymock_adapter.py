@@ -1,17 +1,154 @@
+import asyncio
+import math
 import random
+import threading
+import time
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+from django.conf import settings
 from .base_adapter import BaseExchangeRateAdapter
+from .exceptions import ProviderError, ProviderThrottledError
+
+
+_generators = {}
+_generators_lock = threading.Lock()
+
+
+def parse_mock_config(api_key: str) -> dict:
+    """
+    Parses the mock configuration stored in the `Provider.key` field.
+
+    The key is a semicolon separated list of `name=value` options, e.g.
+    "latency=lognormal:40:0.5;error_rate=0.01;throttle_rate=0.05;retry_after=1".
+    Keys without options (e.g. "mock_key") configure nothing.
+    """
+    config = {}
+    for option in (api_key or "").split(";"):
+        if "=" not in option:
+            continue
+        name, value = option.split("=", 1)
+        config[name.strip()] = value.strip()
+    return config
+
+
+def parse_latency(spec: str):
+    """
+    Parses a latency distribution, in milliseconds, into a sampling function.
+
+    Supported distributions:
+        fixed:MS, uniform:MIN:MAX, normal:MEAN:STDDEV, lognormal:MEDIAN:SIGMA,
+        exponential:MEAN
+    """
+    if not spec:
+        return None
+    name, *params = str(spec).split(":")
+    params = [float(param) for param in params]
+    distributions = {
+        "fixed": lambda generator: params[0],
+        "uniform": lambda generator: generator.uniform(params[0], params[1]),
+        "normal": lambda generator: generator.gauss(params[0], params[1]),
+        "lognormal": lambda generator: generator.lognormvariate(
+            math.log(params[0]), params[1]
+        ),
+        "exponential": lambda generator: generator.expovariate(1 / params[0]),
+    }
+    if name not in distributions:
+        raise ValueError("Unknown mock latency distribution: {}".format(name))
+    return distributions[name]
 
 
 class CurrencyMockAdapter(BaseExchangeRateAdapter):
     """
     Adapter to fetch mock exchange rates. This class simulates fetching exchange rates
     for a given date range or currency conversion.
+
+    When MOCK_PROVIDER_SEED is set, every rate is a deterministic function of the
+    seed, the currency pair and the valuation date, so results are reproducible
+    regardless of the order of the calls.
+
+    The adapter can also behave like a real remote provider for performance tests.
+    Options come from MOCK_PROVIDER_CONFIG in settings, overridden by the ones in
+    the `Provider.key` field (see `parse_mock_config`):
+        - latency: latency distribution of every call (see `parse_latency`).
+        - error_rate: probability of a call failing with a ProviderError.
+        - throttle_rate: probability of a call being throttled (HTTP 429).
+        - retry_after: seconds advertised by throttled calls.
+        - max_span_days: maximum number of days per time series call.
+        - seed: seed of the rates, latencies and failures.
     """
 
     def __init__(self, api_key: str):
         super().__init__(api_key)
+        config = dict(getattr(settings, "MOCK_PROVIDER_CONFIG", {}) or {})
+        config.update(parse_mock_config(api_key))
+        self.seed = config.get("seed", getattr(settings, "MOCK_PROVIDER_SEED", None))
+        self.latency = parse_latency(config.get("latency"))
+        self.error_rate = float(config.get("error_rate", 0))
+        self.throttle_rate = float(config.get("throttle_rate", 0))
+        self.retry_after = float(config.get("retry_after", 1))
+        max_span_days = config.get("max_span_days")
+        self.max_span_days = int(max_span_days) if max_span_days else None
+
+    @property
+    def generator(self) -> random.Random:
+        """
+        Random generator for latencies and failures, shared by all the adapters
+        with the same seed so the sequence of faults is reproducible.
+        """
+        with _generators_lock:
+            if self.seed not in _generators:
+                _generators[self.seed] = random.Random(self.seed)
+            return _generators[self.seed]
+
+    def simulate_call(self) -> float:
+        """
+        Draws the latency and the outcome of a call, raising the injected failures.
+
+        Returns:
+            float: The latency of the call in seconds.
+
+        Raises:
+            ProviderThrottledError: If the call is throttled.
+            ProviderError: If the call fails.
+        """
+        generator = self.generator
+        with _generators_lock:
+            latency = max(0.0, self.latency(generator)) / 1000 if self.latency else 0
+            outcome = generator.random()
+
+        if outcome < self.throttle_rate:
+            raise ProviderThrottledError(
+                "API request failed: 429 - Too Many Requests",
+                retry_after=self.retry_after,
+            )
+        if outcome < self.throttle_rate + self.error_rate:
+            raise ProviderError("API request failed: 500 - Mock provider error")
+        return latency
+
+    def check_span(self, date_from: date, date_to: date):
+        days = (date_to - date_from).days + 1
+        if self.max_span_days and days > self.max_span_days:
+            raise ProviderError(
+                "API request failed: 422 - Time series limited to {} days, {} requested".format(  # noqa: E501
+                    self.max_span_days, days
+                )
+            )
+
+    def get_rate(
+        self, source_currency: str, exchanged_currency: str, valuation_date: date
+    ) -> float:
+        """
+        Returns a mock rate, deterministic for a given pair and date when seeded.
+        """
+        if self.seed is None:
+            generator = random
+        else:
+            generator = random.Random(
+                "{}:{}:{}:{}".format(
+                    self.seed, source_currency, exchanged_currency, valuation_date
+                )
+            )
+        return round(generator.uniform(0.5, 1.5), 8)
 
     def get_exchange_rate_data(
         self,
@@ -34,8 +171,39 @@ class CurrencyMockAdapter(BaseExchangeRateAdapter):
                   dictionaries mapping target currencies to their mock exchange rates.
 
         Raises:
+            ProviderError: If the call fails because of an injected failure.
             ValueError: If an error occurs while generating exchange rates.
         """
+        self.check_span(date_from, date_to)
+        time.sleep(self.simulate_call())
+        return self.build_exchange_rate_data(
+            source_currency, exchanged_currency, date_from, date_to
+        )
+
+    async def aget_exchange_rate_data(
+        self,
+        source_currency: str,
+        exchanged_currency: str,
+        date_from: date,
+        date_to: date,
+    ) -> dict:
+        """
+        Asynchronous version of `get_exchange_rate_data`: the simulated latency does
+        not block the event loop.
+        """
+        self.check_span(date_from, date_to)
+        await asyncio.sleep(self.simulate_call())
+        return self.build_exchange_rate_data(
+            source_currency, exchanged_currency, date_from, date_to
+        )
+
+    def build_exchange_rate_data(
+        self,
+        source_currency: str,
+        exchanged_currency: str,
+        date_from: date,
+        date_to: date,
+    ) -> dict:
         try:
             currencies = exchanged_currency.split(",")
             data = {}
@@ -43,7 +211,7 @@ class CurrencyMockAdapter(BaseExchangeRateAdapter):
             current_date = date_from
             while current_date <= date_to:
                 data[current_date.strftime("%Y-%m-%d")] = {
-                    currency: round(random.uniform(0.5, 1.5), 8)
+                    currency: self.get_rate(source_currency, currency, current_date)
                     for currency in currencies
                 }
                 current_date += timedelta(days=1)
@@ -73,16 +241,39 @@ class CurrencyMockAdapter(BaseExchangeRateAdapter):
                 - "value": The converted amount based on a mock exchange rate.
 
         Raises:
+            ProviderError: If the call fails because of an injected failure.
             ValueError: If an error occurs while generating the conversion rate.
         """
+        time.sleep(self.simulate_call())
+        return self.build_exchange_convertion_data(
+            source_currency, exchanged_currency, amount
+        )
+
+    async def aget_exchange_convertion_data(
+        self, source_currency: str, exchanged_currency: str, amount: Decimal
+    ) -> dict:
+        """
+        Asynchronous version of `get_exchange_convertion_data`: the simulated latency
+        does not block the event loop.
+        """
+        await asyncio.sleep(self.simulate_call())
+        return self.build_exchange_convertion_data(
+            source_currency, exchanged_currency, amount
+        )
+
+    def build_exchange_convertion_data(
+        self, source_currency: str, exchanged_currency: str, amount: Decimal
+    ) -> dict:
         try:
+            now = datetime.now()
+            rate = self.get_rate(source_currency, exchanged_currency, now.date())
             data = {
-                "timestamp": datetime.now().timestamp(),
-                "date": datetime.now().strftime("%Y-%m-%d"),
+                "timestamp": now.timestamp(),
+                "date": now.strftime("%Y-%m-%d"),
                 "source_currency": source_currency,
                 "exchanged_currency": exchanged_currency,
                 "amount": amount,
-                "value": round(random.uniform(0.5, 1.5), 8) * float(amount),
+                "value": rate * float(amount),
             }
             return data
         except Exception:
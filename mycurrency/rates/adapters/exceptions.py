@@ -0,0 +1,26 @@
+"""
+Exceptions raised by the exchange rate adapters.
+
+They subclass ValueError, which is what callers already expect from a failing
+provider, so existing error handling keeps working.
+"""
+
+
+class ProviderError(ValueError):
+    """
+    Raised when a provider fails to serve a request.
+    """
+
+
+class ProviderThrottledError(ProviderError):
+    """
+    Raised when a provider rejects a request because of rate limiting (HTTP 429).
+
+    Attributes:
+        retry_after (float): Seconds to wait before retrying, as advertised by the
+            provider through the `Retry-After` header.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
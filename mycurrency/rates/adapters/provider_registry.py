@@ -0,0 +1,92 @@
+"""
+This module keeps the enabled providers and their adapters in memory, so selecting
+the provider of a call doesn't query the database nor instantiate an adapter.
+
+The providers are reloaded every RATES_PROVIDER_REGISTRY_TIMEOUT seconds, and right
+away when a Provider is saved or deleted. Adapters are kept per provider name and
+key, for the lifetime of the process.
+"""
+import threading
+import time
+from typing import Callable, List, Optional
+
+from django.conf import settings
+
+from ..models import Provider
+from .base_adapter import BaseExchangeRateAdapter
+
+
+# (loaded at, enabled providers ordered by priority)
+_providers = None
+_adapters = {}
+_lock = threading.Lock()
+
+
+def get_timeout() -> float:
+    return getattr(settings, "RATES_PROVIDER_REGISTRY_TIMEOUT", 60)
+
+
+def get_cached_providers() -> Optional[List[Provider]]:
+    cached = _providers
+    if cached is not None and time.monotonic() - cached[0] < get_timeout():
+        return cached[1]
+    return None
+
+
+def set_cached_providers(providers: List[Provider]):
+    global _providers
+    _providers = (time.monotonic(), providers)
+
+
+def get_enabled_providers() -> List[Provider]:
+    """
+    Returns the enabled providers, ordered by priority.
+    """
+    providers = get_cached_providers()
+    if providers is None:
+        providers = list(Provider.objects.filter(is_enabled=True).order_by("priority"))
+        set_cached_providers(providers)
+    return providers
+
+
+async def aget_enabled_providers() -> List[Provider]:
+    """
+    Asynchronous version of `get_enabled_providers`.
+    """
+    providers = get_cached_providers()
+    if providers is None:
+        providers = [
+            provider
+            async for provider in Provider.objects.filter(is_enabled=True).order_by(
+                "priority"
+            )
+        ]
+        set_cached_providers(providers)
+    return providers
+
+
+def get_adapter_instance(
+    provider: Provider, adapter_class: Callable[..., BaseExchangeRateAdapter]
+) -> BaseExchangeRateAdapter:
+    """
+    Returns the adapter of a provider, instantiated on first use.
+    """
+    key = (provider.name, provider.key, adapter_class)
+    adapter = _adapters.get(key)
+    if adapter is None:
+        with _lock:
+            adapter = _adapters.get(key)
+            if adapter is None:
+                adapter = _adapters[key] = adapter_class(api_key=provider.key)
+    return adapter
+
+
+def invalidate_provider_registry(sender=None, **kwargs):
+    """
+    `post_save` and `post_delete` receiver of Provider, and `setting_changed`
+    receiver (adapters read their configuration from the settings).
+    """
+    global _providers
+    with _lock:
+        _providers = None
+        _adapters.clear()
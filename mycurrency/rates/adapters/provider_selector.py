@@ -0,0 +1,185 @@
+"""
+Adaptive selection of the provider serving a call, from the latency and the errors
+of the recent calls to every provider.
+
+The statistics of a provider cover its last RATES_PROVIDER_STATS_WINDOW calls of the
+last RATES_PROVIDER_STATS_MAX_AGE seconds. A provider is unhealthy when at least
+RATES_PROVIDER_MIN_CALLS of them were made and RATES_PROVIDER_MAX_ERROR_RATE or more
+of them failed. Older calls are forgotten, so a demoted provider is tried again
+once its failures age out.
+
+Among the enabled providers, ordered by priority:
+    - The providers within RATES_PROVIDER_PRIORITY_BAND of the first one compete:
+      the first healthy one is selected ("priority", or "failover" when it's not
+      the first provider), unless another healthy one is
+      RATES_PROVIDER_LATENCY_MARGIN times faster ("latency").
+    - When none of them is healthy, the first healthy provider beyond the band is
+      selected ("failover"), else the first provider ("fallback").
+With the default band of 0, the first provider is only demoted while unhealthy.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+from ..models import Provider
+from ..service import metrics
+
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_REASON = "priority"
+LATENCY_REASON = "latency"
+FAILOVER_REASON = "failover"
+FALLBACK_REASON = "fallback"
+
+_stats = {}
+_stats_lock = threading.Lock()
+# Last (provider, reason) selected, to log the changes of decision only
+_last_decision = None
+
+
+class ProviderStats:
+    """
+    Rolling window of the (time, latency, success) of the calls to a provider.
+    """
+
+    def __init__(self, size: int):
+        self.calls = deque(maxlen=size)
+
+    def add(self, seconds: float, success: bool):
+        self.calls.append((time.monotonic(), seconds, success))
+
+    def expire(self, max_age: float):
+        oldest = time.monotonic() - max_age
+        while self.calls and self.calls[0][0] < oldest:
+            self.calls.popleft()
+
+    @property
+    def error_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, _, success in self.calls if not success) / len(self.calls)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """
+        Mean latency of the successful calls, None without enough of them.
+        """
+        latencies = [seconds for _, seconds, success in self.calls if success]
+        if len(latencies) < get_min_calls():
+            return None
+        return sum(latencies) / len(latencies)
+
+    @property
+    def healthy(self) -> bool:
+        return len(self.calls) < get_min_calls() or self.error_rate < getattr(
+            settings, "RATES_PROVIDER_MAX_ERROR_RATE", 0.5
+        )
+
+
+def get_min_calls() -> int:
+    return getattr(settings, "RATES_PROVIDER_MIN_CALLS", 5)
+
+
+def get_stats(provider_name: str) -> ProviderStats:
+    """
+    Returns the statistics of a provider, without the calls that aged out. Must be
+    called holding `_stats_lock`.
+    """
+    stats = _stats.get(provider_name)
+    if stats is None:
+        stats = _stats[provider_name] = ProviderStats(
+            getattr(settings, "RATES_PROVIDER_STATS_WINDOW", 50)
+        )
+    stats.expire(getattr(settings, "RATES_PROVIDER_STATS_MAX_AGE", 300))
+    return stats
+
+
+def record_call(provider_name: str, seconds: float, success: bool):
+    with _stats_lock:
+        stats = get_stats(provider_name)
+        stats.add(seconds, success)
+        error_rate, latency = stats.error_rate, stats.latency
+    metrics.record_provider_health(provider_name, error_rate, latency)
+
+
+@contextmanager
+def track_call(provider_name: str):
+    """
+    Adds the latency and the outcome of a provider call to its statistics.
+    """
+    start = time.perf_counter()
+    success = False
+    try:
+        yield
+        success = True
+    finally:
+        record_call(provider_name, time.perf_counter() - start, success)
+
+
+def reset_stats():
+    global _last_decision
+    with _stats_lock:
+        _stats.clear()
+        _last_decision = None
+
+
+def choose_provider(providers: List[Provider]) -> Tuple[Provider, str]:
+    """
+    Returns the provider to call among enabled providers ordered by priority, and
+    the reason of the choice (see the module docstring).
+    """
+    band = getattr(settings, "RATES_PROVIDER_PRIORITY_BAND", 0)
+    margin = getattr(settings, "RATES_PROVIDER_LATENCY_MARGIN", 1.5)
+    with _stats_lock:
+        stats = {provider.name: get_stats(provider.name) for provider in providers}
+        healthy = [provider for provider in providers if stats[provider.name].healthy]
+        latencies = {
+            name: provider_stats.latency for name, provider_stats in stats.items()
+        }
+
+    candidates = [
+        provider
+        for provider in healthy
+        if provider.priority <= providers[0].priority + band
+    ]
+    if not candidates:
+        if healthy:
+            return healthy[0], FAILOVER_REASON
+        return providers[0], FALLBACK_REASON
+
+    selected = candidates[0]
+    reason = PRIORITY_REASON if selected is providers[0] else FAILOVER_REASON
+    for provider in candidates[1:]:
+        latency, selected_latency = latencies[provider.name], latencies[selected.name]
+        if (
+            latency is not None
+            and selected_latency is not None
+            and latency * margin < selected_latency
+        ):
+            selected, reason = provider, LATENCY_REASON
+    return selected, reason
+
+
+def select_provider(providers: List[Provider]) -> Optional[Provider]:
+    """
+    Selects the provider of a call among the enabled providers ordered by priority,
+    counting the decision and logging it when it changes.
+    """
+    global _last_decision
+    if not providers:
+        return None
+
+    provider, reason = choose_provider(providers)
+    metrics.record_provider_selection(provider.name, reason)
+    decision = (provider.name, reason)
+    if decision != _last_decision:
+        _last_decision = decision
+        log = logger.info if reason == PRIORITY_REASON else logger.warning
+        log(f"ProviderSelector - {provider.name} selected by {reason}")
+    return provider
@@ -0,0 +1,198 @@
+"""
+On-disk cache of provider responses, so requests sent again (e.g. replays of failed
+backfills, or the same backfill during development) don't reach the provider.
+
+Responses are stored in a SQLite database at RATES_PROVIDER_CACHE_PATH (the cache
+is disabled when it's None), keyed by the SHA-256 fingerprint of the provider, the
+endpoint and the parameters of the request. Responses about past dates don't
+change and never expire, the other ones expire after RATES_PROVIDER_CACHE_TTL
+seconds. Once the responses take more than RATES_PROVIDER_CACHE_MAX_BYTES, the
+least recently used ones are evicted.
+
+Example:
+    cache = get_response_cache()
+    key = fingerprint("CurrencyBeacon", "timeseries", params)
+    data = cache.get(key)
+    if data is None:
+        data = fetch(params)
+        cache.set(key, data, ttl=None)
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+from django.conf import settings
+
+from ..service import metrics
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    fingerprint TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def fingerprint(provider: str, endpoint: str, params: dict) -> str:
+    """
+    Returns the key of a request, independent of the order of its parameters.
+    """
+    content = json.dumps(
+        [provider, endpoint, params], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite cache of JSON responses, with a connection per thread.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached response of a request, or None when it's missing or has
+        expired.
+        """
+        now = time.time()
+        try:
+            row = self.connection.execute(
+                "SELECT body, expires_at FROM responses WHERE fingerprint = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self.connection.execute(
+                    "DELETE FROM responses WHERE fingerprint = ?", (key,)
+                )
+                row = None
+            if row is not None:
+                self.connection.execute(
+                    "UPDATE responses SET used_at = ? WHERE fingerprint = ?", (now, key)
+                )
+        except sqlite3.Error as e:
+            # The request is sent to the provider instead
+            logger.error(f"ResponseCache - Reading {key} failed: {e}")
+            row = None
+        metrics.record_cache_lookup(cache="provider_response", hit=row is not None)
+        return None if row is None else json.loads(zlib.decompress(row[0]))
+
+    def set(
+        self,
+        key: str,
+        data: dict,
+        ttl: Optional[float] = None,
+        provider: str = "",
+        endpoint: str = "",
+    ):
+        """
+        Stores the response of a request, for `ttl` seconds or forever when None,
+        then evicts the least recently used responses beyond the size cap. Failures
+        are logged, the response is just not cached.
+        """
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode())
+        now = time.time()
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    provider,
+                    endpoint,
+                    body,
+                    len(body),
+                    None if ttl is None else now + ttl,
+                    now,
+                ),
+            )
+            self.evict()
+        except sqlite3.Error as e:
+            logger.error(f"ResponseCache - Writing {key} failed: {e}")
+
+    def get_size(self) -> int:
+        (size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return size
+
+    def evict(self):
+        size = self.get_size()
+        if size > self.max_bytes:
+            evicted = []
+            for key, key_size in self.connection.execute(
+                "SELECT fingerprint, size FROM responses ORDER BY used_at"
+            ):
+                evicted.append((key,))
+                size -= key_size
+                if size <= self.max_bytes:
+                    break
+            self.connection.executemany(
+                "DELETE FROM responses WHERE fingerprint = ?", evicted
+            )
+            logger.info(f"ResponseCache - Evicted {len(evicted)} responses")
+        metrics.record_provider_cache_size(size)
+
+    def clear(self):
+        self.connection.execute("DELETE FROM responses")
+        metrics.record_provider_cache_size(0)
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the cache at RATES_PROVIDER_CACHE_PATH, or None when it's disabled or
+    can't be opened (requests are then sent to the provider).
+    """
+    path = getattr(settings, "RATES_PROVIDER_CACHE_PATH", None)
+    if not path:
+        return None
+    path = str(path)
+    with _caches_lock:
+        if path not in _caches:
+            try:
+                _caches[path] = ResponseCache(
+                    path,
+                    getattr(
+                        settings, "RATES_PROVIDER_CACHE_MAX_BYTES", 256 * 1024**2
+                    ),
+                )
+            except sqlite3.Error as e:
+                logger.error(f"ResponseCache - Opening {path} failed: {e}")
+                return None
+        return _caches[path]
+
+
+def get_ttl() -> Optional[float]:
+    """
+    Time to live of the responses including today or future dates.
+    """
+    return getattr(settings, "RATES_PROVIDER_CACHE_TTL", 3600)
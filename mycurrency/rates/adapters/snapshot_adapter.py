@@ -0,0 +1,259 @@
+"""
+Adapter serving exchange rates from a local snapshot file, without any network
+call, e.g. as a low priority fallback or as the provider of air-gapped and test
+environments.
+
+A snapshot is written by `manage.py export_rates rates.snapshot` and holds a
+matrix of float64 rates (NaN where there's no rate) per source currency, with a
+row per day and a column per currency:
+
+    b"MCSNAP1\\n" | header length (uint32) | JSON header | padding | rates
+
+The JSON header lists the "date_from" of the first row, the number of "days", the
+"sources" and the "currencies" of the matrices. The file is memory-mapped, so the
+rates of a date are read at an offset computed from the date, without loading the
+snapshot. The `Provider.key` is the path of the file, relative to BASE_DIR unless
+absolute.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+
+from .base_adapter import BaseExchangeRateAdapter
+from .exceptions import ProviderError
+
+
+SNAPSHOT_MAGIC = b"MCSNAP1\n"
+HEADER_LENGTH = struct.Struct("<I")
+RATE = struct.Struct("<d")
+
+# Snapshots are shared by the adapter instances, reopened when their file changes
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def pack_snapshot_header(
+    date_from: date, days: int, sources: List[str], currencies: List[str]
+) -> bytes:
+    """
+    Returns the bytes preceding the rates of a snapshot, padded so the rates are
+    aligned on 8 bytes.
+    """
+    header = json.dumps(
+        {
+            "date_from": date_from.isoformat(),
+            "days": days,
+            "sources": sources,
+            "currencies": currencies,
+        }
+    ).encode()
+    length = len(SNAPSHOT_MAGIC) + HEADER_LENGTH.size + len(header)
+    return (
+        SNAPSHOT_MAGIC
+        + HEADER_LENGTH.pack(len(header))
+        + header
+        + b" " * (-length % RATE.size)
+    )
+
+
+class RateSnapshot:
+    """
+    Memory-mapped snapshot file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as snapshot:
+            self.modified_at = os.fstat(snapshot.fileno()).st_mtime_ns
+            self.buffer = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.buffer[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ProviderError(f"Invalid rates snapshot: {path}")
+        (length,) = HEADER_LENGTH.unpack_from(self.buffer, len(SNAPSHOT_MAGIC))
+        start = len(SNAPSHOT_MAGIC) + HEADER_LENGTH.size
+        header = json.loads(self.buffer[start : start + length])
+        self.offset = start + length + (-(start + length) % RATE.size)
+        self.date_from = date.fromisoformat(header["date_from"])
+        self.days = header["days"]
+        self.sources = {code: index for index, code in enumerate(header["sources"])}
+        self.currencies = {
+            code: index for index, code in enumerate(header["currencies"])
+        }
+        self.row = struct.Struct("<{}d".format(len(self.currencies)))
+
+    @property
+    def date_to(self) -> date:
+        return self.date_from + timedelta(days=self.days - 1)
+
+    def read_row(self, source_index: int, day: int) -> tuple:
+        return self.row.unpack_from(
+            self.buffer, self.offset + (source_index * self.days + day) * self.row.size
+        )
+
+    def get_rates(self, source_currency: str, valuation_date: date) -> Dict[str, float]:
+        """
+        Returns the rates of a source currency at a date by currency. Source
+        currencies without their own matrix are triangulated through the first
+        source currency of the snapshot.
+        """
+        day = (valuation_date - self.date_from).days
+        if not 0 <= day < self.days:
+            return {}
+
+        if source_currency in self.sources:
+            row = self.read_row(self.sources[source_currency], day)
+            pivot_rates = {}
+            divisor = 1.0
+        elif self.sources and source_currency in self.currencies:
+            pivot, pivot_index = next(iter(self.sources.items()))
+            row = self.read_row(pivot_index, day)
+            divisor = row[self.currencies[source_currency]]
+            if math.isnan(divisor) or not divisor:
+                return {}
+            pivot_rates = {pivot: 1 / divisor}
+        else:
+            return {}
+
+        rates = {
+            code: row[index] / divisor
+            for code, index in self.currencies.items()
+            if code != source_currency and not math.isnan(row[index])
+        }
+        rates.update(pivot_rates)
+        return rates
+
+    def get_latest_rate(
+        self, source_currency: str, exchanged_currency: str, valuation_date: date
+    ):
+        """
+        Returns the date and the rate of the closest date with a rate on or before
+        `valuation_date`, or (None, None).
+        """
+        if exchanged_currency not in self.currencies:
+            return None, None
+        current_date = min(valuation_date, self.date_to)
+        while current_date >= self.date_from:
+            rate = self.get_rates(source_currency, current_date).get(exchanged_currency)
+            if rate is not None:
+                return current_date, rate
+            current_date -= timedelta(days=1)
+        return None, None
+
+
+def get_snapshot_path(api_key: str) -> str:
+    return os.path.join(settings.BASE_DIR, api_key or "rates.snapshot")
+
+
+def get_snapshot(path: str) -> RateSnapshot:
+    """
+    Returns the snapshot of a file, opening it again when the file changed.
+
+    Raises:
+        ProviderError: If the file is missing or is not a snapshot.
+    """
+    try:
+        modified_at = os.stat(path).st_mtime_ns
+    except OSError:
+        raise ProviderError(f"Rates snapshot not found: {path}")
+    with _snapshots_lock:
+        snapshot = _snapshots.get(path)
+        if snapshot is None or snapshot.modified_at != modified_at:
+            snapshot = _snapshots[path] = RateSnapshot(path)
+        return snapshot
+
+
+class SnapshotAdapter(BaseExchangeRateAdapter):
+    """
+    Adapter to fetch exchange rates from a snapshot file (see the module docstring).
+    """
+
+    def __init__(self, api_key: str):
+        super().__init__(api_key)
+        self.path = get_snapshot_path(api_key)
+
+    def warm_up(self, timeout: float):
+        """
+        Maps the snapshot file, so the first request doesn't pay for it.
+        """
+        get_snapshot(self.path)
+
+    def iter_dates(self, date_from: date, date_to: date) -> Iterable[date]:
+        current_date = date_from
+        while current_date <= date_to:
+            yield current_date
+            current_date += timedelta(days=1)
+
+    def get_exchange_rate_data(
+        self,
+        source_currency: str,
+        exchanged_currency: str,
+        date_from: date,
+        date_to: date,
+    ) -> dict:
+        """
+        Reads the rates of a date range from the snapshot.
+
+        Args:
+            source_currency (str): The source currency code (e.g., "USD").
+            exchanged_currency (str): Comma-separated target currency codes (e.g., "EUR,GBP").
+            date_from (date): The start date for the exchange rate data.
+            date_to (date): The end date for the exchange rate data.
+
+        Returns:
+            dict: A dictionary where keys are date strings (YYYY-MM-DD), and values are
+                  dictionaries mapping target currencies to their exchange rates. Dates
+                  without any rate in the snapshot are left out.
+
+        Raises:
+            ProviderError: If the snapshot can't be read.
+        """
+        snapshot = get_snapshot(self.path)
+        currencies = exchanged_currency.split(",")
+        data = {}
+        for current_date in self.iter_dates(
+            max(date_from, snapshot.date_from), min(date_to, snapshot.date_to)
+        ):
+            rates = snapshot.get_rates(source_currency, current_date)
+            rates = {
+                currency: rates[currency]
+                for currency in currencies
+                if currency in rates
+            }
+            if rates:
+                data[current_date.isoformat()] = rates
+        return data
+
+    def get_exchange_convertion_data(
+        self, source_currency: str, exchanged_currency: str, amount: Decimal
+    ) -> dict:
+        """
+        Converts an amount with the most recent rate of the pair in the snapshot.
+
+        Returns:
+            dict: The same fields as the other adapters, "date" being the valuation
+                  date of the rate applied.
+
+        Raises:
+            ProviderError: If the snapshot can't be read or has no rate for the pair.
+        """
+        now = datetime.now()
+        valuation_date, rate = get_snapshot(self.path).get_latest_rate(
+            source_currency, exchanged_currency, now.date()
+        )
+        if rate is None:
+            raise ProviderError("Convertion rate not found")
+        return {
+            "timestamp": now.timestamp(),
+            "date": valuation_date.isoformat(),
+            "source_currency": source_currency,
+            "exchanged_currency": exchanged_currency,
+            "amount": amount,
+            "value": rate * float(amount),
+        }
@@ -1,9 +1,20 @@
 from django.contrib import admin
-from .models import BatchProcess, Currency, CurrencyExchangeRate, Provider
+from .models import (
+    BatchProcess,
+    Currency,
+    CurrencyExchangeRate,
+    LatestExchangeRate,
+    Provider,
+    RateRollup,
+    SyncWatermark,
+)
 
 
 # Register the model
 admin.site.register(Currency)
 admin.site.register(CurrencyExchangeRate)
+admin.site.register(LatestExchangeRate)
 admin.site.register(Provider)
 admin.site.register(BatchProcess)
+admin.site.register(RateRollup)
+admin.site.register(SyncWatermark)
@@ -1,6 +1,74 @@
 from django.apps import AppConfig
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class RatesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "rates"
+
+    def ready(self):
+        from rates.adapters.provider_registry import invalidate_provider_registry
+        from rates.domain.backends import configure_connection
+        from rates.domain.db import delete_compact_exchange_rates
+        from rates.middleware import install_query_counter
+        from rates.models import (
+            CompactExchangeRate,
+            Currency,
+            CurrencyExchangeRate,
+            LatestExchangeRate,
+            Provider,
+        )
+        from rates.service.currencies import invalidate_currency_codes
+        from rates.service.history import clear_rate_series
+        from rates.service.latest import clear_latest_rates, invalidate_latest_rate
+        from rates.service.warmup import start_startup_warm_up
+
+        connection_created.connect(
+            configure_connection, dispatch_uid="rates.configure_connection"
+        )
+        connection_created.connect(
+            install_query_counter, dispatch_uid="rates.install_query_counter"
+        )
+        post_save.connect(
+            invalidate_latest_rate,
+            sender=LatestExchangeRate,
+            dispatch_uid="rates.invalidate_latest_rate",
+        )
+        for sender in (Currency, LatestExchangeRate):
+            post_delete.connect(
+                clear_latest_rates,
+                sender=sender,
+                dispatch_uid="rates.clear_latest_rates.{}".format(sender.__name__),
+            )
+        post_delete.connect(
+            delete_compact_exchange_rates,
+            sender=Currency,
+            dispatch_uid="rates.delete_compact_exchange_rates",
+        )
+        for signal in (post_save, post_delete):
+            signal.connect(
+                invalidate_currency_codes,
+                sender=Currency,
+                dispatch_uid="rates.invalidate_currency_codes",
+            )
+        for sender in (Currency, CurrencyExchangeRate, CompactExchangeRate):
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    clear_rate_series,
+                    sender=sender,
+                    dispatch_uid="rates.clear_rate_series.{}".format(sender.__name__),
+                )
+        for signal in (post_save, post_delete):
+            signal.connect(
+                invalidate_provider_registry,
+                sender=Provider,
+                dispatch_uid="rates.invalidate_provider_registry",
+            )
+        setting_changed.connect(
+            invalidate_provider_registry,
+            dispatch_uid="rates.invalidate_provider_registry.settings",
+        )
+
+        start_startup_warm_up()
@@ -0,0 +1,91 @@
+"""
+This module contains the database vendor specific code: the connection setup and
+the bulk insertion of exchange rates.
+"""
+import csv
+import io
+from typing import List
+
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+
+
+BULK_BATCH_SIZE = 5000
+
+
+def configure_connection(sender, connection, **kwargs):
+    """
+    `connection_created` signal receiver tuning every new database connection.
+
+    SQLite connections get the SQLITE_PRAGMAS from settings (WAL journaling,
+    busy_timeout and synchronous=NORMAL by default), so the batch threads writing
+    rates don't lock the views out of the database.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    # Using the raw connection: these statements shouldn't count as app queries
+    for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+        connection.connection.execute("PRAGMA {} = {}".format(name, value))
+
+
+def bulk_insert_rates(rates: List[models.Model]) -> int:
+    """
+    Inserts exchange rates in bulk, with COPY on PostgreSQL and batched INSERTs on
+    the other databases. Rates conflicting with stored ones are skipped.
+
+    Args:
+        rates (List[models.Model]): Unsaved exchange rates, CurrencyExchangeRate or
+            CompactExchangeRate instances.
+
+    Returns:
+        int: The number of rates sent to the database.
+    """
+    if not rates:
+        return 0
+
+    if connection.vendor == "postgresql":
+        try:
+            with transaction.atomic():
+                copy_rates(rates)
+            return len(rates)
+        except IntegrityError:
+            # A concurrent writer stored some of the rates, COPY can't skip them
+            pass
+
+    type(rates[0]).objects.bulk_create(
+        rates, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True
+    )
+    return len(rates)
+
+
+def copy_rates(rates: List[models.Model]):
+    """
+    Streams exchange rates into PostgreSQL with `COPY ... FROM STDIN`.
+    """
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    opts = rates[0]._meta
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    statement = "COPY {} ({}) FROM STDIN".format(
+        connection.ops.quote_name(opts.db_table),
+        ", ".join(connection.ops.quote_name(field.column) for field in fields),
+    )
+    rows = (
+        [
+            field.get_db_prep_save(getattr(rate, field.attname), connection)
+            for field in fields
+        ]
+        for rate in rates
+    )
+
+    with connection.cursor() as cursor:
+        if is_psycopg3:
+            with cursor.cursor.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.cursor.copy_expert(statement + " WITH (FORMAT csv)", buffer)
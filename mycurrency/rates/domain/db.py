@@ -3,8 +3,73 @@ This module contains functions to fetch and group exchange rates from the databa
 """
 from collections import defaultdict
 from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
 
-from ..models import CurrencyExchangeRate
+from django.conf import settings
+from django.db.models import Count, Max, Q, QuerySet
+
+from ..models import CompactExchangeRate, Currency, CurrencyExchangeRate
+
+
+def compact_storage_enabled() -> bool:
+    return getattr(settings, "RATES_COMPACT_STORAGE", False)
+
+
+def get_exchange_rate_model():
+    """
+    Returns the model storing the exchange rates (see RATES_COMPACT_STORAGE).
+    """
+    if compact_storage_enabled():
+        return CompactExchangeRate
+    return CurrencyExchangeRate
+
+
+def delete_compact_exchange_rates(sender, instance, **kwargs):
+    """
+    `post_delete` receiver of Currency: compact exchange rates reference currencies
+    by id, without foreign keys to delete them along with the currency.
+    """
+    CompactExchangeRate.objects.filter(
+        Q(source_currency_id=instance.id) | Q(exchanged_currency_id=instance.id)
+    ).delete()
+
+
+def build_exchange_rate(
+    source_currency_id: int, exchanged_currency_id: int, valuation_date: date, rate
+):
+    """
+    Builds an unsaved exchange rate of the configured storage model.
+    """
+    if compact_storage_enabled():
+        return CompactExchangeRate(
+            source_currency_id=source_currency_id,
+            exchanged_currency_id=exchanged_currency_id,
+            valuation_date=valuation_date,
+            scaled_rate=CompactExchangeRate.scale(rate),
+        )
+    return CurrencyExchangeRate(
+        source_currency_id=source_currency_id,
+        exchanged_currency_id=exchanged_currency_id,
+        valuation_date=valuation_date,
+        rate_value=rate,
+    )
+
+
+def filter_exchange_rates(
+    source_currency: str, exchanged_currency: str = None, **filters
+) -> QuerySet:
+    """
+    Filters the stored exchange rates by currency codes, whatever the storage model.
+    """
+    filters["source_currency_id__in"] = Currency.objects.filter(
+        code=source_currency
+    ).values("id")
+    if exchanged_currency:
+        filters["exchanged_currency_id__in"] = Currency.objects.filter(
+            code=exchanged_currency
+        ).values("id")
+    return get_exchange_rate_model().objects.filter(**filters)
 
 
 def get_exchange_rates_grouped_by_date_and_currency(
@@ -44,24 +109,172 @@ def get_exchange_rates_grouped_by_date_and_currency(
 
     """
     # Getting CurrencyExchangeRate by source_currency and valuation_date range
-    exchange_rate_queryset = (
+    exchange_rates = get_exchange_rates_queryset(source_currency, date_from, date_to)
+    if compact_storage_enabled():
+        currency_codes = dict(Currency.objects.values_list("id", "code"))
+        return group_compact_exchange_rates(
+            source_currency, exchange_rates, currency_codes
+        )
+    return group_exchange_rates(source_currency, exchange_rates)
+
+
+async def aget_exchange_rates_grouped_by_date_and_currency(
+    source_currency: str, date_from: date, date_to: date
+) -> dict:
+    """
+    Asynchronous version of `get_exchange_rates_grouped_by_date_and_currency`,
+    iterating over the results with the async ORM.
+    """
+    exchange_rates = [
+        exchange_rate
+        async for exchange_rate in get_exchange_rates_queryset(
+            source_currency, date_from, date_to
+        )
+    ]
+    if compact_storage_enabled():
+        currency_codes = {
+            currency_id: code
+            async for currency_id, code in Currency.objects.values_list("id", "code")
+        }
+        return group_compact_exchange_rates(
+            source_currency, exchange_rates, currency_codes
+        )
+    return group_exchange_rates(source_currency, exchange_rates)
+
+
+def get_exchange_rates_state_queryset(
+    source_currency: str, date_from: date, date_to: date
+) -> QuerySet:
+    return filter_exchange_rates(
+        source_currency, valuation_date__range=(date_from, date_to)
+    )
+
+
+def get_exchange_rates_state(source_currency: str, date_from: date, date_to: date):
+    """
+    Returns the number of stored rates of a source currency in a date range and
+    the time the last of them was ingested, as {"count": ..., "ingested_at": ...}.
+    Both change whenever the rates of the range do.
+    """
+    return get_exchange_rates_state_queryset(
+        source_currency, date_from, date_to
+    ).aggregate(count=Count("id"), ingested_at=Max("ingested_at"))
+
+
+async def aget_exchange_rates_state(
+    source_currency: str, date_from: date, date_to: date
+):
+    """
+    Asynchronous version of `get_exchange_rates_state`.
+    """
+    return await get_exchange_rates_state_queryset(
+        source_currency, date_from, date_to
+    ).aaggregate(count=Count("id"), ingested_at=Max("ingested_at"))
+
+
+def get_exchange_rates_queryset(
+    source_currency: str, date_from: date, date_to: date
+) -> QuerySet:
+    """
+    Returns (valuation_date, exchanged_currency_code, rate_value) tuples ordered by
+    valuation date and exchanged currency. With the compact storage, the tuples hold
+    the exchanged currency id and the scaled rate instead, converted by
+    `group_compact_exchange_rates`.
+    """
+    if compact_storage_enabled():
+        return (
+            filter_exchange_rates(
+                source_currency, valuation_date__range=(date_from, date_to)
+            )
+            .order_by("valuation_date", "exchanged_currency_id")
+            .values_list("valuation_date", "exchanged_currency_id", "scaled_rate")
+        )
+    return (
         CurrencyExchangeRate.objects.filter(
             source_currency__code=source_currency,
             valuation_date__range=(date_from, date_to),
         )
-        .select_related("exchanged_currency")
         .order_by("valuation_date", "exchanged_currency__code")
+        .values_list("valuation_date", "exchanged_currency__code", "rate_value")
     )
 
+
+def get_exchange_rates_by_date_and_currency(
+    source_currency: str, date_from: date, date_to: date
+) -> Dict[Tuple[date, str], Decimal]:
+    """
+    Returns the stored rates of a source currency in a date range keyed by
+    (valuation date, exchanged currency code), as Decimals.
+    """
+    exchange_rates = get_exchange_rates_queryset(source_currency, date_from, date_to)
+    if compact_storage_enabled():
+        currency_codes = dict(Currency.objects.values_list("id", "code"))
+        return {
+            (valuation_date, currency_codes[currency_id]): Decimal(scaled_rate).scaleb(
+                -CompactExchangeRate.SCALE
+            )
+            for valuation_date, currency_id, scaled_rate in exchange_rates
+            # Skipping the rates of deleted currencies
+            if currency_id in currency_codes
+        }
+    return {
+        (valuation_date, code): rate_value
+        for valuation_date, code, rate_value in exchange_rates
+    }
+
+
+def get_pair_exchange_rates(
+    source_currency: str, exchanged_currency: str
+) -> List[Tuple[date, Decimal]]:
+    """
+    Returns every stored (valuation date, rate) of a currency pair, ordered by
+    valuation date.
+    """
+    exchange_rates = filter_exchange_rates(
+        source_currency, exchanged_currency
+    ).order_by("valuation_date")
+    if compact_storage_enabled():
+        return [
+            (valuation_date, Decimal(scaled_rate).scaleb(-CompactExchangeRate.SCALE))
+            for valuation_date, scaled_rate in exchange_rates.values_list(
+                "valuation_date", "scaled_rate"
+            )
+        ]
+    return list(exchange_rates.values_list("valuation_date", "rate_value"))
+
+
+def group_exchange_rates(source_currency: str, exchange_rates: Iterable) -> dict:
     # Prepare a dictionary to store the results
     response = defaultdict(dict)
-    for exchange_rate in exchange_rate_queryset:
-        valuation_date = exchange_rate.valuation_date
-        exchanged_currency_code = exchange_rate.exchanged_currency.code
-        rate_value = exchange_rate.rate_value
-
+    for valuation_date, exchanged_currency_code, rate_value in exchange_rates:
         # Add the exchange rate for each currency under the corresponding valuation_date
         pair = "{}/{}".format(source_currency, exchanged_currency_code)
         response[valuation_date.strftime("%Y-%m-%d")][pair] = float(rate_value)
 
     return response
+
+
+def group_compact_exchange_rates(
+    source_currency: str, exchange_rates: Iterable, currency_codes: dict
+) -> dict:
+    """
+    Groups compact exchange rates like `group_exchange_rates`, converting the
+    currency ids and the scaled rates on the way out.
+    """
+    factor = CompactExchangeRate.FACTOR
+    pairs = {
+        currency_id: "{}/{}".format(source_currency, code)
+        for currency_id, code in currency_codes.items()
+    }
+    response = defaultdict(dict)
+    valuation_day, day_rates = None, None
+    for valuation_date, exchanged_currency_id, scaled_rate in exchange_rates:
+        # Rows come ordered by date, so each date is formatted only once
+        if valuation_date != valuation_day:
+            valuation_day = valuation_date
+            day_rates = response[valuation_date.strftime("%Y-%m-%d")]
+        pair = pairs.get(exchanged_currency_id)
+        if pair is not None:  # None for the rates of a deleted currency
+            day_rates[pair] = scaled_rate / factor
+
+    return response
@@ -0,0 +1,72 @@
+"""
+Backfills the exchange rates of several source currencies in one batch process,
+triangulating through a pivot currency where possible:
+
+    python mycurrency/manage.py backfill_rates USD EUR GBP --date-from 2020-01-01
+"""
+import asyncio
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rates.models import BatchProcess, Currency
+from rates.service.batch_processor import batch_backfill
+
+
+class Command(BaseCommand):
+    help = "Backfills the exchange rates of several source currencies."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source_currencies",
+            nargs="*",
+            help="Source currency codes (default: all the currencies).",
+        )
+        parser.add_argument(
+            "--date-from", type=date.fromisoformat, required=True, help="YYYY-MM-DD"
+        )
+        parser.add_argument(
+            "--date-to",
+            type=date.fromisoformat,
+            default=None,
+            help="YYYY-MM-DD (default: today).",
+        )
+        parser.add_argument(
+            "--pivot", help="Pivot currency (default: RATES_BACKFILL_PIVOT)."
+        )
+        parser.add_argument(
+            "--no-triangulate",
+            action="store_true",
+            help="Fetch every source currency from the provider.",
+        )
+
+    def handle(self, *args, **options):
+        valid_currencies = set(Currency.objects.values_list("code", flat=True))
+        source_currencies = options["source_currencies"] or sorted(valid_currencies)
+        unknown = set(source_currencies) - valid_currencies
+        if unknown:
+            raise CommandError(
+                "Unknown currencies: {}".format(", ".join(sorted(unknown)))
+            )
+        date_to = options["date_to"] or timezone.now().date()
+        if options["date_from"] > date_to:
+            raise CommandError("Invalid date range")
+
+        process_id = asyncio.run(
+            batch_backfill(
+                source_currencies,
+                valid_currencies,
+                options["date_from"],
+                date_to,
+                pivot=options["pivot"],
+                triangulate=False if options["no_triangulate"] else None,
+            )
+        )
+        process = BatchProcess.objects.get(process_id=process_id)
+        message = "{} {}: {}/{} processes".format(
+            process.status, process_id, process.processes_counter, process.processes
+        )
+        if process.status == BatchProcess.Status.FAILED:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
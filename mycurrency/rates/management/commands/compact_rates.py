@@ -0,0 +1,54 @@
+"""
+Copies the stored exchange rates into the compact storage (CompactExchangeRate),
+before enabling RATES_COMPACT_STORAGE.
+"""
+from django.core.management.base import BaseCommand
+
+from rates.domain.backends import BULK_BATCH_SIZE, bulk_insert_rates
+from rates.models import CompactExchangeRate, CurrencyExchangeRate
+
+
+class Command(BaseCommand):
+    help = "Copies the exchange rates into the compact storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BULK_BATCH_SIZE,
+            help="Number of rates copied per query.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        rows = CurrencyExchangeRate.objects.order_by("id").values_list(
+            "id",
+            "source_currency_id",
+            "exchanged_currency_id",
+            "valuation_date",
+            "rate_value",
+            "ingested_at",
+        )
+
+        copied_rows = 0
+        last_id = 0
+        while True:
+            chunk = list(rows.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            compact_rates = [
+                CompactExchangeRate(
+                    source_currency_id=source_id,
+                    exchanged_currency_id=exchanged_id,
+                    valuation_date=valuation_date,
+                    scaled_rate=CompactExchangeRate.scale(rate),
+                    ingested_at=ingested,
+                )
+                for _, source_id, exchanged_id, valuation_date, rate, ingested in chunk
+            ]
+            copied_rows += bulk_insert_rates(compact_rates)
+
+        self.stdout.write(
+            self.style.SUCCESS("Copied {} exchange rates".format(copied_rows))
+        )
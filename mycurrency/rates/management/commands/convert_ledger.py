@@ -0,0 +1,92 @@
+"""
+Converts a CSV or NDJSON ledger of (date, currency, amount) rows into a reporting
+currency with the historical rates, e.g. for a month-end revaluation:
+
+    python mycurrency/manage.py convert_ledger ledger.csv --reporting-currency EUR \
+        --output ledger_eur.csv
+"""
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rates.models import Currency
+from rates.service.ledger import (
+    CSV_FORMAT,
+    LEDGER_FORMATS,
+    NDJSON_FORMAT,
+    convert_ledger,
+    read_ledger,
+    write_ledger,
+)
+
+
+def guess_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    return NDJSON_FORMAT if extension in (".ndjson", ".jsonl") else CSV_FORMAT
+
+
+class Command(BaseCommand):
+    help = "Converts a ledger into a reporting currency with the historical rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Ledger file, or - for the standard input.")
+        parser.add_argument(
+            "--reporting-currency", required=True, help="Currency of the values."
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Converted ledger file (default: the standard output).",
+        )
+        parser.add_argument(
+            "--format",
+            choices=LEDGER_FORMATS,
+            help="Ledger format (default: from the input extension, else csv).",
+        )
+        parser.add_argument(
+            "--no-fill",
+            action="store_true",
+            help="Don't fetch the missing rates from the provider.",
+        )
+
+    def handle(self, *args, **options):
+        reporting_currency = options["reporting_currency"]
+        if not Currency.objects.filter(code=reporting_currency).exists():
+            raise CommandError(f"Unknown currency: {reporting_currency}")
+        ledger_format = options["format"] or guess_format(options["input"])
+
+        if options["input"] == "-":
+            input_file = sys.stdin
+        else:
+            input_file = open(options["input"], newline="", encoding="utf-8")
+        if options["output"] == "-":
+            output_file = sys.stdout.buffer
+        else:
+            output_file = open(options["output"], "wb")
+
+        stats = {}
+        try:
+            chunks = convert_ledger(
+                read_ledger(input_file, ledger_format),
+                reporting_currency,
+                fill_gaps=not options["no_fill"],
+                stats=stats,
+            )
+            for content in write_ledger(chunks, ledger_format):
+                output_file.write(content)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+            if output_file is not sys.stdout.buffer:
+                output_file.close()
+
+        self.stderr.write(
+            "Converted {} rows into {} ({} failed) in {:.3f}s, {:.0f} rows/s".format(
+                stats["rows"],
+                reporting_currency,
+                stats["failed"],
+                stats["seconds"],
+                stats["rows_per_second"],
+            )
+        )
@@ -0,0 +1,56 @@
+"""
+Exports the stored exchange rates to a CSV, gzip compressed CSV or Parquet file, or
+to a snapshot served by the SnapshotProvider:
+
+    python mycurrency/manage.py export_rates rates.csv.gz USD EUR --date-from 2020-01-01
+    python mycurrency/manage.py export_rates mycurrency/rates.snapshot
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rates.models import Currency
+from rates.service.archive import EXPORT_FORMATS, export_rates
+
+
+class Command(BaseCommand):
+    help = "Exports the stored exchange rates to a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write.")
+        parser.add_argument(
+            "source_currencies",
+            nargs="*",
+            help="Source currency codes (default: all the currencies).",
+        )
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            help="File format (default: from the extension, else csv).",
+        )
+        parser.add_argument("--date-from", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--date-to", type=date.fromisoformat, help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        source_currencies = options["source_currencies"]
+        unknown = set(source_currencies) - set(
+            Currency.objects.values_list("code", flat=True)
+        )
+        if unknown:
+            raise CommandError(
+                "Unknown currencies: {}".format(", ".join(sorted(unknown)))
+            )
+
+        try:
+            rows = export_rates(
+                options["path"],
+                options["format"],
+                source_currencies=source_currencies,
+                date_from=options["date_from"],
+                date_to=options["date_to"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            self.style.SUCCESS("Exported {} rates to {}".format(rows, options["path"]))
+        )
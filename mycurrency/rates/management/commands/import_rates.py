@@ -0,0 +1,33 @@
+"""
+Imports exchange rates exported with `export_rates`, skipping the rates already
+stored, and rebuilds the latest rates and the rollups of the imported currencies:
+
+    python mycurrency/manage.py import_rates rates.csv.gz
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from rates.service.archive import ARCHIVE_FORMATS, import_rates
+
+
+class Command(BaseCommand):
+    help = "Imports exchange rates from a file written by export_rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read.")
+        parser.add_argument(
+            "--format",
+            choices=ARCHIVE_FORMATS,
+            help="File format (default: from the extension, else csv).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = import_rates(options["path"], options["format"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported {rows} rows: {sent} sent to the database, {skipped} "
+                "skipped for an unknown currency".format(**stats)
+            )
+        )
@@ -0,0 +1,37 @@
+"""
+Recomputes the weekly and monthly rollups (RateRollup) from the stored exchange
+rates, e.g. after importing rates outside of `save_data`.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from rates.models import Currency
+from rates.service.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recomputes the weekly and monthly rollups of the exchange rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source_currencies",
+            nargs="*",
+            help="Source currency codes (default: all the currencies).",
+        )
+
+    def handle(self, *args, **options):
+        source_currency_ids = None
+        if options["source_currencies"]:
+            currencies = Currency.objects.in_bulk(
+                options["source_currencies"], field_name="code"
+            )
+            unknown = set(options["source_currencies"]) - set(currencies)
+            if unknown:
+                raise CommandError(
+                    "Unknown currencies: {}".format(", ".join(sorted(unknown)))
+                )
+            source_currency_ids = [currency.id for currency in currencies.values()]
+
+        aggregated_rates = rebuild_rollups(source_currency_ids)
+        self.stdout.write(
+            self.style.SUCCESS("Aggregated {} exchange rates".format(aggregated_rates))
+        )
@@ -0,0 +1,59 @@
+"""
+Fetches the latest exchange rates of every source currency since its last sync,
+once or every RATES_SYNC_INTERVAL seconds with --loop.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from rates.models import Currency
+from rates.service.sync import run_sync_worker, sync_latest_rates
+
+
+class Command(BaseCommand):
+    help = "Syncs the latest exchange rates from the providers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source_currencies",
+            nargs="*",
+            help="Source currency codes (default: all the currencies).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep syncing every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=None,
+            help="Seconds between syncs (default: RATES_SYNC_INTERVAL).",
+        )
+
+    def handle(self, *args, **options):
+        source_currencies = options["source_currencies"] or None
+        if source_currencies:
+            unknown = set(source_currencies) - set(
+                Currency.objects.filter(code__in=source_currencies).values_list(
+                    "code", flat=True
+                )
+            )
+            if unknown:
+                raise CommandError(
+                    "Unknown currencies: {}".format(", ".join(sorted(unknown)))
+                )
+
+        if options["loop"]:
+            try:
+                run_sync_worker(options["interval"], source_currencies)
+            except KeyboardInterrupt:
+                pass
+            return
+
+        results = sync_latest_rates(source_currencies)
+        for code, rows in results.items():
+            if rows is None:
+                self.stderr.write(self.style.ERROR("{}: sync failed".format(code)))
+            else:
+                self.stdout.write("{}: {} new exchange rates".format(code, rows))
+        if None in results.values():
+            raise CommandError("Some currencies couldn't be synced")
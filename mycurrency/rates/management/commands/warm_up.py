@@ -0,0 +1,33 @@
+"""
+Warms up the caches and the provider connections (see rates.service.warmup), e.g.
+from a deploy script, and reports the time spent by step.
+"""
+from django.core.management.base import BaseCommand
+
+from rates.service.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Loads the currency registry and the most converted latest rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=None,
+            help="Time budget in seconds (default: RATES_WARMUP_BUDGET).",
+        )
+
+    def handle(self, *args, **options):
+        report = warm_up(budget=options["budget"])
+        for name, step in report["steps"].items():
+            self.stdout.write(
+                "{}: {} items in {:.3f}s".format(name, step["items"], step["seconds"])
+            )
+        for name in report["skipped"]:
+            self.stdout.write(self.style.WARNING("{}: skipped".format(name)))
+        for name in report["failed"]:
+            self.stdout.write(self.style.ERROR("{}: failed".format(name)))
+        self.stdout.write(
+            self.style.SUCCESS("Warm-up done in {:.3f}s".format(report["seconds"]))
+        )
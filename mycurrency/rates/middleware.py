@@ -0,0 +1,328 @@
+"""
+Middlewares collecting per-request instrumentation for the rates service, and
+compressing its responses.
+
+They support both sync and async requests, so asynchronous views keep running on
+the event loop. SQL queries are counted through an execute wrapper installed on
+every database connection (see `install_query_counter`) that reports to the
+QueryCounter active in the current context, which also follows the ORM calls
+that the async views run in worker threads.
+"""
+import cProfile
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from .service import metrics
+
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+class QueryCounter:
+    """
+    Counts the SQL queries run while it is active, along with the time spent
+    executing them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_query_counters: ContextVar[tuple] = ContextVar("query_counters", default=())
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper reporting to the QueryCounters of the current context.
+    """
+    counters = _query_counters.get()
+    if not counters:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        for counter in counters:
+            counter.count += 1
+            counter.seconds += elapsed
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    `connection_created` signal receiver installing `count_queries` on every new
+    database connection.
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+@contextmanager
+def collect_queries():
+    counter = QueryCounter()
+    token = _query_counters.set(_query_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _query_counters.reset(token)
+
+
+def get_view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match and match.url_name:
+        return match.url_name
+    return "unmatched"
+
+
+class InstrumentationMiddleware:
+    """
+    Base class for middlewares supporting both sync and async requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class QueryCountMetricsMiddleware(InstrumentationMiddleware):
+    """
+    Records the number of SQL queries executed per request, labelled by view.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with collect_queries() as counter:
+            response = self.get_response(request)
+        self.record(request, counter)
+        return response
+
+    async def __acall__(self, request):
+        with collect_queries() as counter:
+            response = await self.get_response(request)
+        self.record(request, counter)
+        return response
+
+    @staticmethod
+    def record(request, counter: QueryCounter):
+        metrics.VIEW_DB_QUERIES.observe(counter.count, view=get_view_name(request))
+
+
+@contextmanager
+def profiler(name: Optional[str]):
+    """
+    Profiles the wrapped block with pyinstrument when requested and installed,
+    falling back to cProfile. Yields a callable dumping the profile to a path
+    (without extension), or None when there's no profiler name.
+    """
+    if not name:
+        yield None
+        return
+
+    pyinstrument_profiler = None
+    if name == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+
+            pyinstrument_profiler = Profiler(async_mode="enabled")
+        except ImportError:
+            logger.warning("pyinstrument is not installed, using cProfile instead")
+
+    if pyinstrument_profiler:
+        pyinstrument_profiler.start()
+        try:
+            yield lambda path: _write(
+                path + ".html", pyinstrument_profiler.output_html()
+            )
+        finally:
+            if pyinstrument_profiler.is_running:
+                pyinstrument_profiler.stop()
+        return
+
+    cprofile_profiler = cProfile.Profile()
+    cprofile_profiler.enable()
+    try:
+        yield lambda path: cprofile_profiler.dump_stats(path + ".prof")
+    finally:
+        cprofile_profiler.disable()
+
+
+def _write(path: str, content: str):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class RequestProfilingMiddleware(InstrumentationMiddleware):
+    """
+    Measures SQL query count, DB time, provider time and wall time per request and
+    reports them in a `Server-Timing` response header.
+
+    Profiling is active for every request when REQUEST_PROFILING_ENABLED is set, or
+    per request through the `X-Profile-Request: 1` header when
+    REQUEST_PROFILING_ALLOW_HEADER is set. When REQUEST_PROFILING_DUMP_DIR is
+    configured, requests slower than REQUEST_PROFILING_SLOW_MS get their profile
+    dumped to that directory.
+    """
+
+    header = "HTTP_X_PROFILE_REQUEST"
+
+    def __init__(self, get_response):
+        self.enabled = getattr(settings, "REQUEST_PROFILING_ENABLED", False)
+        self.allow_header = getattr(settings, "REQUEST_PROFILING_ALLOW_HEADER", False)
+        if not self.enabled and not self.allow_header:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+        self.slow_ms = getattr(settings, "REQUEST_PROFILING_SLOW_MS", 500)
+        self.dump_dir = getattr(settings, "REQUEST_PROFILING_DUMP_DIR", None)
+        self.profiler = getattr(settings, "REQUEST_PROFILING_PROFILER", "cprofile")
+
+    def is_active(self, request) -> bool:
+        if self.enabled:
+            return True
+        return request.META.get(self.header, "").lower() in ("1", "true", "yes")
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_active(request):
+            return self.get_response(request)
+
+        with profiler(self.profiler if self.dump_dir else None) as dump:
+            with self.measure(request) as measures:
+                measures["response"] = self.get_response(request)
+        return self.finalize(request, measures, dump)
+
+    async def __acall__(self, request):
+        if not self.is_active(request):
+            return await self.get_response(request)
+
+        with profiler(self.profiler if self.dump_dir else None) as dump:
+            with self.measure(request) as measures:
+                measures["response"] = await self.get_response(request)
+        return self.finalize(request, measures, dump)
+
+    @contextmanager
+    def measure(self, request):
+        measures = {}
+        start = time.perf_counter()
+        with metrics.collect_request_timings() as timings:
+            with collect_queries() as counter:
+                yield measures
+        measures["wall_ms"] = (time.perf_counter() - start) * 1000
+        measures["queries"] = counter
+        measures["timings"] = timings
+
+    def finalize(self, request, measures: dict, dump):
+        response = measures["response"]
+        counter, timings = measures["queries"], measures["timings"]
+        wall_ms = measures["wall_ms"]
+
+        response["Server-Timing"] = ", ".join(
+            [
+                'db;dur={:.2f};desc="{} queries"'.format(
+                    counter.seconds * 1000, counter.count
+                ),
+                'provider;dur={:.2f};desc="{} calls"'.format(
+                    timings.provider_seconds * 1000, timings.provider_calls
+                ),
+                "total;dur={:.2f}".format(wall_ms),
+            ]
+        )
+        if dump and wall_ms >= self.slow_ms:
+            self.dump_profile(request, wall_ms, dump)
+        return response
+
+    def dump_profile(self, request, wall_ms: float, dump):
+        os.makedirs(self.dump_dir, exist_ok=True)
+        path = os.path.join(
+            self.dump_dir,
+            "{}-{}-{}ms".format(
+                time.strftime("%Y%m%d%H%M%S"), get_view_name(request), int(wall_ms)
+            ),
+        )
+        dump(path)
+        logger.warning(
+            "Slow request {} took {:.0f}ms, profile dumped to {}".format(
+                request.path, wall_ms, path
+            )
+        )
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses the responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes, with
+    brotli when it's installed and accepted by the client, or gzip otherwise.
+    The rates responses repeat the same pair names on every date, so they shrink
+    by an order of magnitude.
+    """
+
+    def process_response(self, request, response):
+        min_size = getattr(settings, "RESPONSE_COMPRESSION_MIN_SIZE", 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or not re_accepts_brotli.search(
+                request.META.get("HTTP_ACCEPT_ENCODING", "")
+            )
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed_content = brotli.compress(
+            response.content,
+            quality=getattr(settings, "RESPONSE_BROTLI_QUALITY", 5),
+        )
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+
+        # Compressed representations only keep weak ETags (RFC 9110 8.8.1)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,123 @@
+"""
+Partitions the exchange rate history by valuation year on PostgreSQL.
+
+The table is rebuilt as a table partitioned by range of `valuation_date`, with one
+partition per year and a default partition for the years outside of them, so the
+date range queries only scan the partitions of the requested years. Constraints
+and indexes keep their names, so the ORM doesn't notice the difference.
+
+Other databases only get the composite (source_currency, valuation_date,
+exchanged_currency) index, matching the filters of the range queries.
+"""
+from datetime import date
+
+from django.db import migrations, models
+
+
+TABLE = "rates_currencyexchangerate"
+FIRST_PARTITION_YEAR = 1999
+PARTITION_YEARS_AHEAD = 10
+
+
+def get_constraints_and_indexes(cursor, table):
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass",
+        [table],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint "
+        "WHERE conrelid = %s::regclass)",
+        [table, table],
+    )
+    return constraints, cursor.fetchall()
+
+
+def partition_by_year(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        constraints, indexes = get_constraints_and_indexes(cursor, TABLE)
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {TABLE}_unpartitioned) "
+            "PARTITION BY RANGE (valuation_date)"
+        )
+        for year in range(
+            FIRST_PARTITION_YEAR, date.today().year + 1 + PARTITION_YEARS_AHEAD
+        ):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_y{year} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_unpartitioned")
+        cursor.execute(f"DROP TABLE {TABLE}_unpartitioned")
+
+        # The identity sequence went away with the old table
+        cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+        cursor.execute(
+            f"SELECT setval('{TABLE}_id_seq', COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {TABLE}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')"
+        )
+
+        # Unique constraints of partitioned tables must include the partition key
+        for name, kind, definition in constraints:
+            if kind == "p":
+                definition = "PRIMARY KEY (id, valuation_date)"
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+
+def merge_partitions(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        constraints, indexes = get_constraints_and_indexes(cursor, TABLE)
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned")
+        cursor.execute(f"CREATE TABLE {TABLE} (LIKE {TABLE}_partitioned)")
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned")
+        cursor.execute(f"DROP TABLE {TABLE}_partitioned CASCADE")
+
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY"
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+        )
+
+        for name, kind, definition in constraints:
+            if kind == "p":
+                definition = "PRIMARY KEY (id)"
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0006_batchprocess"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="currencyexchangerate",
+            index=models.Index(
+                fields=["source_currency", "valuation_date", "exchanged_currency"],
+                name="rates_rate_source_date_idx",
+            ),
+        ),
+        migrations.RunPython(partition_by_year, merge_partitions),
+    ]
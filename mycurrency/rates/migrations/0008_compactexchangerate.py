@@ -0,0 +1,55 @@
+# Generated by Django 5.0 on 2026-10-19 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0007_partition_currencyexchangerate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompactExchangeRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source_currency_id", models.SmallIntegerField()),
+                ("exchanged_currency_id", models.SmallIntegerField()),
+                ("valuation_date", models.DateField()),
+                ("scaled_rate", models.BigIntegerField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "source_currency_id",
+                            "valuation_date",
+                            "exchanged_currency_id",
+                            "scaled_rate",
+                        ],
+                        name="rates_compact_rate_cover",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="compactexchangerate",
+            constraint=models.UniqueConstraint(
+                fields=(
+                    "source_currency_id",
+                    "valuation_date",
+                    "exchanged_currency_id",
+                ),
+                name="rates_compact_rate_key",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0 on 2026-10-19 18:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0008_compactexchangerate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestExchangeRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rate_value", models.DecimalField(decimal_places=6, max_digits=18)),
+                ("valuation_date", models.DateField()),
+                ("fetched_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "exchanged_currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="rates.currency",
+                    ),
+                ),
+                (
+                    "source_currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="latest_exchanges",
+                        to="rates.currency",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="latestexchangerate",
+            constraint=models.UniqueConstraint(
+                fields=("source_currency", "exchanged_currency"),
+                name="rates_latest_rate_pair",
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def populate_latest_rates(apps, schema_editor):
+    """
+    Populates the LatestExchangeRate table with the most recent stored rate of
+    every currency pair.
+    """
+    Currency = apps.get_model("rates", "Currency")
+    CurrencyExchangeRate = apps.get_model("rates", "CurrencyExchangeRate")
+    CompactExchangeRate = apps.get_model("rates", "CompactExchangeRate")
+    LatestExchangeRate = apps.get_model("rates", "LatestExchangeRate")
+
+    currency_ids = set(Currency.objects.values_list("id", flat=True))
+    latest = {}
+    for source_id, exchanged_id, valuation_date, rate_value in (
+        CurrencyExchangeRate.objects.order_by("valuation_date")
+        .values_list(
+            "source_currency_id",
+            "exchanged_currency_id",
+            "valuation_date",
+            "rate_value",
+        )
+        .iterator()
+    ):
+        latest[(source_id, exchanged_id)] = (valuation_date, rate_value)
+
+    for source_id, exchanged_id, valuation_date, scaled_rate in (
+        # Compact rates have no foreign keys, so they can outlive their currencies
+        CompactExchangeRate.objects.filter(
+            source_currency_id__in=currency_ids, exchanged_currency_id__in=currency_ids
+        )
+        .order_by("valuation_date")
+        .values_list(
+            "source_currency_id",
+            "exchanged_currency_id",
+            "valuation_date",
+            "scaled_rate",
+        )
+        .iterator()
+    ):
+        if (
+            latest.get((source_id, exchanged_id), (valuation_date,))[0]
+            <= valuation_date
+        ):
+            latest[(source_id, exchanged_id)] = (
+                valuation_date,
+                Decimal(scaled_rate).scaleb(-8),
+            )
+
+    # The stored rates are valid at the end of their valuation date
+    LatestExchangeRate.objects.bulk_create(
+        [
+            LatestExchangeRate(
+                source_currency_id=source_id,
+                exchanged_currency_id=exchanged_id,
+                rate_value=rate_value,
+                valuation_date=valuation_date,
+                fetched_at=datetime.combine(
+                    valuation_date + timedelta(days=1), time.min, tzinfo=timezone.utc
+                ),
+            )
+            for (source_id, exchanged_id), (
+                valuation_date,
+                rate_value,
+            ) in latest.items()
+        ],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0009_latestexchangerate"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_latest_rates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0 on 2026-10-19 18:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0010_populate_latestexchangerate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("week", "Week"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                ("open_date", models.DateField()),
+                ("open_value", models.DecimalField(decimal_places=6, max_digits=18)),
+                ("close_date", models.DateField()),
+                ("close_value", models.DecimalField(decimal_places=6, max_digits=18)),
+                ("high_value", models.DecimalField(decimal_places=6, max_digits=18)),
+                ("low_value", models.DecimalField(decimal_places=6, max_digits=18)),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("sum", models.FloatField(default=0)),
+                ("sum_squares", models.FloatField(default=0)),
+                (
+                    "exchanged_currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="rates.currency",
+                    ),
+                ),
+                (
+                    "source_currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="rates.currency",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="raterollup",
+            constraint=models.UniqueConstraint(
+                fields=(
+                    "source_currency",
+                    "resolution",
+                    "period_start",
+                    "exchanged_currency",
+                ),
+                name="rates_rollup_period",
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0 on 2026-10-19 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0011_raterollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "synced_until",
+                    models.DateField(
+                        blank=True,
+                        help_text="Most recent valuation date synced.",
+                        null=True,
+                    ),
+                ),
+                ("last_run_at", models.DateTimeField(blank=True, null=True)),
+                ("last_success_at", models.DateTimeField(blank=True, null=True)),
+                ("last_rows", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, default="")),
+                (
+                    "source_currency",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_watermark",
+                        to="rates.currency",
+                    ),
+                ),
+            ],
+        ),
+    ]
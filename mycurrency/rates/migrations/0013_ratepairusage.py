@@ -0,0 +1,62 @@
+# Generated by Django 5.0 on 2026-10-19 18:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0012_syncwatermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatePairUsage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hits", models.PositiveBigIntegerField(default=0)),
+                (
+                    "last_used_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "exchanged_currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="rates.currency",
+                    ),
+                ),
+                (
+                    "source_currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="rates.currency",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["-hits"], name="rates_pair_usage_hits_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="ratepairusage",
+            constraint=models.UniqueConstraint(
+                fields=("source_currency", "exchanged_currency"),
+                name="rates_pair_usage_pair",
+            ),
+        ),
+    ]
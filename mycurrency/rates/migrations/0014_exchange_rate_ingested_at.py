@@ -0,0 +1,24 @@
+# Generated by Django 5.0 on 2026-10-19 18:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0013_ratepairusage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="compactexchangerate",
+            name="ingested_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="currencyexchangerate",
+            name="ingested_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
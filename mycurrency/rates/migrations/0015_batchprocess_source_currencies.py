@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0014_exchange_rate_ingested_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="batchprocess",
+            name="source_currencies",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
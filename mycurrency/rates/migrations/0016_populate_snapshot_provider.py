@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def add_snapshot_provider(apps, schema_editor):
+    """
+    Adds the SnapshotProvider, disabled, as the last fallback. Its key is the path
+    of the snapshot file written by `manage.py export_rates`, relative to BASE_DIR.
+    """
+    Provider = apps.get_model("rates", "Provider")
+    Provider.objects.get_or_create(
+        name="SnapshotProvider",
+        defaults={"key": "rates.snapshot", "is_enabled": False, "priority": 100},
+    )
+
+
+def remove_snapshot_provider(apps, schema_editor):
+    Provider = apps.get_model("rates", "Provider")
+    Provider.objects.filter(name="SnapshotProvider").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rates", "0015_batchprocess_source_currencies"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_snapshot_provider, remove_snapshot_provider),
+    ]
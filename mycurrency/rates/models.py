@@ -1,4 +1,7 @@
+import math
 import uuid
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
 from django.db import models
 from django.utils import timezone
 
@@ -19,6 +22,8 @@ class CurrencyExchangeRate(models.Model):
     exchanged_currency = models.ForeignKey(Currency, on_delete=models.CASCADE)
     valuation_date = models.DateField(db_index=True)
     rate_value = models.DecimalField(db_index=True, decimal_places=6, max_digits=18)
+    # Last-Modified and ETag of the rate ranges (see rates.views)
+    ingested_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = (
@@ -27,11 +32,206 @@ class CurrencyExchangeRate(models.Model):
             "valuation_date",
             "rate_value",
         )
+        # Matches the range queries. On PostgreSQL the table is also partitioned by
+        # valuation year (see migration 0007).
+        indexes = [
+            models.Index(
+                fields=["source_currency", "valuation_date", "exchanged_currency"],
+                name="rates_rate_source_date_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.source_currency.code} to {self.exchanged_currency.code} on {self.valuation_date}"
 
 
+class CompactExchangeRate(models.Model):
+    """
+    Compact storage of the exchange rates, used instead of CurrencyExchangeRate when
+    RATES_COMPACT_STORAGE is set: rates are 64-bit integers scaled by 10 ** SCALE and
+    currencies are referenced by their id in small integers, without foreign keys.
+    """
+
+    SCALE = 8
+    FACTOR = 10**SCALE
+
+    source_currency_id = models.SmallIntegerField()
+    exchanged_currency_id = models.SmallIntegerField()
+    valuation_date = models.DateField()
+    scaled_rate = models.BigIntegerField()
+    ingested_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "source_currency_id",
+                    "valuation_date",
+                    "exchanged_currency_id",
+                ],
+                name="rates_compact_rate_key",
+            )
+        ]
+        # Covering index: the range queries never read the table itself
+        indexes = [
+            models.Index(
+                fields=[
+                    "source_currency_id",
+                    "valuation_date",
+                    "exchanged_currency_id",
+                    "scaled_rate",
+                ],
+                name="rates_compact_rate_cover",
+            )
+        ]
+
+    @classmethod
+    def scale(cls, rate) -> int:
+        if isinstance(rate, Decimal):
+            return int((rate * cls.FACTOR).to_integral_value())
+        return round(float(rate) * cls.FACTOR)
+
+    @property
+    def rate_value(self) -> Decimal:
+        return Decimal(self.scaled_rate).scaleb(-self.SCALE)
+
+    def __str__(self):
+        return f"{self.source_currency_id} to {self.exchanged_currency_id} on {self.valuation_date}"
+
+
+class LatestExchangeRate(models.Model):
+    """
+    Latest known rate of every currency pair, maintained on every ingest so the
+    converter finds it with a single lookup.
+    """
+
+    source_currency = models.ForeignKey(
+        Currency, related_name="latest_exchanges", on_delete=models.CASCADE
+    )
+    exchanged_currency = models.ForeignKey(
+        Currency, related_name="+", on_delete=models.CASCADE
+    )
+    rate_value = models.DecimalField(decimal_places=6, max_digits=18)
+    valuation_date = models.DateField()
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_currency", "exchanged_currency"],
+                name="rates_latest_rate_pair",
+            )
+        ]
+
+    @property
+    def effective_time(self) -> datetime:
+        """
+        Time the rate is valid at: when it was fetched, or the end of its valuation
+        date for rates fetched afterwards.
+        """
+        end_of_valuation_date = datetime.combine(
+            self.valuation_date + timedelta(days=1), time.min, tzinfo=dt_timezone.utc
+        )
+        return min(self.fetched_at, end_of_valuation_date)
+
+    def is_fresh(self, max_age: timedelta, now: datetime = None) -> bool:
+        return (now or timezone.now()) - self.effective_time <= max_age
+
+    def __str__(self):
+        return f"Latest {self.source_currency_id} to {self.exchanged_currency_id} on {self.valuation_date}"
+
+
+class RateRollup(models.Model):
+    """
+    Weekly or monthly aggregates of the daily rates of a currency pair, updated on
+    every ingest. Count, sum and sum of squares make the mean and the standard
+    deviation incremental.
+    """
+
+    class Resolution(models.TextChoices):
+        WEEK = "week", "Week"
+        MONTH = "month", "Month"
+
+    source_currency = models.ForeignKey(
+        Currency, related_name="rollups", on_delete=models.CASCADE
+    )
+    exchanged_currency = models.ForeignKey(
+        Currency, related_name="+", on_delete=models.CASCADE
+    )
+    resolution = models.CharField(max_length=5, choices=Resolution.choices)
+    period_start = models.DateField()
+    open_date = models.DateField()
+    open_value = models.DecimalField(decimal_places=6, max_digits=18)
+    close_date = models.DateField()
+    close_value = models.DecimalField(decimal_places=6, max_digits=18)
+    high_value = models.DecimalField(decimal_places=6, max_digits=18)
+    low_value = models.DecimalField(decimal_places=6, max_digits=18)
+    count = models.PositiveIntegerField(default=0)
+    sum = models.FloatField(default=0)
+    sum_squares = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "source_currency",
+                    "resolution",
+                    "period_start",
+                    "exchanged_currency",
+                ],
+                name="rates_rollup_period",
+            )
+        ]
+
+    @staticmethod
+    def get_statistics(count: int, total: float, sum_squares: float) -> tuple:
+        """
+        Returns the mean and the population standard deviation of `count` rates from
+        their sum and sum of squares.
+        """
+        mean = total / count
+        return mean, math.sqrt(max(0.0, sum_squares / count - mean**2))
+
+    @property
+    def mean(self) -> float:
+        return self.get_statistics(self.count, self.sum, self.sum_squares)[0]
+
+    @property
+    def stddev(self) -> float:
+        return self.get_statistics(self.count, self.sum, self.sum_squares)[1]
+
+    def __str__(self):
+        return f"{self.resolution} {self.source_currency_id} to {self.exchanged_currency_id} from {self.period_start}"
+
+
+class RatePairUsage(models.Model):
+    """
+    Number of conversions requested for a currency pair, used to warm up the caches
+    of the most requested pairs on startup.
+    """
+
+    source_currency = models.ForeignKey(
+        Currency, related_name="+", on_delete=models.CASCADE
+    )
+    exchanged_currency = models.ForeignKey(
+        Currency, related_name="+", on_delete=models.CASCADE
+    )
+    hits = models.PositiveBigIntegerField(default=0)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_currency", "exchanged_currency"],
+                name="rates_pair_usage_pair",
+            )
+        ]
+        indexes = [models.Index(fields=["-hits"], name="rates_pair_usage_hits_idx")]
+
+    def __str__(self):
+        return f"{self.source_currency_id} to {self.exchanged_currency_id}: {self.hits} hits"
+
+
 class Provider(models.Model):
     """
     Model representing an exchange rate provider.
@@ -76,6 +276,9 @@ class BatchProcess(models.Model):
     source_currency = models.ForeignKey(
         Currency, on_delete=models.PROTECT, related_name="batch_processes"
     )
+    # Comma separated codes of a multi-currency backfill, its pivot being
+    # source_currency (see `batch_backfill`)
+    source_currencies = models.CharField(max_length=255, blank=True, default="")
     processes_counter = models.IntegerField(default=0)
 
     class Meta:
@@ -87,3 +290,24 @@ class BatchProcess(models.Model):
         else:
             coverage = int(self.processes_counter * 100 / self.processes)
         return f"BatchProcess {self.process_id} at {coverage}% - status: {self.status}"
+
+
+class SyncWatermark(models.Model):
+    """
+    Progress of the scheduled sync of the latest rates (see `sync_latest_rates`)
+    of a source currency.
+    """
+
+    source_currency = models.OneToOneField(
+        Currency, on_delete=models.CASCADE, related_name="sync_watermark"
+    )
+    synced_until = models.DateField(
+        null=True, blank=True, help_text="Most recent valuation date synced."
+    )
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_rows = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"SyncWatermark {self.source_currency_id} until {self.synced_until}"
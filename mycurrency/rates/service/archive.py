@@ -0,0 +1,375 @@
+"""
+This module exports the stored exchange rates to a file and imports them back, to
+seed or clone an environment without fetching the history from a provider again.
+
+Files are CSV, gzip compressed CSV (".csv.gz") or Parquet (".parquet", when pyarrow
+is installed), with one (source_currency, exchanged_currency, valuation_date,
+rate_value) row per rate. Both ways stream the rates by chunks of
+RATES_ARCHIVE_CHUNK_SIZE rows, so memory doesn't grow with the history.
+
+Rates can also be exported to a snapshot (".snapshot"), the binary file served by
+the SnapshotProvider (see rates.adapters.snapshot_adapter), which is not imported.
+
+Imported rates go through `bulk_insert_rates`, skipping the currency pairs and
+dates already stored whatever their rate value (as `save_data` does), and the
+latest rates and the rollups of the imported source currencies are rebuilt once at
+the end.
+
+Example:
+    python mycurrency/manage.py export_rates rates.csv.gz --source-currency USD
+    python mycurrency/manage.py import_rates rates.csv.gz
+"""
+import csv
+import gzip
+import struct
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Max, Min
+
+from ..adapters.snapshot_adapter import pack_snapshot_header
+from ..domain.backends import bulk_insert_rates
+from ..domain.db import build_exchange_rate, get_exchange_rate_model
+from ..models import CompactExchangeRate, Currency
+from .history import invalidate_rate_series
+from .latest import rebuild_latest_rates
+from .rollups import rebuild_rollups
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+CSV_FORMAT = "csv"
+CSV_GZIP_FORMAT = "csv.gz"
+PARQUET_FORMAT = "parquet"
+SNAPSHOT_FORMAT = "snapshot"
+ARCHIVE_FORMATS = (CSV_FORMAT, CSV_GZIP_FORMAT, PARQUET_FORMAT)
+EXPORT_FORMATS = ARCHIVE_FORMATS + (SNAPSHOT_FORMAT,)
+COLUMNS = ("source_currency", "exchanged_currency", "valuation_date", "rate_value")
+
+RateRow = Tuple[str, str, date, Decimal]
+
+
+def get_chunk_size() -> int:
+    return getattr(settings, "RATES_ARCHIVE_CHUNK_SIZE", 20000)
+
+
+def guess_format(path: str) -> str:
+    if path.endswith(".csv.gz") or path.endswith(".gz"):
+        return CSV_GZIP_FORMAT
+    if path.endswith(".parquet"):
+        return PARQUET_FORMAT
+    if path.endswith(".snapshot"):
+        return SNAPSHOT_FORMAT
+    return CSV_FORMAT
+
+
+def check_format(archive_format: str, formats: Tuple[str, ...] = ARCHIVE_FORMATS):
+    """
+    Raises:
+        ValueError: If the format is not one of `formats`, or Parquet without
+            pyarrow.
+    """
+    if archive_format not in formats:
+        raise ValueError(f"Invalid archive format: {archive_format}")
+    if archive_format == PARQUET_FORMAT and pyarrow is None:
+        raise ValueError("The Parquet format requires pyarrow")
+
+
+def open_csv(path: str, archive_format: str, mode: str):
+    if archive_format == CSV_GZIP_FORMAT:
+        return gzip.open(path, mode + "t", newline="", encoding="utf-8")
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def filter_rates(
+    source_currencies: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """
+    Returns the stored rates, optionally of some source currencies and between two
+    dates, ordered by source currency, valuation date and exchanged currency (the
+    order of the unique index).
+    """
+    exchange_rates = get_exchange_rate_model().objects.order_by(
+        "source_currency_id", "valuation_date", "exchanged_currency_id"
+    )
+    if source_currencies:
+        exchange_rates = exchange_rates.filter(
+            source_currency_id__in=Currency.objects.filter(
+                code__in=list(source_currencies)
+            ).values("id")
+        )
+    if date_from:
+        exchange_rates = exchange_rates.filter(valuation_date__gte=date_from)
+    if date_to:
+        exchange_rates = exchange_rates.filter(valuation_date__lte=date_to)
+    return exchange_rates
+
+
+def iter_rate_chunks(
+    source_currencies: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Iterator[List[RateRow]]:
+    """
+    Streams the rates of `filter_rates` in chunks.
+    """
+    currency_codes = dict(Currency.objects.values_list("id", "code"))
+    model = get_exchange_rate_model()
+    value_field = "scaled_rate" if model is CompactExchangeRate else "rate_value"
+    exchange_rates = filter_rates(source_currencies, date_from, date_to)
+
+    chunk_size = get_chunk_size()
+    chunk = []
+    for source_id, exchanged_id, valuation_date, value in exchange_rates.values_list(
+        "source_currency_id", "exchanged_currency_id", "valuation_date", value_field
+    ).iterator(chunk_size=chunk_size):
+        if model is CompactExchangeRate:
+            value = Decimal(value).scaleb(-CompactExchangeRate.SCALE)
+        chunk.append(
+            (
+                currency_codes[source_id],
+                currency_codes[exchanged_id],
+                valuation_date,
+                value,
+            )
+        )
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_parquet(path: str, chunks: Iterable[List[RateRow]]) -> int:
+    schema = pyarrow.schema(
+        [
+            ("source_currency", pyarrow.string()),
+            ("exchanged_currency", pyarrow.string()),
+            ("valuation_date", pyarrow.date32()),
+            ("rate_value", pyarrow.decimal128(18, 6)),
+        ]
+    )
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            # One row group per chunk
+            writer.write_table(
+                pyarrow.Table.from_arrays(
+                    [pyarrow.array(column) for column in zip(*chunk)], schema=schema
+                )
+            )
+            rows += len(chunk)
+    return rows
+
+
+def write_snapshot(
+    path: str,
+    source_currencies: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> int:
+    """
+    Writes a snapshot of the rates of `filter_rates`: a matrix per exported source
+    currency, from the first to the last exported date, with a column per currency.
+    The rates come ordered like the matrices, so the rows are written one after
+    the other, NaN where there's no rate.
+    """
+    exchange_rates = filter_rates(source_currencies, date_from, date_to)
+    bounds = exchange_rates.aggregate(
+        date_from=Min("valuation_date"), date_to=Max("valuation_date")
+    )
+    if bounds["date_from"] is None:
+        raise ValueError("No exchange rates to export")
+
+    currency_codes = dict(Currency.objects.order_by("id").values_list("id", "code"))
+    sources = [
+        currency_codes[source_id]
+        for source_id in exchange_rates.order_by("source_currency_id")
+        .values_list("source_currency_id", flat=True)
+        .distinct()
+    ]
+    currencies = list(currency_codes.values())
+    columns = {code: index for index, code in enumerate(currencies)}
+    source_indexes = {code: index for index, code in enumerate(sources)}
+    first_date = bounds["date_from"]
+    days = (bounds["date_to"] - first_date).days + 1
+
+    row_struct = struct.Struct("<{}d".format(len(currencies)))
+    empty_row = row_struct.pack(*[float("nan")] * len(currencies))
+    rows = 0
+    with open(path, "wb") as snapshot:
+        snapshot.write(pack_snapshot_header(first_date, days, sources, currencies))
+        # Index of the next row to write, and the row being filled
+        position = 0
+        row_index, row = None, None
+        for chunk in iter_rate_chunks(source_currencies, date_from, date_to):
+            for source_currency, exchanged_currency, valuation_date, rate in chunk:
+                index = (
+                    source_indexes[source_currency] * days
+                    + (valuation_date - first_date).days
+                )
+                if index != row_index:
+                    if row is not None:
+                        for _ in range(position, row_index):
+                            snapshot.write(empty_row)
+                        snapshot.write(row_struct.pack(*row))
+                        position = row_index + 1
+                    row_index, row = index, [float("nan")] * len(currencies)
+                row[columns[exchanged_currency]] = float(rate)
+                rows += 1
+        for _ in range(position, row_index):
+            snapshot.write(empty_row)
+        snapshot.write(row_struct.pack(*row))
+        for _ in range(row_index + 1, len(sources) * days):
+            snapshot.write(empty_row)
+    return rows
+
+
+def export_rates(
+    path: str,
+    archive_format: Optional[str] = None,
+    source_currencies: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> int:
+    """
+    Writes the stored rates to a file (see `iter_rate_chunks` for the filters).
+
+    Returns:
+        int: The number of exported rates.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    archive_format = archive_format or guess_format(path)
+    check_format(archive_format, EXPORT_FORMATS)
+    if archive_format == SNAPSHOT_FORMAT:
+        return write_snapshot(path, source_currencies, date_from, date_to)
+
+    chunks = iter_rate_chunks(source_currencies, date_from, date_to)
+    if archive_format == PARQUET_FORMAT:
+        return write_parquet(path, chunks)
+
+    rows = 0
+    with open_csv(path, archive_format, "w") as archive:
+        writer = csv.writer(archive)
+        writer.writerow(COLUMNS)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def read_rate_chunks(
+    path: str, archive_format: Optional[str] = None
+) -> Iterator[List[RateRow]]:
+    """
+    Streams the rates of an exported file in chunks.
+
+    Raises:
+        ValueError: If the format is not supported or a row is invalid.
+    """
+    archive_format = archive_format or guess_format(path)
+    check_format(archive_format)
+    chunk_size = get_chunk_size()
+    if archive_format == PARQUET_FORMAT:
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=COLUMNS):
+            yield list(zip(*(column.to_pylist() for column in batch.columns)))
+        return
+
+    with open_csv(path, archive_format, "r") as archive:
+        reader = csv.reader(archive)
+        header = next(reader, None)
+        if header is not None and tuple(header) != COLUMNS:
+            raise ValueError("Invalid rates file header: {}".format(",".join(header)))
+        chunk = []
+        for line, row in enumerate(reader, start=2):
+            try:
+                source_currency, exchanged_currency, valuation_date, rate = row
+                chunk.append(
+                    (
+                        source_currency,
+                        exchanged_currency,
+                        date.fromisoformat(valuation_date),
+                        Decimal(rate),
+                    )
+                )
+            except Exception:
+                raise ValueError(f"Invalid rates file row {line}: {row}")
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def exclude_stored_rates(rates: dict) -> dict:
+    """
+    Removes the rates already stored, whatever their rate value, from rates keyed by
+    (source currency id, exchanged currency id, valuation date).
+    """
+    if not rates:
+        return rates
+    valuation_dates = [valuation_date for _, _, valuation_date in rates]
+    stored_keys = (
+        get_exchange_rate_model()
+        .objects.filter(
+            source_currency_id__in={source_id for source_id, _, _ in rates},
+            valuation_date__range=(min(valuation_dates), max(valuation_dates)),
+        )
+        .values_list("source_currency_id", "exchanged_currency_id", "valuation_date")
+    )
+    for key in stored_keys:
+        rates.pop(key, None)
+    return rates
+
+
+def import_rates(path: str, archive_format: Optional[str] = None) -> dict:
+    """
+    Stores the rates of an exported file, then rebuilds the latest rates and the
+    rollups of the imported source currencies.
+
+    Returns:
+        dict: The number of "rows" read, of rates "sent" to the database (the
+            currency pairs and dates already stored are left out) and of rows
+            "skipped" for an unknown currency.
+    """
+    currencies = dict(Currency.objects.values_list("code", "id"))
+    stats = {"rows": 0, "sent": 0, "skipped": 0}
+    source_currency_ids = set()
+    for chunk in read_rate_chunks(path, archive_format):
+        rates = {}
+        for source_currency, exchanged_currency, valuation_date, rate in chunk:
+            source_id = currencies.get(source_currency)
+            exchanged_id = currencies.get(exchanged_currency)
+            if source_id is None or exchanged_id is None:
+                stats["skipped"] += 1
+                continue
+            source_currency_ids.add(source_id)
+            rates[(source_id, exchanged_id, valuation_date)] = rate
+        stats["rows"] += len(chunk)
+        stats["sent"] += bulk_insert_rates(
+            [
+                build_exchange_rate(source_id, exchanged_id, valuation_date, rate)
+                for (
+                    source_id,
+                    exchanged_id,
+                    valuation_date,
+                ), rate in exclude_stored_rates(rates).items()
+            ]
+        )
+
+    if source_currency_ids:
+        rebuild_latest_rates(source_currency_ids)
+        rebuild_rollups(source_currency_ids)
+        invalidate_rate_series()
+    return stats
@@ -1,16 +1,21 @@
 import asyncio
 import logging
+import time
 from datetime import date, timedelta
-from typing import List
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 from django.conf import settings
+from django.db.models import F
 from django.utils import timezone
 from asgiref.sync import sync_to_async
 
 
 from ..adapters.adapter_factory import get_exchange_rate_data
+from ..domain.db import get_exchange_rates_by_date_and_currency
 from ..models import BatchProcess, Currency
 from .common import get_missing_rate_dates, save_data
+from . import metrics, money
 
 
 logger = logging.getLogger(__name__)
@@ -46,6 +51,7 @@ def fetch_remote_data(
     source_currency: str, exchanged_currencies: str, date_range: List, process_id: uuid4
 ):
     logger.info("Fetching remote data for source_currency {}".format(source_currency))
+    start = time.perf_counter()
     try:
         data, provider = get_exchange_rate_data(
             source_currency=source_currency,
@@ -58,7 +64,12 @@ def fetch_remote_data(
             return
 
         # Saving data in data base
-        save_data(data=data, source_currency=source_currency)
+        rows = save_data(data=data, source_currency=source_currency)
+        metrics.record_batch_chunk(
+            source_currency=source_currency,
+            rows=rows,
+            seconds=time.perf_counter() - start,
+        )
 
         # Recovering batch process from database and updating counter and status
         batch_process_instance = BatchProcess.objects.get(process_id=process_id)
@@ -125,6 +136,8 @@ async def batch_process(
 
     # Concurrency: processing batch async tasks
     sleep_time = getattr(settings, "BATCH_PROCESS_SLEEP_TIME", 0.2)
+    pending_calls = batch_calls
+    metrics.BATCH_QUEUE_DEPTH.inc(pending_calls)
     for date_range in date_ranges:
         # Fetching form remote api only those missing dates in the database
         missing_rate_dates = await async_get_missing_rate_dates(
@@ -139,6 +152,9 @@ async def batch_process(
         )
         # Iterate over each subset of missing dates
         for subset in missing_rate_dates:
+            if pending_calls > 0:
+                pending_calls -= 1
+                metrics.BATCH_QUEUE_DEPTH.dec()
             try:
                 # Schedule the fetch_remote_data call as a task
                 async with asyncio.TaskGroup() as task_group:
@@ -156,7 +172,303 @@ async def batch_process(
             except Exception as eg:
                 # Handle multiple exceptions raised within the TaskGroup
                 logging.error(f"batch_process - An error occurred: {eg.exceptions[0]}")
+                metrics.BATCH_QUEUE_DEPTH.dec(pending_calls)
                 # Optionally, re-raise the exception group if further action is needed
                 raise eg.exceptions[0]
 
+    # The second pass can find fewer gaps than counted, e.g. filled meanwhile
+    metrics.BATCH_QUEUE_DEPTH.dec(pending_calls)
     return batch_process_instance.process_id
+
+
+class RateLimiter:
+    """
+    Spaces out by `interval` seconds the provider calls of every task sharing it.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_call = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            delay = self.next_call - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_call = time.monotonic() + self.interval
+
+
+def add_batch_processes(process_id: uuid4, processes: int):
+    BatchProcess.objects.filter(process_id=process_id).update(
+        processes=F("processes") + processes
+    )
+
+
+def advance_batch_process(process_id: uuid4):
+    """
+    Counts a processed chunk of a batch process. The counter is increased in the
+    database, as the chunks of a backfill are processed concurrently.
+    """
+    BatchProcess.objects.filter(process_id=process_id).update(
+        processes_counter=F("processes_counter") + 1
+    )
+
+
+def get_backfill_pivot(source_currencies: List[str], pivot: Optional[str]) -> str:
+    """
+    Returns the pivot of a backfill: the given one, else RATES_BACKFILL_PIVOT when
+    it's one of the source currencies, else the first of them.
+    """
+    pivot = pivot or getattr(settings, "RATES_BACKFILL_PIVOT", "USD")
+    return pivot if pivot in source_currencies else source_currencies[0]
+
+
+def plan_missing_chunks(
+    source_currencies: Iterable[str], date_ranges: List[dict]
+) -> List[Tuple[str, List[date]]]:
+    """
+    Returns the (source currency, consecutive missing dates) chunks to fetch.
+    """
+    return [
+        (source_currency, subset)
+        for source_currency in source_currencies
+        for date_range in date_ranges
+        for subset in get_missing_rate_dates(
+            source_currency, date_range["date_from"], date_range["date_to"]
+        )
+    ]
+
+
+def backfill_chunk(
+    source_currency: str,
+    exchanged_currencies: str,
+    date_range: List[date],
+    process_id: uuid4,
+) -> int:
+    """
+    Fetches and stores the rates of a chunk of missing dates of a backfill.
+
+    Returns:
+        int: The number of new exchange rate rows.
+    """
+    start = time.perf_counter()
+    data, provider = get_exchange_rate_data(
+        source_currency=source_currency,
+        exchanged_currency=exchanged_currencies,
+        date_from=date_range[0],
+        date_to=date_range[-1],
+    )
+    rows = save_data(data=data, source_currency=source_currency)
+    metrics.record_batch_chunk(
+        source_currency=source_currency,
+        rows=rows,
+        seconds=time.perf_counter() - start,
+    )
+    advance_batch_process(process_id)
+    return rows
+
+
+def triangulate_rates(
+    pivot_rates: Dict[Tuple[date, str], Decimal],
+    pivot: str,
+    source_currency: str,
+    exchanged_currencies: Iterable[str],
+    valuation_dates: Iterable[date],
+) -> dict:
+    """
+    Derives the rates of a source currency from the rates of the pivot currency,
+    for the dates the pivot has a rate of the source currency.
+
+    Returns:
+        dict: Rates grouped by date, as `save_data` takes them.
+    """
+    data = {}
+    for valuation_date in valuation_dates:
+        pivot_to_source = pivot_rates.get((valuation_date, source_currency))
+        if not pivot_to_source:
+            continue
+        rates = {pivot: money.cross_rate(1, pivot_to_source)}
+        for exchanged_currency in exchanged_currencies:
+            pivot_to_exchanged = pivot_rates.get((valuation_date, exchanged_currency))
+            if (
+                exchanged_currency not in (pivot, source_currency)
+                and pivot_to_exchanged
+            ):
+                rates[exchanged_currency] = money.cross_rate(
+                    pivot_to_exchanged, pivot_to_source
+                )
+        data[valuation_date] = rates
+    return data
+
+
+def triangulate_source(
+    pivot: str,
+    source_currency: str,
+    exchanged_currencies: Iterable[str],
+    date_ranges: List[dict],
+) -> int:
+    """
+    Stores the rates of the dates a source currency is missing triangulated from
+    the stored rates of the pivot, with one query and one bulk insert per range.
+
+    Returns:
+        int: The number of new exchange rate rows.
+    """
+    rows = 0
+    for date_range in date_ranges:
+        missing_dates = [
+            valuation_date
+            for subset in get_missing_rate_dates(
+                source_currency, date_range["date_from"], date_range["date_to"]
+            )
+            for valuation_date in subset
+        ]
+        if not missing_dates:
+            continue
+        pivot_rates = get_exchange_rates_by_date_and_currency(
+            pivot, missing_dates[0], missing_dates[-1]
+        )
+        rows += save_data(
+            data=triangulate_rates(
+                pivot_rates,
+                pivot,
+                source_currency,
+                exchanged_currencies,
+                missing_dates,
+            ),
+            source_currency=source_currency,
+        )
+    return rows
+
+
+async def run_backfill_chunks(
+    chunks: List[Tuple[str, List[date]]],
+    valid_currencies: set,
+    process_id: uuid4,
+    limiter: RateLimiter,
+) -> int:
+    """
+    Fetches chunks of missing dates from one queue shared by every source currency,
+    with up to RATES_BACKFILL_CONCURRENCY calls in flight spaced out by `limiter`.
+
+    Returns:
+        int: The number of failed chunks.
+    """
+    queue = asyncio.Queue()
+    for chunk in chunks:
+        queue.put_nowait(chunk)
+    metrics.BATCH_QUEUE_DEPTH.inc(len(chunks))
+    failures = 0
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            source_currency, subset = queue.get_nowait()
+            metrics.BATCH_QUEUE_DEPTH.dec()
+            await limiter.wait()
+            try:
+                await asyncio.to_thread(
+                    backfill_chunk,
+                    source_currency,
+                    ",".join(sorted(valid_currencies - {source_currency})),
+                    subset,
+                    process_id,
+                )
+            except Exception as e:
+                failures += 1
+                logger.error(
+                    "batch_backfill - Chunk {} {} - {} failed: {}".format(
+                        source_currency, subset[0], subset[-1], e
+                    )
+                )
+
+    concurrency = getattr(settings, "RATES_BACKFILL_CONCURRENCY", 4)
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(chunks)))))
+    return failures
+
+
+async def batch_backfill(
+    source_currencies: Iterable[str],
+    valid_currencies: set,
+    date_from: date,
+    date_to: date,
+    pivot: Optional[str] = None,
+    triangulate: Optional[bool] = None,
+) -> uuid4:
+    """
+    Backfills the rates of several source currencies in one BatchProcess.
+
+    The missing dates of the pivot currency are fetched first. With triangulation
+    (RATES_BACKFILL_TRIANGULATE by default), the missing rates of the other source
+    currencies are then derived from the pivot rates, and only the dates the pivot
+    couldn't cover are fetched. Every fetch goes through one queue, rate limited
+    like `batch_process`.
+
+    Returns:
+        uuid4: The id of the BatchProcess, whose processes count the fetched
+            chunks and the triangulated currencies.
+    """
+    source_currencies = sorted(set(source_currencies))
+    pivot = get_backfill_pivot(source_currencies, pivot)
+    if triangulate is None:
+        triangulate = getattr(settings, "RATES_BACKFILL_TRIANGULATE", True)
+    triangulated = [code for code in source_currencies if code != pivot]
+    if not triangulate:
+        triangulated = []
+
+    batch_process_instance = await sync_to_async(
+        lambda: BatchProcess.objects.create(
+            source_currency=Currency.objects.get(code=pivot),
+            source_currencies=",".join(source_currencies),
+        ),
+        thread_sensitive=True,
+    )()
+    process_id = batch_process_instance.process_id
+
+    max_years = getattr(settings, "BATCH_PROCESS_MAX_YEARS_TO_RETRIEVE", 5)
+    date_ranges = split_date_range(
+        date_from=date_from, date_to=date_to, years_per_chunk=max_years
+    )
+    chunks = await sync_to_async(plan_missing_chunks, thread_sensitive=False)(
+        [code for code in source_currencies if code not in triangulated],
+        date_ranges,
+    )
+    await sync_to_async(BatchProcess.objects.filter(process_id=process_id).update)(
+        processes=len(chunks) + len(triangulated)
+    )
+    logger.info(
+        "batch_backfill: {} chunks to fetch for {}, {} triangulated from {}".format(
+            len(chunks), ", ".join(source_currencies), len(triangulated), pivot
+        )
+    )
+
+    limiter = RateLimiter(getattr(settings, "BATCH_PROCESS_SLEEP_TIME", 0.2))
+    failures = await run_backfill_chunks(chunks, valid_currencies, process_id, limiter)
+
+    remaining_chunks = []
+    for source_currency in triangulated:
+        rows = await sync_to_async(triangulate_source, thread_sensitive=False)(
+            pivot, source_currency, valid_currencies, date_ranges
+        )
+        # Dates without pivot rates are fetched like the pivot ones
+        source_chunks = await sync_to_async(
+            plan_missing_chunks, thread_sensitive=False
+        )([source_currency], date_ranges)
+        await sync_to_async(add_batch_processes)(process_id, len(source_chunks))
+        await sync_to_async(advance_batch_process)(process_id)
+        remaining_chunks.extend(source_chunks)
+        logger.info(
+            "batch_backfill: {} rates of {} triangulated, {} chunks left".format(
+                rows, source_currency, len(source_chunks)
+            )
+        )
+    failures += await run_backfill_chunks(
+        remaining_chunks, valid_currencies, process_id, limiter
+    )
+
+    await sync_to_async(BatchProcess.objects.filter(process_id=process_id).update)(
+        status=BatchProcess.Status.FAILED if failures else BatchProcess.Status.DONE,
+        ending_time=timezone.now(),
+    )
+    return process_id
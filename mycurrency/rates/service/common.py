@@ -1,7 +1,19 @@
 from datetime import date, timedelta
-from typing import List
+from typing import List, Set
 
-from ..models import CurrencyExchangeRate, Currency
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+from ..domain.backends import bulk_insert_rates
+from ..domain.db import (
+    build_exchange_rate,
+    filter_exchange_rates,
+    get_exchange_rate_model,
+)
+from ..models import Currency
+from .history import invalidate_rate_series
+from .latest import update_latest_rates
+from .rollups import refresh_rollups
 
 
 def get_missing_rate_dates(
@@ -31,15 +43,45 @@ def get_missing_rate_dates(
          [datetime.date(2023, 1, 7)]]
     """
     # Checking if we have to retrieve remote data
+    db_date_range = set(
+        get_stored_rate_dates_queryset(source_currency, date_from, date_to)
+    )
+    return group_missing_dates(date_from, date_to, db_date_range)
+
+
+async def aget_missing_rate_dates(
+    source_currency: str, date_from: date, date_to: date
+) -> List[List[date]]:
+    """
+    Asynchronous version of `get_missing_rate_dates`, using the async ORM.
+    """
+    db_date_range = {
+        valuation_date
+        async for valuation_date in get_stored_rate_dates_queryset(
+            source_currency, date_from, date_to
+        )
+    }
+    return group_missing_dates(date_from, date_to, db_date_range)
+
+
+def get_stored_rate_dates_queryset(
+    source_currency: str, date_from: date, date_to: date
+) -> QuerySet:
+    return filter_exchange_rates(
+        source_currency, valuation_date__range=(date_from, date_to)
+    ).values_list("valuation_date", flat=True)
+
+
+def group_missing_dates(
+    date_from: date, date_to: date, db_date_range: Set[date]
+) -> List[List[date]]:
+    """
+    Groups the dates between `date_from` and `date_to` that are not in
+    `db_date_range` into lists of consecutive dates.
+    """
     date_range = {
         date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)
     }
-    db_date_range = set(
-        CurrencyExchangeRate.objects.filter(
-            source_currency__code=source_currency,
-            valuation_date__range=(date_from, date_to),
-        ).values_list("valuation_date", flat=True)
-    )
     # Identify missing dates
     missing_dates = date_range - db_date_range
 
@@ -67,18 +109,74 @@ def get_missing_rate_dates(
     return response
 
 
-def save_data(data: dict, source_currency: str):
+def save_data(data: dict, source_currency: str) -> int:
+    """
+    Stores the exchange rates returned by a provider, skipping the ones already saved.
+
+    The rates are written in bulk (see `bulk_insert_rates`) after filtering out the
+    currency pairs and dates already stored, whatever their rate value. The latest
+    rates of the pairs are updated as well, and their rollups recomputed.
+
+    Args:
+        data (dict): Rates grouped by date, e.g. {"2025-03-10": {"EUR": 0.92}}.
+        source_currency (str): The currency code for the source currency.
+
+    Returns:
+        int: The number of new exchange rate rows.
+    """
+    if not data:
+        return 0
+
+    # Resolving all the currencies at once instead of once per rate
+    currencies = Currency.objects.in_bulk(field_name="code")
+    source_currency_obj = currencies[source_currency]
+
+    new_rates = {}
     for date_rate, currency_data in data.items():
+        valuation_date = (
+            date_rate if isinstance(date_rate, date) else date.fromisoformat(date_rate)
+        )
         for currency, rate in currency_data.items():
             if rate is None:
                 continue
+            new_rates[(currencies[currency].id, valuation_date)] = rate
 
-            source_currency_obj = Currency.objects.get(code=source_currency)
-            exchanged_obj = Currency.objects.get(code=currency)
+    if not new_rates:
+        return 0
 
-            CurrencyExchangeRate.objects.get_or_create(
-                source_currency=source_currency_obj,
-                exchanged_currency=exchanged_obj,
-                valuation_date=date_rate,
-                defaults={"rate_value": rate},
+    update_latest_rates(
+        source_currency_obj,
+        new_rates,
+        {currency.id: code for code, currency in currencies.items()},
+    )
+
+    valuation_dates = [valuation_date for _, valuation_date in new_rates]
+    stored_keys = (
+        get_exchange_rate_model()
+        .objects.filter(
+            source_currency_id=source_currency_obj.id,
+            valuation_date__range=(min(valuation_dates), max(valuation_dates)),
+        )
+        .values_list("exchanged_currency_id", "valuation_date")
+    )
+    for key in stored_keys:
+        new_rates.pop(key, None)
+
+    created_rows = bulk_insert_rates(
+        [
+            build_exchange_rate(
+                source_currency_obj.id, exchanged_currency_id, valuation_date, rate
             )
+            for (exchanged_currency_id, valuation_date), rate in new_rates.items()
+        ]
+    )
+    refresh_rollups(source_currency_obj.id, new_rates)
+    invalidate_rate_series(source_currency)
+    return created_rows
+
+
+async def asave_data(data: dict, source_currency: str) -> int:
+    """
+    Asynchronous version of `save_data`.
+    """
+    return await sync_to_async(save_data)(data=data, source_currency=source_currency)
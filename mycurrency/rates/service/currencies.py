@@ -0,0 +1,44 @@
+"""
+This module keeps the currency registry (the codes of the supported currencies)
+in the local "rates" cache, so validating a request doesn't query the database.
+"""
+from typing import Set
+
+from ..models import Currency
+from .latest import get_cache, get_cache_timeout
+
+
+CURRENCY_CODES_CACHE_KEY = "currency-codes"
+
+
+def get_currency_codes() -> Set[str]:
+    """
+    Returns the codes of the supported currencies.
+    """
+    cache = get_cache()
+    currency_codes = cache.get(CURRENCY_CODES_CACHE_KEY)
+    if currency_codes is None:
+        currency_codes = set(Currency.objects.values_list("code", flat=True))
+        cache.set(CURRENCY_CODES_CACHE_KEY, currency_codes, get_cache_timeout())
+    return currency_codes
+
+
+async def aget_currency_codes() -> Set[str]:
+    """
+    Asynchronous version of `get_currency_codes`.
+    """
+    cache = get_cache()
+    currency_codes = cache.get(CURRENCY_CODES_CACHE_KEY)
+    if currency_codes is None:
+        currency_codes = {
+            code async for code in Currency.objects.values_list("code", flat=True)
+        }
+        cache.set(CURRENCY_CODES_CACHE_KEY, currency_codes, get_cache_timeout())
+    return currency_codes
+
+
+def invalidate_currency_codes(sender, instance, **kwargs):
+    """
+    `post_save` and `post_delete` receiver of Currency.
+    """
+    get_cache().delete(CURRENCY_CODES_CACHE_KEY)
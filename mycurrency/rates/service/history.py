@@ -0,0 +1,165 @@
+"""
+This module serves the historical rate of a currency pair at any date from a local
+per-pair series: the stored valuation dates, sorted, and their rates, searched with
+`bisect` instead of a database query per conversion.
+
+The series are loaded on first use, at most RATES_HISTORY_MAX_PAIRS of them (least
+recently used first out) and for RATES_HISTORY_SERIES_TIMEOUT seconds, and dropped
+when `save_data` stores new rates of their source currency.
+
+Dates without a rate (weekends, holidays) are resolved with a policy:
+    - exact: only the rate of the date itself.
+    - previous: the rate of the previous date with a rate (previous business day).
+    - nearest: the rate of the closest date with a rate, the previous one on ties.
+    - linear: the rate interpolated between the previous and the next dates with
+      a rate, or the previous rate after the last one.
+The rates used are at most RATES_HISTORY_MAX_GAP_DAYS days away from the date.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+from django.conf import settings
+
+from ..domain.db import get_pair_exchange_rates
+from . import money
+
+
+EXACT_POLICY = "exact"
+PREVIOUS_POLICY = "previous"
+NEAREST_POLICY = "nearest"
+LINEAR_POLICY = "linear"
+POLICIES = (EXACT_POLICY, PREVIOUS_POLICY, NEAREST_POLICY, LINEAR_POLICY)
+
+# Bound of the dates remembered by `mark_filled`, dropped all at once when reached
+MAX_FILLED_DATES = 100000
+
+_series = OrderedDict()
+# (source currency, date) whose missing rates were already requested to a provider
+_filled_dates = set()
+_lock = threading.Lock()
+
+
+def get_default_policy() -> str:
+    return getattr(settings, "RATES_HISTORY_POLICY", PREVIOUS_POLICY)
+
+
+def get_max_gap_days() -> int:
+    return getattr(settings, "RATES_HISTORY_MAX_GAP_DAYS", 7)
+
+
+class RateSeries:
+    """
+    Stored rates of a currency pair, sorted by valuation date.
+    """
+
+    def __init__(self, dates: List[date], rates: List[Decimal]):
+        self.dates = dates
+        self.rates = rates
+        self.loaded_at = time.monotonic()
+
+    def get_rate(self, valuation_date: date, policy: str) -> Optional[Decimal]:
+        """
+        Returns the rate at a date following a policy, or None when the policy finds
+        no rate within RATES_HISTORY_MAX_GAP_DAYS days.
+        """
+        index = bisect_left(self.dates, valuation_date)
+        if index < len(self.dates) and self.dates[index] == valuation_date:
+            return self.rates[index]
+        if policy == EXACT_POLICY:
+            return None
+
+        max_gap = get_max_gap_days()
+        previous_gap = next_gap = None
+        if index > 0:
+            previous_gap = (valuation_date - self.dates[index - 1]).days
+            if previous_gap > max_gap:
+                previous_gap = None
+        if index < len(self.dates):
+            next_gap = (self.dates[index] - valuation_date).days
+            if next_gap > max_gap:
+                next_gap = None
+
+        if policy == PREVIOUS_POLICY or next_gap is None:
+            return None if previous_gap is None else self.rates[index - 1]
+        if previous_gap is None:
+            # There's no previous rate to interpolate from or to prefer on ties
+            return None if policy == LINEAR_POLICY else self.rates[index]
+        if policy == NEAREST_POLICY:
+            return self.rates[index - 1 if previous_gap <= next_gap else index]
+
+        previous_rate, next_rate = self.rates[index - 1], self.rates[index]
+        return (
+            previous_rate
+            + (next_rate - previous_rate) * previous_gap / (previous_gap + next_gap)
+        ).quantize(money.RATE_QUANTUM, context=money.CONTEXT)
+
+
+def load_rate_series(source_currency: str, exchanged_currency: str) -> RateSeries:
+    exchange_rates = get_pair_exchange_rates(source_currency, exchanged_currency)
+    return RateSeries(
+        [valuation_date for valuation_date, _ in exchange_rates],
+        [rate for _, rate in exchange_rates],
+    )
+
+
+def get_rate_series(source_currency: str, exchanged_currency: str) -> RateSeries:
+    """
+    Returns the series of a currency pair, loading it when it's not cached or has
+    expired.
+    """
+    key = (source_currency, exchanged_currency)
+    timeout = getattr(settings, "RATES_HISTORY_SERIES_TIMEOUT", 300)
+    with _lock:
+        series = _series.get(key)
+        if series is not None and time.monotonic() - series.loaded_at < timeout:
+            _series.move_to_end(key)
+            return series
+
+    series = load_rate_series(source_currency, exchanged_currency)
+    with _lock:
+        _series[key] = series
+        _series.move_to_end(key)
+        while len(_series) > getattr(settings, "RATES_HISTORY_MAX_PAIRS", 256):
+            _series.popitem(last=False)
+    return series
+
+
+def is_filled(source_currency: str, valuation_date: date) -> bool:
+    return (source_currency, valuation_date) in _filled_dates
+
+
+def mark_filled(source_currency: str, valuation_date: date):
+    """
+    Records that the missing rates around a date were requested, so dates without
+    a rate at the provider (e.g. weekends) don't trigger a request every time.
+    """
+    with _lock:
+        if len(_filled_dates) >= MAX_FILLED_DATES:
+            _filled_dates.clear()
+        _filled_dates.add((source_currency, valuation_date))
+
+
+def invalidate_rate_series(source_currency: Optional[str] = None):
+    """
+    Drops the cached series of a source currency, or all of them.
+    """
+    with _lock:
+        for key in list(_series):
+            if source_currency is None or key[0] == source_currency:
+                del _series[key]
+
+
+def clear_rate_series(sender, instance, **kwargs):
+    """
+    `post_save` and `post_delete` receiver of Currency and the exchange rate
+    models: rates changed outside of `save_data` are rare, so every series is
+    dropped.
+    """
+    invalidate_rate_series()
+    with _lock:
+        _filled_dates.clear()
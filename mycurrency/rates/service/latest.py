@@ -0,0 +1,216 @@
+"""
+This module maintains the latest known rate of every currency pair
+(LatestExchangeRate) and serves it to the converter through the local "rates"
+cache, so converting an amount doesn't need a provider call while the latest rate
+is fresh enough (see RATES_LATEST_MAX_AGE).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max
+from django.utils import timezone
+
+from ..domain.db import get_exchange_rate_model
+from ..models import CompactExchangeRate, Currency, LatestExchangeRate
+
+
+RATE_QUANTUM = Decimal("0.000001")
+
+
+def get_cache():
+    return caches["rates"]
+
+
+def get_cache_key(source_currency: str, exchanged_currency: str) -> str:
+    return "latest-rate:{}:{}".format(source_currency, exchanged_currency)
+
+
+def get_max_age() -> timedelta:
+    return timedelta(seconds=getattr(settings, "RATES_LATEST_MAX_AGE", 6 * 3600))
+
+
+def get_cache_timeout() -> int:
+    return getattr(settings, "RATES_LATEST_CACHE_TIMEOUT", 60)
+
+
+def is_servable(latest_rate: Optional[LatestExchangeRate], current_date: date) -> bool:
+    """
+    Checks if the converter can use the latest rate: it's the rate of the day, or
+    it's within the staleness budget.
+    """
+    if latest_rate is None:
+        return False
+    if latest_rate.valuation_date >= current_date:
+        return True
+    return latest_rate.is_fresh(get_max_age())
+
+
+def get_latest_rate_queryset(source_currency: str, exchanged_currency: str):
+    return LatestExchangeRate.objects.filter(
+        source_currency__code=source_currency,
+        exchanged_currency__code=exchanged_currency,
+    )
+
+
+def get_latest_rate(
+    source_currency: str, exchanged_currency: str
+) -> Optional[LatestExchangeRate]:
+    """
+    Returns the latest rate of a currency pair, from the cache or the database.
+    """
+    cache = get_cache()
+    cache_key = get_cache_key(source_currency, exchanged_currency)
+    latest_rate = cache.get(cache_key)
+    if latest_rate is None:
+        latest_rate = get_latest_rate_queryset(
+            source_currency, exchanged_currency
+        ).first()
+        if latest_rate is not None:
+            cache.set(cache_key, latest_rate, get_cache_timeout())
+    return latest_rate
+
+
+async def aget_latest_rate(
+    source_currency: str, exchanged_currency: str
+) -> Optional[LatestExchangeRate]:
+    """
+    Asynchronous version of `get_latest_rate`. The "rates" cache lives in local
+    memory, so it's read without leaving the event loop.
+    """
+    cache = get_cache()
+    cache_key = get_cache_key(source_currency, exchanged_currency)
+    latest_rate = cache.get(cache_key)
+    if latest_rate is None:
+        latest_rate = await get_latest_rate_queryset(
+            source_currency, exchanged_currency
+        ).afirst()
+        if latest_rate is not None:
+            cache.set(cache_key, latest_rate, get_cache_timeout())
+    return latest_rate
+
+
+def update_latest_rates(
+    source_currency: Currency,
+    rates: Dict[Tuple[int, date], float],
+    currency_codes: Dict[int, str],
+) -> int:
+    """
+    Updates the latest rates of a source currency with ingested rates, keeping the
+    most recent valuation date of every pair.
+
+    Args:
+        source_currency (Currency): The source currency.
+        rates (dict): Rates by (exchanged currency id, valuation date).
+        currency_codes (dict): Currency codes by id.
+
+    Returns:
+        int: The number of updated pairs.
+    """
+    newest = {}
+    for (exchanged_currency_id, valuation_date), rate in rates.items():
+        if (
+            exchanged_currency_id not in newest
+            or newest[exchanged_currency_id][0] <= valuation_date
+        ):
+            newest[exchanged_currency_id] = (valuation_date, rate)
+
+    stored_dates = dict(
+        LatestExchangeRate.objects.filter(
+            source_currency=source_currency, exchanged_currency_id__in=newest
+        ).values_list("exchanged_currency_id", "valuation_date")
+    )
+
+    fetched_at = timezone.now()
+    latest_rates = [
+        LatestExchangeRate(
+            source_currency=source_currency,
+            exchanged_currency_id=exchanged_currency_id,
+            rate_value=Decimal(str(rate)).quantize(RATE_QUANTUM),
+            valuation_date=valuation_date,
+            fetched_at=fetched_at,
+        )
+        for exchanged_currency_id, (valuation_date, rate) in newest.items()
+        if stored_dates.get(exchanged_currency_id, valuation_date) <= valuation_date
+        # Skipping the rates of deleted currencies
+        and exchanged_currency_id in currency_codes
+    ]
+    if not latest_rates:
+        return 0
+
+    LatestExchangeRate.objects.bulk_create(
+        latest_rates,
+        update_conflicts=True,
+        unique_fields=["source_currency", "exchanged_currency"],
+        update_fields=["rate_value", "valuation_date", "fetched_at"],
+    )
+
+    get_cache().set_many(
+        {
+            get_cache_key(
+                source_currency.code, currency_codes[latest_rate.exchanged_currency_id]
+            ): latest_rate
+            for latest_rate in latest_rates
+        },
+        get_cache_timeout(),
+    )
+    return len(latest_rates)
+
+
+def rebuild_latest_rates(source_currency_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recomputes the latest rates of some source currencies (all by default) from the
+    stored exchange rates, e.g. after importing rates outside of `save_data`.
+
+    Returns:
+        int: The number of updated pairs.
+    """
+    currency_codes = dict(Currency.objects.values_list("id", "code"))
+    if source_currency_ids is None:
+        source_currency_ids = currency_codes
+
+    model = get_exchange_rate_model()
+    value_field = "scaled_rate" if model is CompactExchangeRate else "rate_value"
+    updated_pairs = 0
+    for source_currency in Currency.objects.filter(id__in=list(source_currency_ids)):
+        history = model.objects.filter(source_currency_id=source_currency.id)
+        newest_dates = dict(
+            history.order_by()
+            .values("exchanged_currency_id")
+            .annotate(newest=Max("valuation_date"))
+            .values_list("exchanged_currency_id", "newest")
+        )
+        rates = {
+            (exchanged_currency_id, valuation_date): (
+                CompactExchangeRate(scaled_rate=value).rate_value
+                if model is CompactExchangeRate
+                else value
+            )
+            for exchanged_currency_id, valuation_date, value in history.filter(
+                valuation_date__in=set(newest_dates.values())
+            ).values_list("exchanged_currency_id", "valuation_date", value_field)
+            if newest_dates[exchanged_currency_id] == valuation_date
+        }
+        if rates:
+            updated_pairs += update_latest_rates(source_currency, rates, currency_codes)
+    return updated_pairs
+
+
+def invalidate_latest_rate(sender, instance, **kwargs):
+    """
+    `post_save` receiver of LatestExchangeRate, dropping the cached rate of a pair
+    edited outside of the ingestion (e.g. in the admin site).
+    """
+    get_cache().delete(
+        get_cache_key(instance.source_currency.code, instance.exchanged_currency.code)
+    )
+
+
+def clear_latest_rates(sender, instance, **kwargs):
+    """
+    `post_delete` receiver of Currency and LatestExchangeRate: deleted rows are rare,
+    so the whole cache is dropped.
+    """
+    get_cache().clear()
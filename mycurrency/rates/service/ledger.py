@@ -0,0 +1,259 @@
+"""
+This module revalues ledgers: streams of transactions, each with a valuation date,
+a currency and an amount, converted into a reporting currency with the historical
+rates.
+
+The rows are read in chunks of RATES_LEDGER_CHUNK_SIZE. For every chunk, the rates
+of the reporting currency missing for its new dates are fetched from the provider
+at once (`fill_missing_rates`), the stored rates of those dates are loaded with a
+single query, and the amounts are converted grouped by date and currency with
+`money.convert_many`. The rates are stored with the reporting currency as source,
+so a transaction currency is converted with the inverse of the stored rate.
+
+Ledgers are CSV, with a header, or NDJSON. Every output row is the input row plus
+the "value" in the reporting currency and the "rate" applied, as strings to keep
+them exact, or an "error" when the row couldn't be converted.
+
+Example:
+    date,currency,amount          date,currency,amount,value,rate,error
+    2025-03-10,USD,100.00   ->    2025-03-10,USD,100.00,92.16,0.9216...,
+"""
+import csv
+import io
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..domain.db import get_exchange_rates_by_date_and_currency
+from ..renderers import dumps
+from . import metrics, money
+from .rater import fill_missing_rates
+
+
+logger = logging.getLogger(__name__)
+
+CSV_FORMAT = "csv"
+NDJSON_FORMAT = "ndjson"
+LEDGER_FORMATS = (CSV_FORMAT, NDJSON_FORMAT)
+CONTENT_TYPES = {CSV_FORMAT: "text/csv", NDJSON_FORMAT: "application/x-ndjson"}
+RESULT_FIELDS = ("value", "rate", "error")
+
+
+def get_chunk_size() -> int:
+    return getattr(settings, "RATES_LEDGER_CHUNK_SIZE", 10000)
+
+
+def read_ledger(lines: Iterable[str], ledger_format: str) -> Iterator[dict]:
+    """
+    Parses the lines of a CSV or NDJSON ledger into rows. An NDJSON line that isn't
+    an object becomes a row with an error, so it doesn't stop the stream.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if ledger_format == CSV_FORMAT:
+        yield from csv.DictReader(lines)
+    elif ledger_format == NDJSON_FORMAT:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                row = {"error": f"Invalid ledger row: {line.strip()[:100]}"}
+            yield row
+    else:
+        raise ValueError(f"Invalid ledger format: {ledger_format}")
+
+
+def write_ledger(chunks: Iterable[List[dict]], ledger_format: str) -> Iterator[bytes]:
+    """
+    Serializes chunks of converted rows, yielding the bytes of every chunk. The CSV
+    columns are the ones of the first row followed by the result columns.
+    """
+    fieldnames = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if ledger_format == NDJSON_FORMAT:
+            yield b"".join(dumps(row) + b"\n" for row in chunk)
+            continue
+
+        buffer = io.StringIO()
+        first_chunk = fieldnames is None
+        if first_chunk:
+            fieldnames = [key for key in chunk[0] if key not in RESULT_FIELDS]
+            fieldnames.extend(RESULT_FIELDS)
+        writer = csv.DictWriter(buffer, fieldnames, restval="", extrasaction="ignore")
+        if first_chunk:
+            writer.writeheader()
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+
+
+class LedgerRates:
+    """
+    Rates into a reporting currency by (valuation date, currency), loaded by date
+    range as the ledger chunks need them.
+    """
+
+    def __init__(self, reporting_currency: str, fill_gaps: bool = True):
+        self.reporting_currency = reporting_currency
+        self.fill_gaps = fill_gaps
+        self.loaded_dates = set()
+        self.stored_rates: Dict[Tuple[date, str], Decimal] = {}
+        self.rates: Dict[Tuple[date, str], Optional[Decimal]] = {}
+
+    def load(self, dates: Iterable[date]):
+        """
+        Fills the missing rates of the dates not loaded yet and loads them.
+        """
+        new_dates = set(dates) - self.loaded_dates
+        if not new_dates:
+            return
+
+        date_from, date_to = min(new_dates), max(new_dates)
+        if self.fill_gaps and date_from <= timezone.now().date():
+            try:
+                fill_missing_rates(
+                    self.reporting_currency,
+                    date_from,
+                    min(date_to, timezone.now().date()),
+                )
+            except Exception as e:
+                # The rows without a stored rate are reported as failed
+                logger.error(f"LedgerRates - Filling the rates failed: {e}")
+
+        self.stored_rates.update(
+            get_exchange_rates_by_date_and_currency(
+                self.reporting_currency, date_from, date_to
+            )
+        )
+        self.loaded_dates.update(new_dates)
+
+    def get(self, valuation_date: date, currency: str) -> Optional[Decimal]:
+        """
+        Returns the rate converting `currency` into the reporting currency, the
+        inverse of the stored rate of the opposite direction.
+        """
+        key = (valuation_date, currency)
+        if key not in self.rates:
+            if currency == self.reporting_currency:
+                self.rates[key] = Decimal(1)
+            else:
+                stored_rate = self.stored_rates.get(key)
+                self.rates[key] = money.invert(stored_rate) if stored_rate else None
+        return self.rates[key]
+
+
+def convert_chunk(rows: List[dict], rates: LedgerRates) -> List[dict]:
+    """
+    Converts a chunk of ledger rows in place, grouping the amounts by date and
+    currency so every group is converted with a single `convert_many` call.
+    """
+    groups = defaultdict(list)
+    # Ledgers repeat the same dates over and over: parsing every date once
+    dates = {}
+    for row in rows:
+        if row.get("error"):
+            continue
+        try:
+            valuation_date = dates.get(row["date"])
+            if valuation_date is None:
+                valuation_date = dates[row["date"]] = date.fromisoformat(
+                    str(row["date"])
+                )
+            amount = money.to_decimal(row["amount"])
+            currency = str(row["currency"]).upper()
+        except KeyError as e:
+            row["error"] = f"Missing field: {e.args[0]}"
+            continue
+        except ValueError as e:
+            row["error"] = str(e)
+            continue
+        groups[(valuation_date, currency)].append((row, amount))
+
+    rates.load(valuation_date for valuation_date, _ in groups)
+    reporting_currency = rates.reporting_currency
+    for (valuation_date, currency), group in groups.items():
+        rate = rates.get(valuation_date, currency)
+        if rate is None:
+            error = f"No rate for {currency} on {valuation_date}"
+            for row, _ in group:
+                row["error"] = error
+            continue
+
+        values = money.convert_many(
+            [amount for _, amount in group], rate, reporting_currency
+        )
+        rate = str(rate)
+        for (row, _), value in zip(group, values):
+            row["value"] = str(value)
+            row["rate"] = rate
+    return rows
+
+
+def chunked(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def convert_ledger(
+    rows: Iterable[dict],
+    reporting_currency: str,
+    fill_gaps: bool = True,
+    stats: Optional[dict] = None,
+) -> Iterator[List[dict]]:
+    """
+    Converts ledger rows into a reporting currency, yielding the converted chunks
+    as soon as they are ready.
+
+    Args:
+        rows (Iterable[dict]): Rows with "date", "currency" and "amount" fields.
+        reporting_currency (str): The currency code of the converted values.
+        fill_gaps (bool): Whether to fetch the missing rates from the provider.
+        stats (dict): Filled with the "rows", "failed" and "seconds" of the run,
+            and its "rows_per_second" once every row is converted.
+    """
+    stats = {} if stats is None else stats
+    stats.update(rows=0, failed=0, seconds=0.0)
+    rates = LedgerRates(reporting_currency, fill_gaps=fill_gaps)
+    start = time.perf_counter()
+    for chunk in chunked(rows, get_chunk_size()):
+        convert_chunk(chunk, rates)
+        stats["rows"] += len(chunk)
+        stats["failed"] += sum(1 for row in chunk if row.get("error"))
+        stats["seconds"] = time.perf_counter() - start
+        yield chunk
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_second"] = (
+        stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    )
+    metrics.record_ledger(
+        reporting_currency, stats["rows"], stats["failed"], stats["seconds"]
+    )
+    logger.info(
+        "convert_ledger: {} rows into {} ({} failed) in {:.3f}s, {:.0f} rows/s".format(
+            stats["rows"],
+            reporting_currency,
+            stats["failed"],
+            stats["seconds"],
+            stats["rows_per_second"],
+        )
+    )
@@ -0,0 +1,475 @@
+"""
+This module provides a lightweight, in-process metrics registry for the rates
+service and renders it using the Prometheus text exposition format.
+
+Metrics are plain Python objects guarded by a lock, so recording a sample on a
+hot path (e.g. the currency converter) costs a dictionary lookup and a couple of
+additions. The registry is exposed through the `/metrics` endpoint.
+
+Example:
+    from rates.service import metrics
+
+    with metrics.track_provider_call("CurrencyBeacon", "timeseries"):
+        adapter.get_exchange_rate_data(...)
+
+    metrics.CACHE_REQUESTS.inc(cache="rates_db", result="hit")
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+DEFAULT_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def metrics_enabled() -> bool:
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, _escape(value))
+        for name, value in zip(labelnames, labelvalues)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class for every metric kind. Samples are stored per label values tuple.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                "Metric {} expects labels {}".format(self.name, self.labelnames)
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Iterable[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            "# HELP {} {}".format(self.name, self.documentation),
+            "# TYPE {} {}".format(self.name, self.kind),
+        ]
+        for suffix, labelnames, labelvalues, value in self.samples():
+            lines.append(
+                "{}{}{} {}".format(
+                    self.name,
+                    suffix,
+                    _format_labels(labelnames, labelvalues),
+                    _format_value(value),
+                )
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield "", self.labelnames, labelvalues, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per bucket counts..., +Inf count, sum]
+                state = [0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        bucket_labelnames = self.labelnames + ("le",)
+        for labelvalues, state in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state):
+                cumulative += bucket_count
+                yield "_bucket", bucket_labelnames, labelvalues + (
+                    _format_value(bound),
+                ), cumulative
+            yield "_count", self.labelnames, labelvalues, cumulative
+            yield "_sum", self.labelnames, labelvalues, state[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+PROVIDER_CALL_SECONDS = REGISTRY.register(
+    Histogram(
+        "mycurrency_provider_call_seconds",
+        "Latency of calls to exchange rate providers.",
+        ("provider", "operation", "outcome"),
+    )
+)
+VIEW_DB_QUERIES = REGISTRY.register(
+    Histogram(
+        "mycurrency_view_db_queries",
+        "Number of SQL queries executed per request, by view.",
+        ("view",),
+        buckets=DEFAULT_COUNT_BUCKETS,
+    )
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "mycurrency_cache_requests_total",
+        "Lookups served locally (hit) or requiring a provider call (miss).",
+        ("cache", "result"),
+    )
+)
+BATCH_ROWS = REGISTRY.register(
+    Counter(
+        "mycurrency_batch_rows_total",
+        "Exchange rate rows stored by batch processes.",
+        ("source_currency",),
+    )
+)
+BATCH_SECONDS = REGISTRY.register(
+    Counter(
+        "mycurrency_batch_seconds_total",
+        "Time spent fetching and storing batch process chunks.",
+        ("source_currency",),
+    )
+)
+BATCH_THROUGHPUT = REGISTRY.register(
+    Gauge(
+        "mycurrency_batch_rows_per_second",
+        "Throughput of the last processed batch chunk.",
+        ("source_currency",),
+    )
+)
+BATCH_QUEUE_DEPTH = REGISTRY.register(
+    Gauge(
+        "mycurrency_batch_queue_depth",
+        "Batch chunks planned but not yet dispatched.",
+    )
+)
+SYNC_RUNS = REGISTRY.register(
+    Counter(
+        "mycurrency_sync_runs_total",
+        "Scheduled syncs of the latest rates, by outcome.",
+        ("source_currency", "outcome"),
+    )
+)
+SYNC_WATERMARK = REGISTRY.register(
+    Gauge(
+        "mycurrency_sync_watermark_timestamp_seconds",
+        "Time of the last successful sync of the latest rates.",
+        ("source_currency",),
+    )
+)
+WARMUP_SECONDS = REGISTRY.register(
+    Gauge(
+        "mycurrency_warmup_seconds",
+        "Time spent by the last warm-up, by step.",
+        ("step",),
+    )
+)
+LEDGER_ROWS = REGISTRY.register(
+    Counter(
+        "mycurrency_ledger_rows_total",
+        "Ledger rows revalued into a reporting currency, by outcome.",
+        ("reporting_currency", "outcome"),
+    )
+)
+LEDGER_THROUGHPUT = REGISTRY.register(
+    Gauge(
+        "mycurrency_ledger_rows_per_second",
+        "Throughput of the last ledger revaluation.",
+        ("reporting_currency",),
+    )
+)
+
+PROVIDER_CACHE_BYTES = REGISTRY.register(
+    Gauge(
+        "mycurrency_provider_cache_bytes",
+        "Size of the provider responses cached on disk.",
+    )
+)
+
+PROVIDER_SELECTIONS = REGISTRY.register(
+    Counter(
+        "mycurrency_provider_selections_total",
+        "Providers selected for a call, by reason (see provider_selector).",
+        ("provider", "reason"),
+    )
+)
+PROVIDER_ERROR_RATE = REGISTRY.register(
+    Gauge(
+        "mycurrency_provider_error_rate",
+        "Rate of failed calls in the rolling window of a provider.",
+        ("provider",),
+    )
+)
+PROVIDER_LATENCY = REGISTRY.register(
+    Gauge(
+        "mycurrency_provider_latency_seconds",
+        "Mean latency of the successful calls in the rolling window of a provider.",
+        ("provider",),
+    )
+)
+
+MICROBATCH_SIZE = REGISTRY.register(
+    Histogram(
+        "mycurrency_microbatch_currencies",
+        "Currencies fetched by a single merged provider call, by source currency.",
+        ("source_currency",),
+        buckets=DEFAULT_COUNT_BUCKETS,
+    )
+)
+
+WRITE_BEHIND_QUEUE = REGISTRY.register(
+    Gauge(
+        "mycurrency_write_behind_queue",
+        "Batches of fetched rates waiting to be stored by the write-behind.",
+    )
+)
+
+WRITE_BEHIND_FLUSHES = REGISTRY.register(
+    Counter(
+        "mycurrency_write_behind_flushes_total",
+        "Flushes of the write-behind queue, by outcome.",
+        ("outcome",),
+    )
+)
+
+
+class RequestTimings:
+    """
+    Accumulates the time spent on provider calls while serving a single request.
+    """
+
+    def __init__(self):
+        self.provider_calls = 0
+        self.provider_seconds = 0.0
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def collect_request_timings():
+    """
+    Makes provider calls performed in the current context (including threads
+    spawned with `asyncio.to_thread` or `sync_to_async`) add up to a RequestTimings.
+    """
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+@contextmanager
+def track_provider_call(provider: str, operation: str):
+    """
+    Records the latency of a provider call, labelled with its outcome.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        elapsed = time.perf_counter() - start
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.provider_calls += 1
+            timings.provider_seconds += elapsed
+        if metrics_enabled():
+            PROVIDER_CALL_SECONDS.observe(
+                elapsed,
+                provider=provider,
+                operation=operation,
+                outcome=outcome,
+            )
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    if metrics_enabled():
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_provider_cache_size(size: int):
+    if metrics_enabled():
+        PROVIDER_CACHE_BYTES.set(size)
+
+
+def record_provider_selection(provider: str, reason: str):
+    if metrics_enabled():
+        PROVIDER_SELECTIONS.inc(provider=provider, reason=reason)
+
+
+def record_provider_health(provider: str, error_rate: float, latency: Optional[float]):
+    if not metrics_enabled():
+        return
+    PROVIDER_ERROR_RATE.set(error_rate, provider=provider)
+    if latency is not None:
+        PROVIDER_LATENCY.set(latency, provider=provider)
+
+
+def record_microbatch(source_currency: str, currencies: int):
+    if metrics_enabled():
+        MICROBATCH_SIZE.observe(currencies, source_currency=source_currency)
+
+
+def record_write_behind_queue(depth: int):
+    if metrics_enabled():
+        WRITE_BEHIND_QUEUE.set(depth)
+
+
+def record_write_behind_flush(success: bool):
+    if metrics_enabled():
+        WRITE_BEHIND_FLUSHES.inc(outcome="success" if success else "error")
+
+
+def record_batch_chunk(source_currency: str, rows: int, seconds: float):
+    if not metrics_enabled():
+        return
+    BATCH_ROWS.inc(rows, source_currency=source_currency)
+    BATCH_SECONDS.inc(seconds, source_currency=source_currency)
+    if seconds > 0:
+        BATCH_THROUGHPUT.set(rows / seconds, source_currency=source_currency)
+
+
+def record_sync(source_currency: str, success: bool):
+    if not metrics_enabled():
+        return
+    SYNC_RUNS.inc(
+        source_currency=source_currency, outcome="success" if success else "error"
+    )
+    if success:
+        SYNC_WATERMARK.set(time.time(), source_currency=source_currency)
+
+
+def record_warm_up_step(step: str, seconds: float):
+    if metrics_enabled():
+        WARMUP_SECONDS.set(seconds, step=step)
+
+
+def record_ledger(reporting_currency: str, rows: int, failed: int, seconds: float):
+    if not metrics_enabled():
+        return
+    LEDGER_ROWS.inc(
+        rows - failed, reporting_currency=reporting_currency, outcome="converted"
+    )
+    LEDGER_ROWS.inc(failed, reporting_currency=reporting_currency, outcome="failed")
+    if seconds > 0:
+        LEDGER_THROUGHPUT.set(rows / seconds, reporting_currency=reporting_currency)
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,119 @@
+"""
+This module merges the concurrent provider requests for today's rates of a source
+currency: the conversions missing a rate within RATES_MICROBATCH_MAX_DELAY seconds
+of each other are served by a single multi-symbol time series call, instead of a
+convert call each.
+
+The first request of a source currency opens a batch and waits for the others,
+at most RATES_MICROBATCH_MAX_DELAY seconds or until RATES_MICROBATCH_MAX_BATCH
+currencies are requested. It then fetches the rates of every requested currency,
+stores them with `store_rates` and wakes the waiting requests up with their rate.
+Enabled with RATES_MICROBATCH_ENABLED.
+
+Example:
+    rate = get_rate("USD", "EUR")  # Also fetches the GBP and CHF rates requested
+                                   # by concurrent conversions
+"""
+import logging
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from ..adapters.adapter_factory import get_exchange_rate_data
+from . import metrics, money
+from .write_behind import store_rates
+
+
+logger = logging.getLogger(__name__)
+
+# Open batch of every source currency
+_batches = {}
+_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "RATES_MICROBATCH_ENABLED", False)
+
+
+class RateBatch:
+    """
+    Currencies requested for a source currency, and their rates once fetched.
+    """
+
+    def __init__(self, source_currency: str):
+        self.source_currency = source_currency
+        self.currencies = set()
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.rates: Dict[str, Decimal] = {}
+        self.error: Optional[Exception] = None
+
+    def fetch(self):
+        """
+        Fetches and stores today's rates of the requested currencies, then wakes
+        the waiting requests up.
+        """
+        current_date = datetime.now().date()
+        try:
+            data, _ = get_exchange_rate_data(
+                source_currency=self.source_currency,
+                exchanged_currency=",".join(sorted(self.currencies)),
+                date_from=current_date,
+                date_to=current_date,
+            )
+            rates = {
+                currency: rate
+                for currency, rate in (data.get(current_date.isoformat()) or {}).items()
+                if currency in self.currencies
+            }
+            store_rates(
+                data={current_date: rates}, source_currency=self.source_currency
+            )
+            self.rates = {
+                currency: money.to_decimal(rate) for currency, rate in rates.items()
+            }
+        except Exception as e:
+            logger.error(
+                f"RateBatch - Fetching {self.source_currency} rates failed: {e}"
+            )
+            self.error = e
+        finally:
+            metrics.record_microbatch(self.source_currency, len(self.currencies))
+            self.done.set()
+
+
+def get_rate(source_currency: str, exchanged_currency: str) -> Optional[Decimal]:
+    """
+    Returns today's rate of a pair, fetched along with the rates requested by the
+    concurrent calls, or None when the provider returned no rate for the pair.
+
+    Raises:
+        Exception: The error of the provider call.
+    """
+    max_batch = getattr(settings, "RATES_MICROBATCH_MAX_BATCH", 20)
+    with _lock:
+        batch = _batches.get(source_currency)
+        leader = batch is None
+        if leader:
+            batch = _batches[source_currency] = RateBatch(source_currency)
+        batch.currencies.add(exchanged_currency)
+        if len(batch.currencies) >= max_batch:
+            # Closing the batch, the next requests open a new one
+            del _batches[source_currency]
+            batch.full.set()
+
+    if leader:
+        batch.full.wait(getattr(settings, "RATES_MICROBATCH_MAX_DELAY", 0.005))
+        with _lock:
+            if _batches.get(source_currency) is batch:
+                del _batches[source_currency]
+        batch.fetch()
+    else:
+        batch.done.wait()
+
+    if batch.error is not None:
+        raise batch.error
+    return batch.rates.get(exchanged_currency)
@@ -0,0 +1,184 @@
+"""
+This module is the conversion engine. Amounts and rates are Decimals computed in a
+shared context (CONTEXT), never floats, and the converted amounts are rounded to the
+minor unit of their currency: 2 decimal places unless ISO 4217 says otherwise (see
+CURRENCY_DECIMAL_PLACES, overridden by the RATES_CURRENCY_DECIMAL_PLACES setting),
+with the RATES_ROUNDING mode.
+
+Provider values given as floats are read through their shortest repr, so 0.1 is
+Decimal("0.1") and not its binary approximation.
+
+Example:
+    >>> convert_many([Decimal("10"), "2.5"], Decimal("0.921234"), "EUR")
+    [Decimal('9.21'), Decimal('2.30')]
+"""
+from decimal import (
+    ROUND_HALF_EVEN,
+    Context,
+    Decimal,
+    DivisionByZero,
+    InvalidOperation,
+    Overflow,
+)
+from typing import Iterable, List
+
+from django.conf import settings
+
+
+CONTEXT = Context(
+    prec=28,
+    rounding=ROUND_HALF_EVEN,
+    traps=[InvalidOperation, DivisionByZero, Overflow],
+)
+
+DEFAULT_DECIMAL_PLACES = 2
+# ISO 4217 minor units other than 2
+CURRENCY_DECIMAL_PLACES = {
+    **dict.fromkeys(
+        (
+            "BIF",
+            "CLP",
+            "DJF",
+            "GNF",
+            "ISK",
+            "JPY",
+            "KMF",
+            "KRW",
+            "PYG",
+            "RWF",
+            "UGX",
+            "VND",
+            "VUV",
+            "XAF",
+            "XOF",
+            "XPF",
+        ),
+        0,
+    ),
+    **dict.fromkeys(("BHD", "IQD", "JOD", "KWD", "LYD", "OMR", "TND"), 3),
+    "CLF": 4,
+}
+
+# Precision of the stored rates (rate_value has 6 decimal places)
+RATE_QUANTUM = Decimal("0.000001")
+
+
+def to_decimal(value) -> Decimal:
+    """
+    Converts an amount or a rate (Decimal, int, str or float) to a finite Decimal.
+
+    Raises:
+        ValueError: If the value is not a finite number.
+    """
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    elif not isinstance(value, Decimal):
+        try:
+            value = Decimal(value)
+        except (InvalidOperation, TypeError):
+            raise ValueError(f"Invalid number: {value!r}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid number: {value!r}")
+    return value
+
+
+def get_rounding() -> str:
+    return getattr(settings, "RATES_ROUNDING", ROUND_HALF_EVEN)
+
+
+def get_decimal_places(currency: str) -> int:
+    overrides = getattr(settings, "RATES_CURRENCY_DECIMAL_PLACES", {})
+    if currency in overrides:
+        return overrides[currency]
+    return CURRENCY_DECIMAL_PLACES.get(currency, DEFAULT_DECIMAL_PLACES)
+
+
+def get_quantum(currency: str) -> Decimal:
+    """
+    Returns the minor unit of a currency, e.g. Decimal("0.01") for EUR.
+    """
+    return Decimal(1).scaleb(-get_decimal_places(currency))
+
+
+def round_amount(amount, currency: str) -> Decimal:
+    """
+    Rounds an amount to the minor unit of its currency.
+    """
+    return to_decimal(amount).quantize(
+        get_quantum(currency), rounding=get_rounding(), context=CONTEXT
+    )
+
+
+def convert(amount, rate, currency: str) -> Decimal:
+    """
+    Converts an amount with a rate, rounded to the minor unit of the exchanged
+    currency.
+    """
+    return CONTEXT.multiply(to_decimal(amount), to_decimal(rate)).quantize(
+        get_quantum(currency), rounding=get_rounding(), context=CONTEXT
+    )
+
+
+def convert_many(amounts: Iterable, rate, currency: str) -> List[Decimal]:
+    """
+    Converts many amounts with the same rate. The rate, the minor unit and the
+    rounding mode are resolved once, instead of once per amount like `convert`.
+
+    Returns:
+        list: The converted amounts, in the order of `amounts`.
+    """
+    rate = to_decimal(rate)
+    quantum = get_quantum(currency)
+    rounding = get_rounding()
+    multiply = CONTEXT.multiply
+    return [
+        multiply(to_decimal(amount), rate).quantize(
+            quantum, rounding=rounding, context=CONTEXT
+        )
+        for amount in amounts
+    ]
+
+
+def invert(rate) -> Decimal:
+    """
+    Returns the rate of the opposite direction of a currency pair, 1 / rate.
+
+    Raises:
+        ValueError: If the rate is zero or not a number.
+    """
+    rate = to_decimal(rate)
+    if not rate:
+        raise ValueError("A rate of zero can't be inverted")
+    return CONTEXT.divide(1, rate)
+
+
+def cross_rate(pivot_to_exchanged, pivot_to_source) -> Decimal:
+    """
+    Returns the rate from a source to an exchanged currency triangulated through a
+    pivot currency, with the precision of the stored rates.
+
+    Raises:
+        ValueError: If `pivot_to_source` is zero or either rate is not a number.
+    """
+    pivot_to_source = to_decimal(pivot_to_source)
+    if not pivot_to_source:
+        raise ValueError("A rate of zero can't be triangulated")
+    return CONTEXT.divide(to_decimal(pivot_to_exchanged), pivot_to_source).quantize(
+        RATE_QUANTUM, rounding=get_rounding(), context=CONTEXT
+    )
+
+
+def implied_rate(amount, value) -> Decimal:
+    """
+    Returns the rate of a conversion of `amount` into `value`, with the precision
+    of the stored rates.
+
+    Raises:
+        ValueError: If the amount is zero or either value is not a number.
+    """
+    amount = to_decimal(amount)
+    if not amount:
+        raise ValueError("The amount of a conversion can't be zero")
+    return CONTEXT.divide(to_decimal(value), amount).quantize(
+        RATE_QUANTUM, rounding=get_rounding(), context=CONTEXT
+    )
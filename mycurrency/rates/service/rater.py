@@ -4,22 +4,47 @@ or fetching missing data from a remote provider when necessary.
 It ensures complete data coverage for a specified date range by detecting and
 filling gaps in exchange rate records.
 """
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from asgiref.sync import sync_to_async
 
 from ..adapters.adapter_factory import (
+    aget_exchange_convertion_data,
+    aget_exchange_rate_data,
     get_exchange_convertion_data,
     get_exchange_rate_data,
 )
-from .common import get_missing_rate_dates, save_data
-from ..domain.db import get_exchange_rates_grouped_by_date_and_currency
-from ..models import Currency, CurrencyExchangeRate
+from .common import (
+    aget_missing_rate_dates,
+    asave_data,
+    get_missing_rate_dates,
+    save_data,
+)
+from . import history, metrics, microbatch, money, write_behind
+from .currencies import aget_currency_codes, get_currency_codes
+from .latest import aget_latest_rate, get_latest_rate, is_servable
+from .rollups import (
+    aget_rollups_grouped_by_period_and_currency,
+    get_period_end,
+    get_period_start,
+    get_rollups_grouped_by_period_and_currency,
+)
+from .usage import record_pair_usage
+from ..domain.db import (
+    aget_exchange_rates_grouped_by_date_and_currency,
+    filter_exchange_rates,
+    get_exchange_rates_grouped_by_date_and_currency,
+)
 
 
 def get_exchange_rates(source_currency: str, date_from: date, date_to: date) -> list:
     """
     Retrieves exchange rates for a given source currency and date range.
     If all required data is available in the database, it is returned directly.
-    Otherwise, missing data is fetched from a remote provider and stored.
+    Otherwise, missing data is fetched from a remote provider and stored, or queued
+    to be stored when the write-behind is enabled (see `write_behind`).
 
     Args:
         source_currency (str): The currency code for the source currency (e.g., 'USD', 'EUR').
@@ -41,7 +66,107 @@ def get_exchange_rates(source_currency: str, date_from: date, date_to: date) ->
     Raises:
         ValueError: If an invalid currency code is provided.
     """
-    valid_currencies = set(Currency.objects.values_list("code", flat=True))
+    deferred = write_behind.is_enabled()
+    fill_missing_rates(source_currency, date_from, date_to, deferred=deferred)
+
+    # Reading the rates not stored yet first, a flush would move them to the
+    # database after the query
+    if deferred:
+        pending_rates = write_behind.get_pending_rates(
+            source_currency, date_from, date_to
+        )
+
+    # Retrieving all data from database
+    db_exchange_rates = get_exchange_rates_grouped_by_date_and_currency(
+        source_currency=source_currency, date_from=date_from, date_to=date_to
+    )
+    if deferred:
+        return write_behind.overlay_grouped_rates(
+            db_exchange_rates, source_currency, pending_rates
+        )
+    return db_exchange_rates
+
+
+async def aget_exchange_rates(
+    source_currency: str, date_from: date, date_to: date
+) -> dict:
+    """
+    Asynchronous version of `get_exchange_rates`: database access goes through the
+    async ORM and missing data is fetched with the adapters' asynchronous clients.
+    """
+    deferred = write_behind.is_enabled()
+    await afill_missing_rates(source_currency, date_from, date_to, deferred=deferred)
+
+    # Reading the rates not stored yet first, a flush would move them to the
+    # database after the query
+    if deferred:
+        pending_rates = write_behind.get_pending_rates(
+            source_currency, date_from, date_to
+        )
+
+    # Retrieving all data from database
+    db_exchange_rates = await aget_exchange_rates_grouped_by_date_and_currency(
+        source_currency=source_currency, date_from=date_from, date_to=date_to
+    )
+    if deferred:
+        return write_behind.overlay_grouped_rates(
+            db_exchange_rates, source_currency, pending_rates
+        )
+    return db_exchange_rates
+
+
+def get_rollup_range(date_from: date, date_to: date, resolution: str) -> tuple:
+    """
+    Extends a date range to the whole periods it overlaps, up to today.
+    """
+    return (
+        get_period_start(date_from, resolution),
+        min(get_period_end(date_to, resolution), datetime.now().date()),
+    )
+
+
+def get_exchange_rate_rollups(
+    source_currency: str, date_from: date, date_to: date, resolution: str
+) -> dict:
+    """
+    Retrieves the weekly or monthly rollups of a source currency over the periods
+    overlapping a date range, fetching the missing daily rates of those periods
+    first (see `get_exchange_rates`).
+    """
+    fill_missing_rates(
+        source_currency, *get_rollup_range(date_from, date_to, resolution)
+    )
+    return get_rollups_grouped_by_period_and_currency(
+        source_currency, date_from, date_to, resolution
+    )
+
+
+async def aget_exchange_rate_rollups(
+    source_currency: str, date_from: date, date_to: date, resolution: str
+) -> dict:
+    """
+    Asynchronous version of `get_exchange_rate_rollups`.
+    """
+    await afill_missing_rates(
+        source_currency, *get_rollup_range(date_from, date_to, resolution)
+    )
+    return await aget_rollups_grouped_by_period_and_currency(
+        source_currency, date_from, date_to, resolution
+    )
+
+
+def fill_missing_rates(
+    source_currency: str, date_from: date, date_to: date, deferred: bool = False
+) -> int:
+    """
+    Fetches from a remote provider and stores the rates of a source currency missing
+    in the database for a date range. When deferred, the rates are queued to be
+    stored by the write-behind instead, and the dates already queued aren't fetched.
+
+    Returns:
+        int: The number of stored exchange rate rows, or of queued rates.
+    """
+    valid_currencies = get_currency_codes()
 
     # Removing source currency and getting the exchanged currencies
     exchanged_currencies = ",".join(valid_currencies - {source_currency})
@@ -49,6 +174,9 @@ def get_exchange_rates(source_currency: str, date_from: date, date_to: date) ->
     subsets = get_missing_rate_dates(
         source_currency=source_currency, date_from=date_from, date_to=date_to
     )
+    if deferred:
+        subsets = write_behind.exclude_pending_dates(source_currency, subsets)
+    metrics.record_cache_lookup(cache="rates_db", hit=not subsets)
 
     # Fetching remote data
     data = {}
@@ -62,37 +190,145 @@ def get_exchange_rates(source_currency: str, date_from: date, date_to: date) ->
         data.update(new_data)
 
     # Saving data in data base
-    save_data(data=data, source_currency=source_currency)
+    if deferred:
+        return write_behind.store_rates(data=data, source_currency=source_currency)
+    return save_data(data=data, source_currency=source_currency)
 
-    # Retrieving all data from database
-    db_exchange_rates = get_exchange_rates_grouped_by_date_and_currency(
+
+async def afill_missing_rates(
+    source_currency: str, date_from: date, date_to: date, deferred: bool = False
+) -> int:
+    """
+    Asynchronous version of `fill_missing_rates`.
+    """
+    valid_currencies = await aget_currency_codes()
+
+    # Removing source currency and getting the exchanged currencies
+    exchanged_currencies = ",".join(valid_currencies - {source_currency})
+
+    subsets = await aget_missing_rate_dates(
         source_currency=source_currency, date_from=date_from, date_to=date_to
     )
-    return db_exchange_rates
+    if deferred:
+        subsets = write_behind.exclude_pending_dates(source_currency, subsets)
+    metrics.record_cache_lookup(cache="rates_db", hit=not subsets)
+
+    # Fetching remote data
+    data = {}
+    for gap in subsets:
+        new_data, _ = await aget_exchange_rate_data(
+            source_currency=source_currency,
+            exchanged_currency=exchanged_currencies,
+            date_from=gap[0],
+            date_to=gap[-1],
+        )
+        data.update(new_data)
+
+    # Saving data in data base
+    if deferred:
+        return await sync_to_async(write_behind.store_rates)(
+            data=data, source_currency=source_currency
+        )
+    return await asave_data(data=data, source_currency=source_currency)
+
+
+def get_convertion_rate_queryset(
+    source_currency: str, exchanged_currency: str, valuation_date: date
+):
+    return filter_exchange_rates(
+        source_currency, exchanged_currency, valuation_date=valuation_date
+    )
+
+
+def build_convertion(
+    db_rate,
+    source_currency: str,
+    exchanged_currency: str,
+    amount: Decimal,
+) -> dict:
+    return build_rate_convertion(
+        db_rate.rate_value,
+        db_rate.valuation_date,
+        source_currency,
+        exchanged_currency,
+        amount,
+    )
+
+
+def build_rate_convertion(
+    rate: Decimal,
+    valuation_date: date,
+    source_currency: str,
+    exchanged_currency: str,
+    amount: Decimal,
+) -> dict:
+    return {
+        "date": valuation_date.strftime("%Y-%m-%d"),
+        "source_currency": source_currency,
+        "exchanged_currency": exchanged_currency,
+        "amount": amount,
+        "value": money.convert(amount, rate, exchanged_currency),
+    }
+
+
+def save_convertion_rate(
+    data: dict,
+    source_currency: str,
+    exchanged_currency: str,
+    amount: Decimal,
+    valuation_date: date,
+):
+    """
+    Stores the rate of a convertion retrieved from a provider, or queues it when the
+    write-behind is enabled.
+    """
+    new_rate_value = money.implied_rate(amount, data["value"])
+    write_behind.store_rates(
+        data={valuation_date: {exchanged_currency: new_rate_value}},
+        source_currency=source_currency,
+    )
 
 
 def get_exchange_convertion(
-    source_currency: str, exchanged_currency: str, amount: float
+    source_currency: str, exchanged_currency: str, amount: Decimal
 ) -> dict:
+    record_pair_usage(source_currency, exchanged_currency)
     current_date = datetime.now().date()
+    # Serving the latest known rate while it's fresh enough
+    latest_rate = get_latest_rate(source_currency, exchanged_currency)
+    servable = is_servable(latest_rate, current_date)
+    metrics.record_cache_lookup(cache="latest_rate", hit=servable)
+    if servable:
+        return build_convertion(
+            latest_rate, source_currency, exchanged_currency, amount
+        )
+
     # Checking if we have to retrieve remote data
-    db_rate = CurrencyExchangeRate.objects.filter(
-        source_currency__code=source_currency,
-        exchanged_currency__code=exchanged_currency,
-        valuation_date=current_date,
+    db_rate = get_convertion_rate_queryset(
+        source_currency, exchanged_currency, current_date
     ).first()
+    metrics.record_cache_lookup(cache="convertion_db", hit=db_rate is not None)
 
     if db_rate:
-        data = {
-            "date": db_rate.valuation_date.strftime("%Y-%m-%d"),
-            "source_currency": db_rate.source_currency.code,
-            "exchanged_currency": db_rate.exchanged_currency.code,
-            "amount": amount,
-            "value": amount * db_rate.rate_value,
-        }
-        return data
-
-    # We need to retrieve remote data
+        return build_convertion(db_rate, source_currency, exchanged_currency, amount)
+
+    # Serving the rate fetched by a previous request and not stored yet
+    pending_rate = write_behind.get_pending_rate(
+        source_currency, exchanged_currency, current_date
+    )
+    if pending_rate is not None:
+        return build_rate_convertion(
+            pending_rate, current_date, source_currency, exchanged_currency, amount
+        )
+
+    # We need to retrieve remote data, along with concurrent requests if enabled
+    if microbatch.is_enabled():
+        rate = microbatch.get_rate(source_currency, exchanged_currency)
+        if rate is not None:
+            return build_rate_convertion(
+                rate, current_date, source_currency, exchanged_currency, amount
+            )
+
     data, _ = get_exchange_convertion_data(
         source_currency=source_currency,
         exchanged_currency=exchanged_currency,
@@ -101,15 +337,140 @@ def get_exchange_convertion(
     data.pop("timestamp", None)  # Not showing timestamp
 
     # Saving new rate value in data base
-    new_rate_value = data["value"] / float(amount)
-    source_currency_obj = Currency.objects.get(code=source_currency)
-    exchanged_obj = Currency.objects.get(code=exchanged_currency)
+    save_convertion_rate(
+        data, source_currency, exchanged_currency, amount, current_date
+    )
+
+    # Rounding after storing the rate, which is derived from the exact value
+    data["value"] = money.round_amount(data["value"], exchanged_currency)
+    return data
+
 
-    CurrencyExchangeRate.objects.get_or_create(
-        source_currency=source_currency_obj,
-        exchanged_currency=exchanged_obj,
-        valuation_date=current_date,
-        defaults={"rate_value": new_rate_value},
+async def aget_exchange_convertion(
+    source_currency: str, exchanged_currency: str, amount: Decimal
+) -> dict:
+    """
+    Asynchronous version of `get_exchange_convertion`.
+    """
+    record_pair_usage(source_currency, exchanged_currency)
+    current_date = datetime.now().date()
+    # Serving the latest known rate while it's fresh enough
+    latest_rate = await aget_latest_rate(source_currency, exchanged_currency)
+    servable = is_servable(latest_rate, current_date)
+    metrics.record_cache_lookup(cache="latest_rate", hit=servable)
+    if servable:
+        return build_convertion(
+            latest_rate, source_currency, exchanged_currency, amount
+        )
+
+    # Checking if we have to retrieve remote data
+    db_rate = await get_convertion_rate_queryset(
+        source_currency, exchanged_currency, current_date
+    ).afirst()
+    metrics.record_cache_lookup(cache="convertion_db", hit=db_rate is not None)
+
+    if db_rate:
+        return build_convertion(db_rate, source_currency, exchanged_currency, amount)
+
+    # Serving the rate fetched by a previous request and not stored yet
+    pending_rate = write_behind.get_pending_rate(
+        source_currency, exchanged_currency, current_date
+    )
+    if pending_rate is not None:
+        return build_rate_convertion(
+            pending_rate, current_date, source_currency, exchanged_currency, amount
+        )
+
+    # We need to retrieve remote data, along with concurrent requests if enabled
+    if microbatch.is_enabled():
+        rate = await sync_to_async(microbatch.get_rate, thread_sensitive=False)(
+            source_currency, exchanged_currency
+        )
+        if rate is not None:
+            return build_rate_convertion(
+                rate, current_date, source_currency, exchanged_currency, amount
+            )
+
+    data, _ = await aget_exchange_convertion_data(
+        source_currency=source_currency,
+        exchanged_currency=exchanged_currency,
+        amount=amount,
     )
+    data.pop("timestamp", None)  # Not showing timestamp
 
+    # Saving new rate value in data base
+    await sync_to_async(save_convertion_rate)(
+        data, source_currency, exchanged_currency, amount, current_date
+    )
+
+    # Rounding after storing the rate, which is derived from the exact value
+    data["value"] = money.round_amount(data["value"], exchanged_currency)
     return data
+
+
+def get_historical_convertion(
+    source_currency: str,
+    exchanged_currency: str,
+    amount: Decimal,
+    valuation_date: date,
+    policy: Optional[str] = None,
+) -> dict:
+    """
+    Converts an amount at a past date with the stored rates of the pair, served
+    from its local series (see `history`). Dates without a rate are resolved with
+    a policy (RATES_HISTORY_POLICY by default).
+
+    The first time a date can't be resolved, the rates missing around it are
+    fetched from the provider.
+
+    Raises:
+        ValueError: If there's no rate for the date following the policy.
+    """
+    policy = policy or history.get_default_policy()
+    record_pair_usage(source_currency, exchanged_currency)
+    rate = history.get_rate_series(source_currency, exchanged_currency).get_rate(
+        valuation_date, policy
+    )
+    metrics.record_cache_lookup(cache="rate_series", hit=rate is not None)
+
+    if rate is None and not history.is_filled(source_currency, valuation_date):
+        # Filling every date a policy may use
+        max_gap = timedelta(days=history.get_max_gap_days())
+        fill_missing_rates(
+            source_currency,
+            valuation_date - max_gap,
+            min(valuation_date + max_gap, datetime.now().date()),
+        )
+        history.mark_filled(source_currency, valuation_date)
+        rate = history.get_rate_series(source_currency, exchanged_currency).get_rate(
+            valuation_date, policy
+        )
+
+    if rate is None:
+        raise ValueError(
+            "No {} to {} rate on {} with the {} policy".format(
+                source_currency, exchanged_currency, valuation_date, policy
+            )
+        )
+    return {
+        "date": valuation_date.strftime("%Y-%m-%d"),
+        "source_currency": source_currency,
+        "exchanged_currency": exchanged_currency,
+        "amount": amount,
+        "value": money.convert(amount, rate, exchanged_currency),
+    }
+
+
+async def aget_historical_convertion(
+    source_currency: str,
+    exchanged_currency: str,
+    amount: Decimal,
+    valuation_date: date,
+    policy: Optional[str] = None,
+) -> dict:
+    """
+    Asynchronous version of `get_historical_convertion`.
+    """
+    return await sync_to_async(get_historical_convertion)(
+        source_currency, exchanged_currency, amount, valuation_date, policy
+    )
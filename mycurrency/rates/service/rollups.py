@@ -0,0 +1,369 @@
+"""
+This module maintains the weekly and monthly rollups of the exchange rates
+(RateRollup): open, high, low, close, mean and standard deviation of every
+currency pair per period. The rollups of the periods `save_data` stores rates in
+are recomputed from the stored rates of those periods, so concurrent ingestions of
+the same rates can't count them twice, and can be rebuilt from the stored history.
+"""
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import QuerySet
+
+from ..domain.db import get_exchange_rate_model
+from ..models import CompactExchangeRate, Currency, RateRollup
+
+
+RATE_QUANTUM = Decimal("0.000001")
+BULK_BATCH_SIZE = 1000
+UPDATE_FIELDS = [
+    "open_date",
+    "open_value",
+    "close_date",
+    "close_value",
+    "high_value",
+    "low_value",
+    "count",
+    "sum",
+    "sum_squares",
+]
+
+# Updates of the rollups of a source currency must not interleave within a process
+_locks = defaultdict(threading.Lock)
+_locks_lock = threading.Lock()
+
+
+def get_lock(source_currency_id: int) -> threading.Lock:
+    with _locks_lock:
+        return _locks[source_currency_id]
+
+
+def get_period_start(valuation_date: date, resolution: str) -> date:
+    """
+    Returns the first day of the week (Monday) or month of a date.
+    """
+    if resolution == RateRollup.Resolution.WEEK:
+        return valuation_date - timedelta(days=valuation_date.weekday())
+    return valuation_date.replace(day=1)
+
+
+def get_period_end(valuation_date: date, resolution: str) -> date:
+    """
+    Returns the last day of the week (Sunday) or month of a date.
+    """
+    period_start = get_period_start(valuation_date, resolution)
+    if resolution == RateRollup.Resolution.WEEK:
+        return period_start + timedelta(days=6)
+    next_month = (period_start + timedelta(days=32)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def merge_rates(
+    rollup: Optional[RateRollup], key: tuple, day_rates: List[Tuple[date, Decimal]]
+) -> RateRollup:
+    """
+    Returns a new rollup merging the rates of some days into a stored rollup.
+    """
+    source_currency_id, exchanged_currency_id, resolution, period_start = key
+    day_rates.sort()
+    values = [value for _, value in day_rates]
+    merged = RateRollup(
+        source_currency_id=source_currency_id,
+        exchanged_currency_id=exchanged_currency_id,
+        resolution=resolution,
+        period_start=period_start,
+        open_date=day_rates[0][0],
+        open_value=values[0],
+        close_date=day_rates[-1][0],
+        close_value=values[-1],
+        high_value=max(values),
+        low_value=min(values),
+        count=len(values),
+        sum=sum(float(value) for value in values),
+        sum_squares=sum(float(value) ** 2 for value in values),
+    )
+    if rollup is None:
+        return merged
+
+    if rollup.open_date < merged.open_date:
+        merged.open_date, merged.open_value = rollup.open_date, rollup.open_value
+    if rollup.close_date > merged.close_date:
+        merged.close_date, merged.close_value = rollup.close_date, rollup.close_value
+    merged.high_value = max(merged.high_value, rollup.high_value)
+    merged.low_value = min(merged.low_value, rollup.low_value)
+    merged.count += rollup.count
+    merged.sum += rollup.sum
+    merged.sum_squares += rollup.sum_squares
+    return merged
+
+
+def update_rollups(
+    source_currency_id: int, rates: Dict[Tuple[int, date], float]
+) -> int:
+    """
+    Adds new daily rates of a source currency to its weekly and monthly rollups.
+    Rates must not have been added before, e.g. the history `rebuild_rollups` reads
+    after deleting the rollups.
+
+    Args:
+        source_currency_id (int): The source currency id.
+        rates (dict): Rates by (exchanged currency id, valuation date).
+
+    Returns:
+        int: The number of updated rollups.
+    """
+    if not rates:
+        return 0
+
+    groups = defaultdict(list)
+    for (exchanged_currency_id, valuation_date), rate in rates.items():
+        value = Decimal(str(rate)).quantize(RATE_QUANTUM)
+        for resolution in RateRollup.Resolution.values:
+            key = (
+                source_currency_id,
+                exchanged_currency_id,
+                resolution,
+                get_period_start(valuation_date, resolution),
+            )
+            groups[key].append((valuation_date, value))
+
+    period_starts = [key[3] for key in groups]
+    with get_lock(source_currency_id):
+        stored = {
+            (
+                rollup.source_currency_id,
+                rollup.exchanged_currency_id,
+                rollup.resolution,
+                rollup.period_start,
+            ): rollup
+            for rollup in RateRollup.objects.filter(
+                source_currency_id=source_currency_id,
+                exchanged_currency_id__in={key[1] for key in groups},
+                period_start__range=(min(period_starts), max(period_starts)),
+            )
+        }
+        RateRollup.objects.bulk_create(
+            [
+                merge_rates(stored.get(key), key, day_rates)
+                for key, day_rates in groups.items()
+            ],
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=[
+                "source_currency",
+                "resolution",
+                "period_start",
+                "exchanged_currency",
+            ],
+            update_fields=UPDATE_FIELDS,
+        )
+    return len(groups)
+
+
+def get_stored_values(history: QuerySet) -> List[Tuple[int, date, Decimal]]:
+    """
+    Returns the (exchanged currency id, valuation date, rate value) of stored rates.
+    """
+    if history.model is CompactExchangeRate:
+        return [
+            (
+                exchanged_currency_id,
+                valuation_date,
+                CompactExchangeRate(scaled_rate=value).rate_value,
+            )
+            for exchanged_currency_id, valuation_date, value in history.values_list(
+                "exchanged_currency_id", "valuation_date", "scaled_rate"
+            )
+        ]
+    return list(
+        history.values_list("exchanged_currency_id", "valuation_date", "rate_value")
+    )
+
+
+def refresh_rollups(source_currency_id: int, rates: Iterable[Tuple[int, date]]) -> int:
+    """
+    Recomputes, from the stored rates, the weekly and monthly rollups of the periods
+    containing some rates of a source currency, e.g. the rates `save_data` stored.
+
+    Args:
+        source_currency_id (int): The source currency id.
+        rates (Iterable): The (exchanged currency id, valuation date) of the rates.
+
+    Returns:
+        int: The number of updated rollups.
+    """
+    periods = {
+        (
+            source_currency_id,
+            exchanged_currency_id,
+            resolution,
+            get_period_start(valuation_date, resolution),
+        )
+        for exchanged_currency_id, valuation_date in rates
+        for resolution in RateRollup.Resolution.values
+    }
+    if not periods:
+        return 0
+
+    history = get_exchange_rate_model().objects.filter(
+        source_currency_id=source_currency_id,
+        exchanged_currency_id__in={key[1] for key in periods},
+        valuation_date__range=(
+            min(key[3] for key in periods),
+            max(get_period_end(key[3], key[2]) for key in periods),
+        ),
+    )
+    with get_lock(source_currency_id):
+        groups = defaultdict(list)
+        for exchanged_currency_id, valuation_date, value in get_stored_values(history):
+            value = Decimal(str(value)).quantize(RATE_QUANTUM)
+            for resolution in RateRollup.Resolution.values:
+                key = (
+                    source_currency_id,
+                    exchanged_currency_id,
+                    resolution,
+                    get_period_start(valuation_date, resolution),
+                )
+                if key in periods:
+                    groups[key].append((valuation_date, value))
+
+        RateRollup.objects.bulk_create(
+            [merge_rates(None, key, day_rates) for key, day_rates in groups.items()],
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=[
+                "source_currency",
+                "resolution",
+                "period_start",
+                "exchanged_currency",
+            ],
+            update_fields=UPDATE_FIELDS,
+        )
+    return len(groups)
+
+
+def rebuild_rollups(source_currency_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recomputes the rollups of some source currencies (all by default) from the
+    stored exchange rates, a year of history at a time.
+
+    Returns:
+        int: The number of aggregated daily rates.
+    """
+    if source_currency_ids is None:
+        source_currency_ids = Currency.objects.values_list("id", flat=True)
+
+    model = get_exchange_rate_model()
+    aggregated_rates = 0
+    for source_currency_id in list(source_currency_ids):
+        RateRollup.objects.filter(source_currency_id=source_currency_id).delete()
+        history = model.objects.filter(source_currency_id=source_currency_id)
+        years = history.dates("valuation_date", "year")
+        for year in years:
+            rates = {
+                (exchanged_currency_id, valuation_date): value
+                for exchanged_currency_id, valuation_date, value in get_stored_values(
+                    history.filter(valuation_date__year=year.year)
+                )
+            }
+            update_rollups(source_currency_id, rates)
+            aggregated_rates += len(rates)
+    return aggregated_rates
+
+
+def get_rollups_queryset(
+    source_currency: str, date_from: date, date_to: date, resolution: str
+) -> QuerySet:
+    """
+    Returns the rollups of the periods overlapping a date range as
+    (period_start, exchanged_currency_code, open, high, low, close, count, sum,
+    sum_squares) tuples.
+    """
+    return (
+        RateRollup.objects.filter(
+            source_currency__code=source_currency,
+            resolution=resolution,
+            period_start__range=(get_period_start(date_from, resolution), date_to),
+        )
+        .order_by("period_start", "exchanged_currency__code")
+        .values_list(
+            "period_start",
+            "exchanged_currency__code",
+            "open_value",
+            "high_value",
+            "low_value",
+            "close_value",
+            "count",
+            "sum",
+            "sum_squares",
+        )
+    )
+
+
+def group_rollups(source_currency: str, rollups: Iterable) -> dict:
+    """
+    Groups rollups by period start and currency pair, like the daily rates.
+    """
+    response = defaultdict(dict)
+    for (
+        period_start,
+        exchanged_currency_code,
+        open_value,
+        high_value,
+        low_value,
+        close_value,
+        count,
+        total,
+        sum_squares,
+    ) in rollups:
+        mean, stddev = RateRollup.get_statistics(count, total, sum_squares)
+        pair = "{}/{}".format(source_currency, exchanged_currency_code)
+        response[period_start.strftime("%Y-%m-%d")][pair] = {
+            "open": float(open_value),
+            "high": float(high_value),
+            "low": float(low_value),
+            "close": float(close_value),
+            "mean": mean,
+            "stddev": stddev,
+            "count": count,
+        }
+    return response
+
+
+def get_rollups_grouped_by_period_and_currency(
+    source_currency: str, date_from: date, date_to: date, resolution: str
+) -> dict:
+    """
+    Returns the rollups of the periods overlapping a date range, e.g.
+
+        {
+            "2025-03-01": {
+                "USD/EUR": {
+                    "open": 1.08, "high": 1.09, "low": 1.07, "close": 1.08,
+                    "mean": 1.081, "stddev": 0.004, "count": 31
+                },
+                ...
+            },
+            ...
+        }
+    """
+    rollups = get_rollups_queryset(source_currency, date_from, date_to, resolution)
+    return group_rollups(source_currency, rollups)
+
+
+async def aget_rollups_grouped_by_period_and_currency(
+    source_currency: str, date_from: date, date_to: date, resolution: str
+) -> dict:
+    """
+    Asynchronous version of `get_rollups_grouped_by_period_and_currency`.
+    """
+    rollups = [
+        rollup
+        async for rollup in get_rollups_queryset(
+            source_currency, date_from, date_to, resolution
+        )
+    ]
+    return group_rollups(source_currency, rollups)
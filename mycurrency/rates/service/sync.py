@@ -0,0 +1,149 @@
+"""
+This module proactively syncs the latest exchange rates of every source currency,
+so user requests find the rates in the database instead of waiting for a provider.
+
+Every sync fetches the rates from the watermark of a source currency (SyncWatermark,
+the most recent valuation date already synced) up to today, stores them with
+`save_data`, which also refreshes the latest rates, and moves the watermark
+forward. The current day is fetched again on every run, so its latest rates stay
+fresh.
+
+The sync doesn't warm the "rates" cache of the web workers, unless it's configured
+as a shared backend: with the default LocMemCache, the workers read the synced
+latest rates from the database once their cached ones expire
+(RATES_LATEST_CACHE_TIMEOUT), and warm themselves on startup (see `warmup`).
+
+Example:
+    python mycurrency/manage.py sync_latest_rates --loop
+"""
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..adapters.adapter_factory import get_exchange_rate_data
+from ..models import Currency, SyncWatermark
+from .common import save_data
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_sync_interval() -> int:
+    return getattr(settings, "RATES_SYNC_INTERVAL", 3600)
+
+
+def get_sync_date_from(watermark: SyncWatermark, today: date) -> date:
+    """
+    Returns the first date to sync: the watermark date, at most RATES_SYNC_MAX_DAYS
+    days ago. Older gaps are left to the requests needing them.
+    """
+    oldest_date = today - timedelta(days=getattr(settings, "RATES_SYNC_MAX_DAYS", 7))
+    if watermark.synced_until is None:
+        return oldest_date
+    return min(max(watermark.synced_until, oldest_date), today)
+
+
+def sync_source_currency(
+    source_currency: Currency, exchanged_currencies: Iterable[str], today: date
+) -> int:
+    """
+    Syncs the rates of a source currency since its watermark, recording the outcome
+    in the watermark.
+
+    Returns:
+        int: The number of new exchange rate rows.
+
+    Raises:
+        Exception: If the rates couldn't be fetched or stored.
+    """
+    watermark, _ = SyncWatermark.objects.get_or_create(source_currency=source_currency)
+    watermark.last_run_at = timezone.now()
+    date_from = get_sync_date_from(watermark, today)
+
+    try:
+        data, provider = get_exchange_rate_data(
+            source_currency=source_currency.code,
+            exchanged_currency=",".join(sorted(exchanged_currencies)),
+            date_from=date_from,
+            date_to=today,
+        )
+        rows = save_data(data=data, source_currency=source_currency.code)
+    except Exception as e:
+        watermark.last_error = str(e)
+        watermark.save(update_fields=["last_run_at", "last_error"])
+        metrics.record_sync(source_currency.code, success=False)
+        raise
+
+    if data:
+        synced_until = max(
+            key if isinstance(key, date) else date.fromisoformat(key) for key in data
+        )
+        watermark.synced_until = max(
+            synced_until, watermark.synced_until or synced_until
+        )
+    watermark.last_success_at = watermark.last_run_at
+    watermark.last_rows = rows
+    watermark.last_error = ""
+    watermark.save()
+    metrics.record_sync(source_currency.code, success=True)
+    logger.info(
+        "sync_source_currency: {} rates of {} from {} to {}".format(
+            rows, source_currency.code, date_from, today
+        )
+    )
+    return rows
+
+
+def sync_latest_rates(
+    source_currencies: Optional[Iterable[str]] = None, today: Optional[date] = None
+) -> Dict[str, Optional[int]]:
+    """
+    Syncs the latest rates of some source currencies (all by default) against all
+    the other currencies. A failing currency doesn't stop the others.
+
+    Returns:
+        dict: The number of new rows by source currency code, None on failure.
+    """
+    today = today or timezone.now().date()
+    currencies = Currency.objects.in_bulk(field_name="code")
+    codes = sorted(currencies) if source_currencies is None else source_currencies
+    sleep_time = getattr(settings, "RATES_SYNC_SLEEP_TIME", 0.2)
+
+    results = {}
+    for index, code in enumerate(codes):
+        if index:
+            # Spacing the provider calls out, like the batch processes
+            time.sleep(sleep_time)
+        try:
+            results[code] = sync_source_currency(
+                currencies[code], set(currencies) - {code}, today
+            )
+        except Exception as e:
+            logger.error(f"sync_latest_rates - Sync of {code} failed: {e}")
+            results[code] = None
+    return results
+
+
+def run_sync_worker(
+    interval: Optional[int] = None,
+    source_currencies: Optional[Iterable[str]] = None,
+    stop_event: Optional[threading.Event] = None,
+):
+    """
+    Runs `sync_latest_rates` every `interval` seconds (RATES_SYNC_INTERVAL by
+    default) until `stop_event` is set.
+    """
+    interval = get_sync_interval() if interval is None else interval
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        started = time.monotonic()
+        close_old_connections()
+        sync_latest_rates(source_currencies)
+        stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
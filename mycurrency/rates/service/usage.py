@@ -0,0 +1,112 @@
+"""
+This module tracks how often the currency pairs are converted (RatePairUsage), so
+the startup warm-up (see `warmup`) loads the most requested pairs first.
+
+Conversions are counted in memory and flushed to the database in batches, every
+RATES_USAGE_FLUSH_SIZE conversions or RATES_USAGE_FLUSH_INTERVAL seconds, from a
+background thread: the converter never waits for the flush.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import Currency, RatePairUsage
+
+
+logger = logging.getLogger(__name__)
+
+_pending = Counter()
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flushing = threading.Event()
+
+
+def tracking_enabled() -> bool:
+    return getattr(settings, "RATES_USAGE_TRACKING", True)
+
+
+def record_pair_usage(source_currency: str, exchanged_currency: str):
+    """
+    Counts a conversion of a currency pair, starting a background flush when due.
+    """
+    if not tracking_enabled():
+        return
+
+    with _lock:
+        _pending[(source_currency, exchanged_currency)] += 1
+        due = sum(_pending.values()) >= getattr(
+            settings, "RATES_USAGE_FLUSH_SIZE", 100
+        ) or time.monotonic() - _last_flush >= getattr(
+            settings, "RATES_USAGE_FLUSH_INTERVAL", 60
+        )
+    if due and not _flushing.is_set():
+        _flushing.set()
+        threading.Thread(target=flush_in_background, daemon=True).start()
+
+
+def take_pending() -> Counter:
+    global _last_flush
+    with _lock:
+        pending = _pending.copy()
+        _pending.clear()
+        _last_flush = time.monotonic()
+    return pending
+
+
+def flush_pair_usage() -> int:
+    """
+    Adds the pending conversion counts to RatePairUsage.
+
+    Returns:
+        int: The number of flushed pairs.
+    """
+    pending = take_pending()
+    if not pending:
+        return 0
+
+    currencies = Currency.objects.in_bulk(field_name="code")
+    now = timezone.now()
+    new_usages = []
+    for (source_currency, exchanged_currency), hits in pending.items():
+        if source_currency not in currencies or exchanged_currency not in currencies:
+            continue
+        pair = {
+            "source_currency": currencies[source_currency],
+            "exchanged_currency": currencies[exchanged_currency],
+        }
+        updated = RatePairUsage.objects.filter(**pair).update(
+            hits=F("hits") + hits, last_used_at=now
+        )
+        if not updated:
+            new_usages.append(RatePairUsage(hits=hits, last_used_at=now, **pair))
+    RatePairUsage.objects.bulk_create(new_usages, ignore_conflicts=True)
+    return len(pending)
+
+
+def flush_in_background():
+    try:
+        flush_pair_usage()
+    except Exception as e:
+        logger.error(f"flush_pair_usage - An error occurred: {e}")
+    finally:
+        connections.close_all()
+        _flushing.clear()
+
+
+def get_top_pairs(limit: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Returns the (source currency id, exchanged currency id) of the `limit` most
+    converted pairs.
+    """
+    return tuple(
+        RatePairUsage.objects.order_by("-hits").values_list(
+            "source_currency_id", "exchanged_currency_id"
+        )[:limit]
+    )
@@ -0,0 +1,140 @@
+"""
+This module warms up a worker before it serves requests: it loads the currency
+registry and the latest rates of the most converted pairs (see `usage`) into the
+local "rates" cache, and opens the connections to the current provider.
+
+The warm-up is bounded by a time budget (RATES_WARMUP_BUDGET seconds): steps left
+when it runs out are skipped. It runs in a background thread on startup when
+RATES_WARMUP_ON_STARTUP is set, or with `manage.py warm_up`.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+
+from ..adapters.adapter_factory import get_adapter, get_provider
+from ..models import LatestExchangeRate
+from . import metrics
+from .currencies import CURRENCY_CODES_CACHE_KEY, get_currency_codes
+from .latest import get_cache, get_cache_key, get_cache_timeout
+from .usage import get_top_pairs
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_warm_up_budget() -> float:
+    return getattr(settings, "RATES_WARMUP_BUDGET", 5.0)
+
+
+def load_currency_registry(timeout: float) -> int:
+    get_cache().delete(CURRENCY_CODES_CACHE_KEY)
+    return len(get_currency_codes())
+
+
+def load_latest_rates(timeout: float) -> int:
+    """
+    Caches the latest rates of the most converted pairs.
+    """
+    top_pairs = set(get_top_pairs(getattr(settings, "RATES_WARMUP_TOP_PAIRS", 50)))
+    if not top_pairs:
+        return 0
+
+    latest_rates = LatestExchangeRate.objects.select_related(
+        "source_currency", "exchanged_currency"
+    ).filter(
+        source_currency_id__in={pair[0] for pair in top_pairs},
+        exchanged_currency_id__in={pair[1] for pair in top_pairs},
+    )
+    cached_rates = {
+        get_cache_key(
+            latest_rate.source_currency.code, latest_rate.exchanged_currency.code
+        ): latest_rate
+        for latest_rate in latest_rates
+        if (latest_rate.source_currency_id, latest_rate.exchanged_currency_id)
+        in top_pairs
+    }
+    get_cache().set_many(cached_rates, get_cache_timeout())
+    return len(cached_rates)
+
+
+def prime_provider(timeout: float) -> int:
+    """
+    Opens the connections to the current provider.
+    """
+    get_adapter(get_provider()).warm_up(timeout=timeout)
+    return 1
+
+
+WARM_UP_STEPS = (
+    ("currencies", load_currency_registry),
+    ("latest_rates", load_latest_rates),
+    ("provider", prime_provider),
+)
+
+
+def warm_up(budget: Optional[float] = None) -> dict:
+    """
+    Runs the warm-up steps until the time budget runs out. A failing step doesn't
+    stop the next ones.
+
+    Returns:
+        dict: The items loaded and the seconds spent by step, the skipped and
+            failed steps and the total seconds.
+    """
+    budget = get_warm_up_budget() if budget is None else budget
+    start = time.perf_counter()
+    report = {"steps": {}, "skipped": [], "failed": []}
+    for name, step in WARM_UP_STEPS:
+        remaining = budget - (time.perf_counter() - start)
+        if remaining <= 0:
+            report["skipped"].append(name)
+            continue
+
+        step_start = time.perf_counter()
+        try:
+            items = step(timeout=remaining)
+        except Exception as e:
+            logger.warning(f"warm_up - Step {name} failed: {e}")
+            report["failed"].append(name)
+            continue
+        seconds = time.perf_counter() - step_start
+        report["steps"][name] = {"items": items, "seconds": seconds}
+        metrics.record_warm_up_step(name, seconds)
+
+    report["seconds"] = time.perf_counter() - start
+    logger.info(
+        "warm_up: done in {:.3f}s, steps {}, skipped {}, failed {}".format(
+            report["seconds"],
+            ", ".join(report["steps"]) or "none",
+            ", ".join(report["skipped"]) or "none",
+            ", ".join(report["failed"]) or "none",
+        )
+    )
+    return report
+
+
+def run_startup_warm_up():
+    try:
+        # Started from RatesConfig.ready, the app registry may still be loading
+        deadline = time.monotonic() + get_warm_up_budget()
+        while not apps.ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        warm_up(budget=deadline - time.monotonic())
+    finally:
+        connections.close_all()
+
+
+def start_startup_warm_up():
+    """
+    Warms up the worker in a background thread, when RATES_WARMUP_ON_STARTUP is set.
+    """
+    if not getattr(settings, "RATES_WARMUP_ON_STARTUP", False):
+        return None
+    thread = threading.Thread(target=run_startup_warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
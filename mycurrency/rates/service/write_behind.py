@@ -0,0 +1,366 @@
+"""
+This module takes the storage of the rates fetched while serving a request off the
+request path: the rates are queued, served from memory meanwhile, and stored with
+`save_data` by a background thread every RATES_WRITE_BEHIND_FLUSH_INTERVAL seconds.
+Enabled with RATES_WRITE_BEHIND_ENABLED.
+
+Reads stay consistent: the queued rates overlay the stored ones (see
+`get_pending_rates`) until they are flushed, and their dates are not fetched again.
+
+The queue holds at most RATES_WRITE_BEHIND_MAX_QUEUE batches of rates; beyond that,
+rates are stored right away. Every queued batch is first appended to a journal,
+a file per process in RATES_WRITE_BEHIND_JOURNAL_DIR, and the journal is rewritten
+with the batches left after every flush. The journals of the processes that died
+with queued rates are replayed by the next process queueing rates.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from . import metrics, money
+from .common import save_data
+
+
+logger = logging.getLogger(__name__)
+
+# Queued (source currency, {valuation date: {currency: rate}}) batches, in order
+_pending = []
+# Queued rates by source currency, valuation date and currency
+_overlay = defaultdict(lambda: defaultdict(dict))
+_lock = threading.Lock()
+# Held while flushing, so the batches are stored by one thread at a time
+_flush_lock = threading.Lock()
+# Held while starting the flushing thread, never while flushing
+_start_lock = threading.Lock()
+_worker = None
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "RATES_WRITE_BEHIND_ENABLED", False)
+
+
+def get_journal_dir() -> str:
+    return str(
+        getattr(
+            settings,
+            "RATES_WRITE_BEHIND_JOURNAL_DIR",
+            os.path.join(settings.BASE_DIR, "write_behind"),
+        )
+    )
+
+
+def get_journal_path(pid: Optional[int] = None) -> str:
+    return os.path.join(get_journal_dir(), "{}.journal".format(pid or os.getpid()))
+
+
+def normalize(data: dict) -> Dict[str, Dict[str, str]]:
+    """
+    Returns rates grouped by date in the form stored in the journal, with ISO dates
+    and exact rates as strings.
+    """
+    return {
+        (
+            valuation_date.isoformat()
+            if isinstance(valuation_date, date)
+            else valuation_date
+        ): {
+            currency: str(rate)
+            for currency, rate in currency_data.items()
+            if rate is not None
+        }
+        for valuation_date, currency_data in data.items()
+    }
+
+
+def add_to_overlay(source_currency: str, data: Dict[str, Dict[str, str]]):
+    for valuation_date, currency_data in data.items():
+        _overlay[source_currency][date.fromisoformat(valuation_date)].update(
+            {
+                currency: money.to_decimal(rate)
+                for currency, rate in currency_data.items()
+            }
+        )
+
+
+def write_journal(path: str, lines: List[str], mode: str):
+    with open(path, mode, encoding="utf-8") as journal:
+        journal.writelines(lines)
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def dump_batch(source_currency: str, data: dict) -> str:
+    return json.dumps({"source_currency": source_currency, "data": data}) + "\n"
+
+
+def rewrite_journal():
+    """
+    Replaces the journal of the process with the queued batches. Must be called
+    holding `_lock`.
+    """
+    path = get_journal_path()
+    if not _pending:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    write_journal(path + ".tmp", [dump_batch(*batch) for batch in _pending], mode="w")
+    os.replace(path + ".tmp", path)
+
+
+def read_journal(path: str) -> List[tuple]:
+    """
+    Returns the batches of a journal, skipping a line cut by a crash.
+    """
+    batches = []
+    with open(path, encoding="utf-8") as journal:
+        for line in journal:
+            try:
+                batch = json.loads(line)
+                batches.append((batch["source_currency"], batch["data"]))
+            except (ValueError, KeyError, TypeError):
+                logger.error(f"WriteBehind - Skipping invalid journal line: {line!r}")
+    return batches
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def recover_journals() -> int:
+    """
+    Queues the batches of the journals left by dead processes (or by a previous
+    process with the same pid), then deletes those journals.
+
+    Returns:
+        int: The number of recovered batches.
+    """
+    journal_dir = get_journal_dir()
+    os.makedirs(journal_dir, exist_ok=True)
+    recovered = 0
+    for name in sorted(os.listdir(journal_dir)):
+        pid, _, extension = name.partition(".")
+        if extension != "journal" or not pid.isdigit():
+            continue
+        if int(pid) != os.getpid() and is_alive(int(pid)):
+            continue
+        path = os.path.join(journal_dir, name)
+        batches = read_journal(path)
+        with _lock:
+            for source_currency, data in batches:
+                _pending.append((source_currency, data))
+                add_to_overlay(source_currency, data)
+            rewrite_journal()
+        if int(pid) != os.getpid():
+            os.remove(path)
+        recovered += len(batches)
+    if recovered:
+        logger.warning(f"WriteBehind - Recovered {recovered} batches from journals")
+    return recovered
+
+
+def start_worker():
+    """
+    Recovers the journals and starts the flushing thread, once per process.
+    """
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _start_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        recover_journals()
+        _worker = threading.Thread(
+            target=run_worker, name="rates-write-behind", daemon=True
+        )
+        _worker.start()
+
+
+def run_worker():
+    interval = getattr(settings, "RATES_WRITE_BEHIND_FLUSH_INTERVAL", 0.5)
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"WriteBehind - Flushing failed: {e}")
+
+
+def store_rates(data: dict, source_currency: str) -> int:
+    """
+    Queues rates grouped by date to be stored by the background thread, or stores
+    them right away with `save_data` when the write-behind is disabled or its
+    queue is full.
+
+    Returns:
+        int: The number of queued rates, or of new rows when stored right away.
+    """
+    if not is_enabled():
+        return save_data(data=data, source_currency=source_currency)
+
+    data = {
+        valuation_date: currency_data
+        for valuation_date, currency_data in normalize(data).items()
+        if currency_data
+    }
+    if not data:
+        return 0
+
+    start_worker()
+    with _lock:
+        queued = len(_pending) < getattr(settings, "RATES_WRITE_BEHIND_MAX_QUEUE", 1000)
+        if queued:
+            os.makedirs(get_journal_dir(), exist_ok=True)
+            write_journal(
+                get_journal_path(), [dump_batch(source_currency, data)], mode="a"
+            )
+            _pending.append((source_currency, data))
+            add_to_overlay(source_currency, data)
+            depth = len(_pending)
+    if not queued:
+        logger.warning("WriteBehind - Queue full, storing the rates right away")
+        return save_data(data=data, source_currency=source_currency)
+
+    metrics.record_write_behind_queue(depth)
+    return sum(len(currency_data) for currency_data in data.values())
+
+
+def flush() -> int:
+    """
+    Stores the queued batches, merged by source currency, then removes them from
+    the queue, the overlay and the journal. Batches failing to be stored stay
+    queued and are retried on the next flush.
+
+    Returns:
+        int: The number of new exchange rate rows.
+    """
+    with _flush_lock:
+        with _lock:
+            batches = list(_pending)
+        if not batches:
+            return 0
+
+        merged = defaultdict(lambda: defaultdict(dict))
+        for source_currency, data in batches:
+            for valuation_date, currency_data in data.items():
+                merged[source_currency][valuation_date].update(currency_data)
+        try:
+            created_rows = sum(
+                save_data(
+                    data={
+                        valuation_date: {
+                            currency: money.to_decimal(rate)
+                            for currency, rate in currency_data.items()
+                        }
+                        for valuation_date, currency_data in data.items()
+                    },
+                    source_currency=source_currency,
+                )
+                for source_currency, data in merged.items()
+            )
+        except Exception:
+            metrics.record_write_behind_flush(success=False)
+            raise
+
+        with _lock:
+            del _pending[: len(batches)]
+            _overlay.clear()
+            for source_currency, data in _pending:
+                add_to_overlay(source_currency, data)
+            rewrite_journal()
+            depth = len(_pending)
+        metrics.record_write_behind_flush(success=True)
+        metrics.record_write_behind_queue(depth)
+        return created_rows
+
+
+def get_pending_rates(
+    source_currency: str, date_from: date, date_to: date
+) -> Dict[date, Dict[str, Decimal]]:
+    """
+    Returns the queued rates of a source currency between two dates.
+    """
+    with _lock:
+        return {
+            valuation_date: dict(rates)
+            for valuation_date, rates in _overlay.get(source_currency, {}).items()
+            if date_from <= valuation_date <= date_to
+        }
+
+
+def get_pending_rate(
+    source_currency: str, exchanged_currency: str, valuation_date: date
+) -> Optional[Decimal]:
+    with _lock:
+        return (
+            _overlay.get(source_currency, {})
+            .get(valuation_date, {})
+            .get(exchanged_currency)
+        )
+
+
+def exclude_pending_dates(
+    source_currency: str, subsets: List[List[date]]
+) -> List[List[date]]:
+    """
+    Removes the dates with queued rates from groups of consecutive missing dates
+    (see `get_missing_rate_dates`), splitting the groups where needed.
+    """
+    with _lock:
+        pending_dates = set(_overlay.get(source_currency, {}))
+    if not pending_dates:
+        return subsets
+
+    response = []
+    for subset in subsets:
+        current_subset = []
+        for valuation_date in subset:
+            if valuation_date in pending_dates:
+                if current_subset:
+                    response.append(current_subset)
+                current_subset = []
+            else:
+                current_subset.append(valuation_date)
+        if current_subset:
+            response.append(current_subset)
+    return response
+
+
+def overlay_grouped_rates(
+    grouped_rates: dict,
+    source_currency: str,
+    pending_rates: Dict[date, Dict[str, Decimal]],
+) -> dict:
+    """
+    Adds queued rates (see `get_pending_rates`) to rates grouped by date and
+    currency pair (see `get_exchange_rates_grouped_by_date_and_currency`), keeping
+    the dates sorted.
+
+    The queued rates must be read before the stored ones: a flush in between
+    stores them and removes them from the queue, so they would be in neither.
+    """
+    if not pending_rates:
+        return grouped_rates
+
+    for valuation_date, rates in pending_rates.items():
+        day_rates = grouped_rates.setdefault(valuation_date.strftime("%Y-%m-%d"), {})
+        for currency, rate in rates.items():
+            day_rates["{}/{}".format(source_currency, currency)] = float(rate)
+    return dict(sorted(grouped_rates.items()))
+
+
+atexit.register(lambda: flush() if _pending else None)
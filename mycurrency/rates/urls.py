@@ -2,29 +2,54 @@ from django.conf import settings
 from django.urls import re_path, path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
+    AsyncCurrencyConverterView,
+    AsyncCurrencyRateView,
+    AsyncFastCurrencyConverterView,
+    AsyncFastCurrencyRateView,
     CurrencyConverterView,
     CurrencyHistoryRateView,
+    CurrencyLedgerView,
     CurrencyRateView,
     CurrencyViewSet,
+    FastCurrencyConverterView,
+    FastCurrencyRateView,
     VersionView,
     Converter,
+    MetricsView,
 )
 
 router = DefaultRouter()
 router.register(r"currency", CurrencyViewSet, basename="currency")
 
 version = f'v{settings.PROJECT_VERSION.split(".")[0]}'
+
+# Served by an ASGI server, the asynchronous views don't block a thread on I/O
+if settings.RATES_ASYNC_VIEWS and settings.RATES_FAST_VIEWS:
+    rate_view = AsyncFastCurrencyRateView
+    converter_view = AsyncFastCurrencyConverterView
+elif settings.RATES_ASYNC_VIEWS:
+    rate_view, converter_view = AsyncCurrencyRateView, AsyncCurrencyConverterView
+elif settings.RATES_FAST_VIEWS:
+    rate_view, converter_view = FastCurrencyRateView, FastCurrencyConverterView
+else:
+    rate_view, converter_view = CurrencyRateView, CurrencyConverterView
+
 urlpatterns = [
     re_path(
         r"^(?P<version>(v1|v2))/currency-rates/$",
-        CurrencyRateView.as_view(),
+        rate_view.as_view(),
         name="currency-rates",
     ),
     re_path(
         r"^(?P<version>(v1|v2))/currency-converter/",
-        CurrencyConverterView.as_view(),
+        converter_view.as_view(),
         name="currency-converter",
     ),
+    re_path(
+        r"^(?P<version>(v1|v2))/currency-ledger/$",
+        CurrencyLedgerView.as_view(),
+        name="currency-ledger",
+    ),
     path("", include(router.urls)),
     path("version/", VersionView.as_view(), name="version"),
     re_path(
@@ -33,4 +58,5 @@ urlpatterns = [
         name="currency-history-rates",
     ),
     path("converter/", Converter, name="converter"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
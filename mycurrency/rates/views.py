@@ -1,22 +1,53 @@
+import codecs
+from datetime import date, datetime
 from decimal import Decimal
+import hashlib
 import logging
-from asgiref.sync import sync_to_async
 from adrf.views import APIView
 from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views import View
 from rest_framework.response import Response
 from rest_framework import serializers, status, viewsets
 
 from .adapters.serializers import CurrencySerializer
+from .domain.db import aget_exchange_rates_state, get_exchange_rates_state
 from .lib.utils import validate_date
-from .models import Currency
-from .service.rater import get_exchange_rates, get_exchange_convertion
-from .service.batch_processor import batch_process
+from .models import Currency, RateRollup
+from .renderers import dumps
+from .service.rater import (
+    aget_exchange_convertion,
+    aget_exchange_rate_rollups,
+    aget_exchange_rates,
+    aget_historical_convertion,
+    get_exchange_convertion,
+    get_exchange_rate_rollups,
+    get_exchange_rates,
+    get_historical_convertion,
+    get_rollup_range,
+)
+from .service.batch_processor import batch_backfill, batch_process
+from .service.currencies import aget_currency_codes, get_currency_codes
+from .service.history import POLICIES
+from .service.ledger import (
+    CONTENT_TYPES,
+    CSV_FORMAT,
+    NDJSON_FORMAT,
+    convert_ledger,
+    read_ledger,
+    write_ledger,
+)
+from .service import metrics
 from .forms import CurrencyConverterForm
 
 
 logger = logging.getLogger(__name__)
 
+DAILY_RESOLUTION = "day"
+
 
 class CurrencyConversionQuerySerializer(serializers.Serializer):
     source_currency = serializers.CharField(required=True, max_length=3)
@@ -24,116 +55,542 @@ class CurrencyConversionQuerySerializer(serializers.Serializer):
     amount = serializers.DecimalField(
         required=True, max_digits=12, decimal_places=2, min_value=Decimal("0.01")
     )
+    # Converting at a past date, with a policy for the dates without a rate
+    date = serializers.DateField(required=False)
+    policy = serializers.ChoiceField(choices=POLICIES, required=False)
 
+    def validate_date(self, value):
+        if value > datetime.now().date():
+            raise serializers.ValidationError("Ensure this date is not in the future.")
+        return value
 
-class CurrencyConverterView(APIView):
-    """
-    API View to retrieve real time currency convertion for an specific amount.
-    """
 
-    def get(self, request, **kwargs):
-        version = kwargs.get("version")
-        data = request.query_params.copy()
-        if "amount" in data:
-            try:
-                data["amount"] = float(data["amount"])
-            except Exception:
-                data["amount"] = ""
+def is_historical_convertion(validated_data) -> bool:
+    return validated_data.get("date", datetime.now().date()) < datetime.now().date()
 
-        serializer = CurrencyConversionQuerySerializer(data=data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        validated_data = serializer.validated_data
-        source_currency = validated_data["source_currency"]
-        exchanged_currency = validated_data["exchanged_currency"]
-        amount = validated_data["amount"]
+def get_valid_currencies() -> set:
+    return get_currency_codes()
 
-        logger.info(
-            "Currency Convertion {} requested for {}, from {} to {}".format(
-                version, source_currency, exchanged_currency, amount
-            )
-        )
 
-        # - retrieve all currencies and check if source_currency exists
-        valid_currencies = set(Currency.objects.values_list("code", flat=True))
-        if source_currency not in valid_currencies:
-            return Response(
-                {"error": f"Invalid source_currency: {source_currency}"},
+async def aget_valid_currencies() -> set:
+    return await aget_currency_codes()
+
+
+def validate_convertion_query(query_params, valid_currencies: set):
+    """
+    Validates the currency converter query parameters.
+
+    Returns:
+        tuple: The validated data and None, or None and an error Response.
+    """
+    # The amount stays a string: the DecimalField parses it exactly
+    serializer = CurrencyConversionQuerySerializer(data=query_params)
+    if not serializer.is_valid():
+        return None, Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    validated_data = serializer.validated_data
+    # - check if source_currency and exchanged_currency exist
+    for field in ("source_currency", "exchanged_currency"):
+        if validated_data[field] not in valid_currencies:
+            return None, Response(
+                {"error": f"Invalid {field}: {validated_data[field]}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+    return validated_data, None
 
-        if exchanged_currency not in valid_currencies:
-            return Response(
-                {"error": f"Invalid exchanged_currency: {exchanged_currency}"},
+
+def validate_rates_query(
+    source_currency: str, date_from: str, date_to: str, valid_currencies: set
+):
+    """
+    Validates the currency rates query parameters.
+
+    Returns:
+        tuple: The parsed date_from and date_to and None, or None, None and an
+            error Response.
+    """
+    if source_currency not in valid_currencies:
+        return (
+            None,
+            None,
+            Response(
+                {"error": f"Invalid source_currency: {source_currency}"},
                 status=status.HTTP_400_BAD_REQUEST,
-            )
+            ),
+        )
+    # - check dates format to be "%Y-%m-%d"
+    date_from_parsed, error_response = validate_date(
+        date_str=date_from, field_name="date_from"
+    )
+    if error_response:
+        return None, None, error_response
 
-        try:
+    date_to_parsed, error_response = validate_date(
+        date_str=date_to, field_name="date_to"
+    )
+    if error_response:
+        return None, None, error_response
+
+    if date_from_parsed > date_to_parsed:
+        return (
+            None,
+            None,
+            Response(
+                {"error": "Invalid date range"}, status=status.HTTP_400_BAD_REQUEST
+            ),
+        )
+    return date_from_parsed, date_to_parsed, None
+
+
+def validate_resolution(resolution: str):
+    """
+    Validates the resolution of the currency rates: daily rates, or weekly or
+    monthly rollups.
+
+    Returns:
+        Response: An error Response, or None.
+    """
+    if (
+        resolution != DAILY_RESOLUTION
+        and resolution not in RateRollup.Resolution.values
+    ):
+        return Response(
+            {"error": f"Invalid resolution: {resolution}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return None
+
+
+def get_rates_range(date_from: date, date_to: date, resolution: str) -> tuple:
+    """
+    Returns the date range of the daily rates a currency rates response is built
+    from: the whole periods overlapping the requested range for the rollups.
+    """
+    if resolution == DAILY_RESOLUTION:
+        return date_from, date_to
+    return get_rollup_range(date_from, date_to, resolution)
+
+
+def build_rates_validators(state: dict, *query) -> tuple:
+    """
+    Builds the ETag and the Last-Modified timestamp of a currency rates response
+    from the state of its stored rates (see `get_exchange_rates_state`) and its
+    query parameters.
+
+    Returns:
+        tuple: The ETag and the Last-Modified timestamp, or None without rates.
+    """
+    ingested_at = state["ingested_at"]
+    fingerprint = ":".join(
+        [str(value) for value in query]
+        + [str(state["count"]), ingested_at.isoformat() if ingested_at else ""]
+    )
+    etag = quote_etag(hashlib.sha256(fingerprint.encode()).hexdigest()[:32])
+    return etag, int(ingested_at.timestamp()) if ingested_at else None
+
+
+def count_response_rates(rate_values: dict, resolution: str) -> int:
+    """
+    Returns the number of daily rates a currency rates response is built from, to
+    compare with the state of the stored rates.
+    """
+    if resolution == DAILY_RESOLUTION:
+        return sum(len(pairs) for pairs in rate_values.values())
+    return sum(
+        rollup["count"] for pairs in rate_values.values() for rollup in pairs.values()
+    )
+
+
+def set_rates_cache_headers(response, etag: str, last_modified, closed: bool):
+    """
+    Sets the validators and the Cache-Control of a currency rates response: the
+    rates of a range ending in the past don't change, so they can be cached for
+    RATES_PAST_RANGE_MAX_AGE seconds.
+    """
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    if closed:
+        max_age = getattr(settings, "RATES_PAST_RANGE_MAX_AGE", 30 * 86400)
+    else:
+        max_age = getattr(settings, "RATES_CURRENT_RANGE_MAX_AGE", 0)
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def currency_convertion_response(request, version: str):
+    """
+    Validates a currency converter request and converts the amount.
+    """
+    # - retrieve all currencies to check if the requested ones exist
+    validated_data, error_response = validate_convertion_query(
+        request.GET, get_valid_currencies()
+    )
+    if error_response:
+        return error_response
+
+    source_currency = validated_data["source_currency"]
+    exchanged_currency = validated_data["exchanged_currency"]
+    amount = validated_data["amount"]
+
+    logger.info(
+        "Currency Convertion {} requested for {}, from {} to {}".format(
+            version, source_currency, exchanged_currency, amount
+        )
+    )
+
+    try:
+        if is_historical_convertion(validated_data):
+            convertion_rate = get_historical_convertion(
+                source_currency=source_currency,
+                exchanged_currency=exchanged_currency,
+                amount=amount,
+                valuation_date=validated_data["date"],
+                policy=validated_data.get("policy"),
+            )
+        else:
             convertion_rate = get_exchange_convertion(
                 source_currency=source_currency,
                 exchanged_currency=exchanged_currency,
                 amount=amount,
             )
-            return Response(convertion_rate, status=status.HTTP_200_OK)
+        return Response(convertion_rate, status=status.HTTP_200_OK)
 
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CurrencyRateView(APIView):
+async def acurrency_convertion_response(request, version: str):
     """
-    API View to retrieve currency rates for a particular time range.
+    Asynchronous version of `currency_convertion_response`.
     """
+    validated_data, error_response = validate_convertion_query(
+        request.GET, await aget_valid_currencies()
+    )
+    if error_response:
+        return error_response
 
-    def get(self, request, **kwargs):
-        version = kwargs.get("version")
-        source_currency = request.GET.get("source_currency")
-        date_from = request.GET.get("date_from")
-        date_to = request.GET.get("date_to")
-        logger.info(
-            "Currency Rates {} requested for {}, from {} to {}".format(
-                version, source_currency, date_from, date_to
-            )
+    source_currency = validated_data["source_currency"]
+    exchanged_currency = validated_data["exchanged_currency"]
+    amount = validated_data["amount"]
+
+    logger.info(
+        "Currency Convertion {} requested for {}, from {} to {}".format(
+            version, source_currency, exchanged_currency, amount
         )
+    )
 
-        # - retrieve all currencies and check if source_currency exists
-        valid_currencies = set(Currency.objects.values_list("code", flat=True))
-        if source_currency not in valid_currencies:
-            return Response(
-                {"error": f"Invalid source_currency: {source_currency}"},
-                status=status.HTTP_400_BAD_REQUEST,
+    try:
+        if is_historical_convertion(validated_data):
+            convertion_rate = await aget_historical_convertion(
+                source_currency=source_currency,
+                exchanged_currency=exchanged_currency,
+                amount=amount,
+                valuation_date=validated_data["date"],
+                policy=validated_data.get("policy"),
             )
-        # - check dates format to be "%Y-%m-%d"
-        date_from_parsed, error_response = validate_date(
-            date_str=date_from, field_name="date_from"
+        else:
+            convertion_rate = await aget_exchange_convertion(
+                source_currency=source_currency,
+                exchanged_currency=exchanged_currency,
+                amount=amount,
+            )
+        return Response(convertion_rate, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def currency_rates_response(request, version: str):
+    """
+    Validates a currency rates request and builds its response, or a 304 when the
+    client's copy of a past range is current.
+    """
+    source_currency = request.GET.get("source_currency")
+    date_from = request.GET.get("date_from")
+    date_to = request.GET.get("date_to")
+    logger.info(
+        "Currency Rates {} requested for {}, from {} to {}".format(
+            version, source_currency, date_from, date_to
         )
-        if error_response:
-            return error_response
+    )
 
-        date_to_parsed, error_response = validate_date(
-            date_str=date_to, field_name="date_to"
+    # - retrieve all currencies and check if source_currency exists
+    date_from_parsed, date_to_parsed, error_response = validate_rates_query(
+        source_currency, date_from, date_to, get_valid_currencies()
+    )
+    if error_response:
+        return error_response
+
+    resolution = request.GET.get("resolution", DAILY_RESOLUTION)
+    error_response = validate_resolution(resolution)
+    if error_response:
+        return error_response
+
+    # Ranges ending in the past are answered with a 304 when the client's copy
+    # is current, without filling their gaps again
+    query = (source_currency, date_from_parsed, date_to_parsed, resolution)
+    rates_range = get_rates_range(date_from_parsed, date_to_parsed, resolution)
+    closed = rates_range[1] < datetime.now().date()
+    state = None
+    if closed:
+        state = get_exchange_rates_state(source_currency, *rates_range)
+        etag, last_modified = build_rates_validators(state, *query)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
         )
-        if error_response:
-            return error_response
+        if response is not None:
+            return set_rates_cache_headers(response, etag, last_modified, closed)
 
-        if date_from_parsed > date_to_parsed:
-            return Response(
-                {"error": "Invalid date range"}, status=status.HTTP_400_BAD_REQUEST
+    try:
+        if resolution == DAILY_RESOLUTION:
+            rate_values = get_exchange_rates(
+                source_currency=source_currency,
+                date_from=date_from_parsed,
+                date_to=date_to_parsed,
+            )
+        else:
+            rate_values = get_exchange_rate_rollups(
+                source_currency=source_currency,
+                date_from=date_from_parsed,
+                date_to=date_to_parsed,
+                resolution=resolution,
             )
+        response_rates = count_response_rates(rate_values, resolution)
+        if state is None or state["count"] != response_rates:
+            # Gaps were filled, the validators must describe the rates served
+            state = get_exchange_rates_state(source_currency, *rates_range)
+            etag, last_modified = build_rates_validators(state, *query)
+            # Rates not stored yet (see write_behind) can't be cached for long
+            closed = closed and state["count"] == response_rates
+
+        # serializer = CurrencyExchangeRateSerializer(rate_values, many=True)
+        return set_rates_cache_headers(
+            Response(rate_values, status=status.HTTP_200_OK),
+            etag,
+            last_modified,
+            closed,
+        )
 
-        try:
-            rate_values = get_exchange_rates(
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+async def acurrency_rates_response(request, version: str):
+    """
+    Asynchronous version of `currency_rates_response`.
+    """
+    source_currency = request.GET.get("source_currency")
+    date_from = request.GET.get("date_from")
+    date_to = request.GET.get("date_to")
+    logger.info(
+        "Currency Rates {} requested for {}, from {} to {}".format(
+            version, source_currency, date_from, date_to
+        )
+    )
+
+    date_from_parsed, date_to_parsed, error_response = validate_rates_query(
+        source_currency, date_from, date_to, await aget_valid_currencies()
+    )
+    if error_response:
+        return error_response
+
+    resolution = request.GET.get("resolution", DAILY_RESOLUTION)
+    error_response = validate_resolution(resolution)
+    if error_response:
+        return error_response
+
+    query = (source_currency, date_from_parsed, date_to_parsed, resolution)
+    rates_range = get_rates_range(date_from_parsed, date_to_parsed, resolution)
+    closed = rates_range[1] < datetime.now().date()
+    state = None
+    if closed:
+        state = await aget_exchange_rates_state(source_currency, *rates_range)
+        etag, last_modified = build_rates_validators(state, *query)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return set_rates_cache_headers(response, etag, last_modified, closed)
+
+    try:
+        if resolution == DAILY_RESOLUTION:
+            rate_values = await aget_exchange_rates(
+                source_currency=source_currency,
+                date_from=date_from_parsed,
+                date_to=date_to_parsed,
+            )
+        else:
+            rate_values = await aget_exchange_rate_rollups(
                 source_currency=source_currency,
                 date_from=date_from_parsed,
                 date_to=date_to_parsed,
+                resolution=resolution,
             )
+        response_rates = count_response_rates(rate_values, resolution)
+        if state is None or state["count"] != response_rates:
+            # Gaps were filled, the validators must describe the rates served
+            state = await aget_exchange_rates_state(source_currency, *rates_range)
+            etag, last_modified = build_rates_validators(state, *query)
+            # Rates not stored yet (see write_behind) can't be cached for long
+            closed = closed and state["count"] == response_rates
+        return set_rates_cache_headers(
+            Response(rate_values, status=status.HTTP_200_OK),
+            etag,
+            last_modified,
+            closed,
+        )
 
-            # serializer = CurrencyExchangeRateSerializer(rate_values, many=True)
-            return Response(rate_values, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class CurrencyConverterView(APIView):
+    """
+    API View to retrieve real time currency convertion for an specific amount.
+    """
+
+    def get(self, request, **kwargs):
+        return currency_convertion_response(request, kwargs.get("version"))
+
+
+class AsyncCurrencyConverterView(APIView):
+    """
+    Asynchronous version of CurrencyConverterView: database and provider I/O do
+    not block a worker thread.
+    """
+
+    async def get(self, request, **kwargs):
+        return await acurrency_convertion_response(request, kwargs.get("version"))
+
+
+class CurrencyRateView(APIView):
+    """
+    API View to retrieve currency rates for a particular time range, daily or
+    aggregated by week or month (`resolution=day|week|month`).
+    """
+
+    def get(self, request, **kwargs):
+        return currency_rates_response(request, kwargs.get("version"))
+
+
+class AsyncCurrencyRateView(APIView):
+    """
+    Asynchronous version of CurrencyRateView: database and provider I/O do not
+    block a worker thread.
+    """
+
+    async def get(self, request, **kwargs):
+        return await acurrency_rates_response(request, kwargs.get("version"))
+
+
+LEDGER_FORMATS_BY_CONTENT_TYPE = {
+    "text/csv": CSV_FORMAT,
+    "application/x-ndjson": NDJSON_FORMAT,
+    "application/ndjson": NDJSON_FORMAT,
+}
+
+
+class CurrencyLedgerView(APIView):
+    """
+    API View converting a ledger, a CSV or NDJSON stream of (date, currency, amount)
+    rows in the request body, into the `reporting_currency` with the historical
+    rates. The converted rows are streamed back in the same format.
+    """
+
+    def post(self, request, **kwargs):
+        reporting_currency = request.GET.get("reporting_currency", "")
+        if reporting_currency not in get_valid_currencies():
+            return Response(
+                {"error": f"Invalid reporting_currency: {reporting_currency}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # The media type without its parameters (e.g. "; charset=utf-8")
+        content_type = request._request.content_type
+        ledger_format = LEDGER_FORMATS_BY_CONTENT_TYPE.get(content_type)
+        if ledger_format is None:
+            return Response(
+                {"error": f"Unsupported ledger content type: {content_type}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        logger.info(
+            "Currency Ledger {} requested into {} as {}".format(
+                kwargs.get("version"), reporting_currency, ledger_format
+            )
+        )
+        # Reading the body line by line, the rows are converted as they arrive
+        rows = read_ledger(codecs.iterdecode(request._request, "utf-8"), ledger_format)
+        return StreamingHttpResponse(
+            write_ledger(convert_ledger(rows, reporting_currency), ledger_format),
+            content_type=CONTENT_TYPES[ledger_format],
+        )
+
+
+def render_fast_response(response):
+    """
+    Renders a DRF Response straight away with orjson, keeping its status code and
+    headers. Other responses (e.g. a 304) are returned as they are.
+    """
+    if not isinstance(response, Response):
+        return response
+    fast_response = HttpResponse(
+        dumps(response.data),
+        status=response.status_code,
+        content_type="application/json",
+    )
+    for header, value in response.items():
+        if header != "Content-Type":
+            fast_response[header] = value
+    return fast_response
+
+
+class FastCurrencyConverterView(View):
+    """
+    CurrencyConverterView without the DRF request handling (content negotiation,
+    authentication, throttling, renderers): read-only and JSON only, it's served
+    when RATES_FAST_VIEWS is set.
+    """
+
+    def get(self, request, **kwargs):
+        return render_fast_response(
+            currency_convertion_response(request, kwargs.get("version"))
+        )
+
+
+class AsyncFastCurrencyConverterView(View):
+    """
+    Asynchronous version of FastCurrencyConverterView.
+    """
+
+    async def get(self, request, **kwargs):
+        return render_fast_response(
+            await acurrency_convertion_response(request, kwargs.get("version"))
+        )
+
+
+class FastCurrencyRateView(View):
+    """
+    CurrencyRateView without the DRF request handling, served when
+    RATES_FAST_VIEWS is set.
+    """
+
+    def get(self, request, **kwargs):
+        return render_fast_response(
+            currency_rates_response(request, kwargs.get("version"))
+        )
+
+
+class AsyncFastCurrencyRateView(View):
+    """
+    Asynchronous version of FastCurrencyRateView.
+    """
+
+    async def get(self, request, **kwargs):
+        return render_fast_response(
+            await acurrency_rates_response(request, kwargs.get("version"))
+        )
 
 
 class CurrencyViewSet(viewsets.ModelViewSet):
@@ -152,7 +609,8 @@ class VersionView(APIView):
 
 class CurrencyHistoryRateView(APIView):
     """
-    API View to asynchronously retrieve currency rates for a particular time range.
+    API View to asynchronously retrieve currency rates for a particular time range,
+    of a `source_currency` or of several `source_currencies` in a single backfill.
     """
 
     async def post(self, request, **kwargs):
@@ -160,17 +618,27 @@ class CurrencyHistoryRateView(APIView):
         date_from = request.data.get("date_from")
         date_to = request.data.get("date_to")
         source_currency = request.data.get("source_currency")
+        source_currencies = request.data.get("source_currencies")
         logger.info(
             "Currency Historical Rates {} requested for {}, from {} to {}".format(
-                version, source_currency, date_from, date_to
+                version, source_currencies or source_currency, date_from, date_to
             )
         )
-        # - retrieve all currencies and check if source_currency exists
-        valid_currencies = await sync_to_async(
-            lambda: set(Currency.objects.values_list("code", flat=True)),
-            thread_sensitive=True,
-        )()
-        if source_currency not in valid_currencies:
+        # - retrieve all currencies and check if the source currencies exist
+        valid_currencies = await aget_valid_currencies()
+        if source_currencies is not None:
+            if not isinstance(source_currencies, list) or not source_currencies:
+                return Response(
+                    {"error": "source_currencies must be a list of currency codes"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            for code in source_currencies:
+                if code not in valid_currencies:
+                    return Response(
+                        {"error": f"Invalid source_currencies: {code}"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+        elif source_currency not in valid_currencies:
             return Response(
                 {"error": f"Invalid source_currency: {source_currency}"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -193,12 +661,20 @@ class CurrencyHistoryRateView(APIView):
                 {"error": "Invalid date range"}, status=status.HTTP_400_BAD_REQUEST
             )
         try:
-            process_id = await batch_process(
-                source_currency=source_currency,
-                valid_currencies=valid_currencies,
-                date_from=date_from_parsed,
-                date_to=date_to_parsed,
-            )
+            if source_currencies is not None:
+                process_id = await batch_backfill(
+                    source_currencies=source_currencies,
+                    valid_currencies=valid_currencies,
+                    date_from=date_from_parsed,
+                    date_to=date_to_parsed,
+                )
+            else:
+                process_id = await batch_process(
+                    source_currency=source_currency,
+                    valid_currencies=valid_currencies,
+                    date_from=date_from_parsed,
+                    date_to=date_to_parsed,
+                )
             response_body = {
                 "process_id": str(process_id),
             }
@@ -243,3 +719,17 @@ def Converter(request, **kwargs):
 
     context = {"form": form, "conversion_results": conversion_results, "error": error}
     return render(request=request, template_name="base/form.html", context=context)
+
+
+class MetricsView(View):
+    """
+    Exposes the service metrics using the Prometheus text exposition format, unless
+    METRICS_ENABLED is False.
+    """
+
+    def get(self, request):
+        if not metrics.metrics_enabled():
+            raise Http404
+        return HttpResponse(
+            metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
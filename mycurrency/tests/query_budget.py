@@ -0,0 +1,30 @@
+"""
+Helpers to assert SQL query budgets in tests.
+
+Example:
+    with assert_max_queries(3):
+        api_client.get(url, params)
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, using: str = "default"):
+    """
+    Fails when the wrapped block runs more than `max_queries` SQL queries,
+    listing the executed queries to help spotting N+1 patterns.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    queries = "\n".join(
+        "{}. {}".format(i, query["sql"])
+        for i, query in enumerate(context.captured_queries, start=1)
+    )
+    assert executed <= max_queries, "{} queries executed, budget is {}:\n{}".format(
+        executed, max_queries, queries
+    )
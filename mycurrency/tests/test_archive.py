@@ -0,0 +1,197 @@
+import csv
+import gzip
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from rates.models import (
+    BatchProcess,
+    Currency,
+    CompactExchangeRate,
+    CurrencyExchangeRate,
+    LatestExchangeRate,
+    RateRollup,
+)
+from rates.service.archive import export_rates, import_rates, read_rate_chunks
+from rates.service.common import save_data
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="GBP", name="Pound Sterling", symbol="£")
+
+
+def store_march_rates():
+    save_data(
+        data={
+            date(2025, 3, day).isoformat(): {"EUR": 1 + day / 100, "GBP": 0.8}
+            for day in range(10, 15)
+        },
+        source_currency="USD",
+    )
+
+
+def get_rates():
+    return set(
+        CurrencyExchangeRate.objects.values_list(
+            "source_currency__code",
+            "exchanged_currency__code",
+            "valuation_date",
+            "rate_value",
+        )
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("file_name", ["rates.csv", "rates.csv.gz"])
+@override_settings(RATES_ARCHIVE_CHUNK_SIZE=3)
+def test_export_and_import_rates(clear_db, create_currencies, tmp_path, file_name):
+    store_march_rates()
+    rates = get_rates()
+    path = str(tmp_path / file_name)
+
+    assert export_rates(path) == 10
+    CurrencyExchangeRate.objects.all().delete()
+    LatestExchangeRate.objects.all().delete()
+    RateRollup.objects.all().delete()
+
+    assert import_rates(path) == {"rows": 10, "sent": 10, "skipped": 0}
+    assert get_rates() == rates
+    latest_rate = LatestExchangeRate.objects.get(
+        source_currency__code="USD", exchanged_currency__code="EUR"
+    )
+    assert (latest_rate.valuation_date, latest_rate.rate_value) == (
+        date(2025, 3, 14),
+        Decimal("1.14"),
+    )
+    assert (
+        RateRollup.objects.get(exchanged_currency__code="EUR", resolution="month").count
+        == 5
+    )
+
+    # Importing again skips the stored rates
+    assert import_rates(path)["sent"] == 0
+    assert get_rates() == rates
+
+
+@pytest.mark.django_db
+def test_export_rates_filters(clear_db, create_currencies, tmp_path):
+    store_march_rates()
+    path = str(tmp_path / "rates.csv.gz")
+
+    assert export_rates(path, date_from=date(2025, 3, 13)) == 4
+    with gzip.open(path, "rt", newline="") as archive:
+        rows = list(csv.reader(archive))
+    assert rows[0] == [
+        "source_currency",
+        "exchanged_currency",
+        "valuation_date",
+        "rate_value",
+    ]
+    assert rows[1] == ["USD", "EUR", "2025-03-13", "1.130000"]
+    assert export_rates(path, source_currencies=["EUR"]) == 0
+
+
+@pytest.mark.django_db
+def test_import_rates_skips_unknown_currencies(clear_db, create_currencies, tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "source_currency,exchanged_currency,valuation_date,rate_value\n"
+        "USD,EUR,2025-03-10,1.1\n"
+        "USD,XYZ,2025-03-10,2.5\n"
+    )
+
+    assert import_rates(str(path)) == {"rows": 2, "sent": 1, "skipped": 1}
+    assert LatestExchangeRate.objects.get(
+        exchanged_currency__code="EUR"
+    ).rate_value == Decimal("1.1")
+
+
+def test_read_rate_chunks_rejects_invalid_files(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("date,currency,amount\n")
+    with pytest.raises(ValueError, match="header"):
+        list(read_rate_chunks(str(path)))
+
+    path.write_text(
+        "source_currency,exchanged_currency,valuation_date,rate_value\n"
+        "USD,EUR,2025-13-10,1.1\n"
+    )
+    with pytest.raises(ValueError, match="row 2"):
+        list(read_rate_chunks(str(path)))
+
+
+@pytest.mark.django_db
+def test_export_and_import_parquet(clear_db, create_currencies, tmp_path):
+    pytest.importorskip("pyarrow")
+    store_march_rates()
+    rates = get_rates()
+    path = str(tmp_path / "rates.parquet")
+
+    assert export_rates(path) == 10
+    CurrencyExchangeRate.objects.all().delete()
+    assert import_rates(path)["rows"] == 10
+    assert get_rates() == rates
+
+
+@pytest.mark.django_db
+def test_rates_commands(clear_db, create_currencies, tmp_path):
+    store_march_rates()
+    path = str(tmp_path / "rates.csv.gz")
+
+    with pytest.raises(CommandError, match="Unknown currencies: XYZ"):
+        call_command("export_rates", path, "XYZ")
+    call_command("export_rates", path, "USD")
+    CurrencyExchangeRate.objects.all().delete()
+    call_command("import_rates", path)
+    assert CurrencyExchangeRate.objects.count() == 10
+
+
+@pytest.mark.django_db
+def test_import_rates_skips_stored_dates_with_another_rate(
+    clear_db, create_currencies, tmp_path
+):
+    store_march_rates()
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "source_currency,exchanged_currency,valuation_date,rate_value\n"
+        "USD,EUR,2025-03-10,1.5\n"
+        "USD,EUR,2025-03-20,1.2\n"
+    )
+
+    assert import_rates(str(path))["sent"] == 1
+    assert CurrencyExchangeRate.objects.get(
+        exchanged_currency__code="EUR", valuation_date=date(2025, 3, 10)
+    ).rate_value == Decimal("1.1")
+
+
+@pytest.mark.django_db
+@override_settings(RATES_COMPACT_STORAGE=True)
+def test_import_rates_with_compact_storage(clear_db, create_currencies, tmp_path):
+    CompactExchangeRate.objects.all().delete()
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "source_currency,exchanged_currency,valuation_date,rate_value\n"
+        "USD,EUR,2025-03-10,1.1\n"
+        "USD,EUR,2025-03-11,1.2\n"
+    )
+
+    assert import_rates(str(path)) == {"rows": 2, "sent": 2, "skipped": 0}
+    assert CompactExchangeRate.objects.count() == 2
+    latest_rate = LatestExchangeRate.objects.get(exchanged_currency__code="EUR")
+    assert (latest_rate.valuation_date, latest_rate.rate_value) == (
+        date(2025, 3, 11),
+        Decimal("1.2"),
+    )
@@ -0,0 +1,79 @@
+import pytest
+from asgiref.sync import async_to_sync
+from unittest.mock import AsyncMock, patch
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from rates.models import BatchProcess, Currency
+from rates.views import AsyncCurrencyConverterView, AsyncCurrencyRateView
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+@pytest.fixture
+def factory():
+    return APIRequestFactory()
+
+
+@pytest.mark.django_db
+def test_async_currency_rates(clear_db, create_currencies, factory):
+    request = factory.get(
+        "/api/v1/currency-rates/",
+        {"source_currency": "USD", "date_from": "2025-03-10", "date_to": "2025-03-11"},
+    )
+    rates = {"2025-03-10": {"USD/EUR": 0.92}, "2025-03-11": {"USD/EUR": 0.93}}
+    with patch(
+        "rates.views.aget_exchange_rates", new=AsyncMock(return_value=rates)
+    ) as aget_exchange_rates:
+        response = async_to_sync(AsyncCurrencyRateView.as_view())(request, version="v1")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == rates
+    assert aget_exchange_rates.await_count == 1
+
+
+@pytest.mark.django_db
+def test_async_currency_rates_invalid_currency(clear_db, create_currencies, factory):
+    request = factory.get(
+        "/api/v1/currency-rates/",
+        {"source_currency": "XXX", "date_from": "2025-03-10", "date_to": "2025-03-11"},
+    )
+    response = async_to_sync(AsyncCurrencyRateView.as_view())(request, version="v1")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_async_currency_converter(clear_db, create_currencies, factory):
+    request = factory.get(
+        "/api/v1/currency-converter/",
+        {"source_currency": "USD", "exchanged_currency": "EUR", "amount": 10},
+    )
+    convertion = {
+        "date": "2025-03-10",
+        "source_currency": "USD",
+        "exchanged_currency": "EUR",
+        "amount": 10.0,
+        "value": 9.2,
+    }
+    with patch(
+        "rates.views.aget_exchange_convertion", new=AsyncMock(return_value=convertion)
+    ):
+        response = async_to_sync(AsyncCurrencyConverterView.as_view())(
+            request, version="v1"
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == convertion
@@ -1,10 +1,19 @@
 import pytest
 from asgiref.sync import sync_to_async
-from datetime import date
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import override_settings
 from unittest.mock import MagicMock, patch
-from rates.service.batch_processor import batch_process, fetch_remote_data
-
+from rates.service.batch_processor import (
+    batch_backfill,
+    batch_process,
+    fetch_remote_data,
+    triangulate_rates,
+)
+
+from rates.domain.db import get_exchange_rates_by_date_and_currency
 from rates.models import BatchProcess, Currency
+from rates.service import metrics
 
 
 @pytest.fixture
@@ -77,6 +86,31 @@ async def test_batch_process():
         assert process_id == mock_batch_process_instance.process_id
 
 
+@pytest.mark.asyncio
+async def test_batch_process_queue_depth_returns_to_zero():
+    metrics.BATCH_QUEUE_DEPTH.set(0)
+    with patch("rates.models.Currency.objects.get"), patch(
+        "rates.models.BatchProcess.objects.create"
+    ), patch("rates.models.BatchProcess.save"), patch(
+        "rates.service.batch_processor.get_missing_rate_dates",
+        # Two gaps counted, one of them filled before being fetched
+        side_effect=[[[date(2025, 3, 1)], [date(2025, 3, 5)]], [[date(2025, 3, 5)]]],
+    ), patch(
+        "rates.service.batch_processor.fetch_remote_data"
+    ) as fetch_remote_data, override_settings(
+        BATCH_PROCESS_SLEEP_TIME=0
+    ):
+        await batch_process(
+            source_currency="USD",
+            valid_currencies={"USD", "EUR"},
+            date_from=date(2025, 3, 1),
+            date_to=date(2025, 3, 31),
+        )
+
+    fetch_remote_data.assert_called_once()
+    assert metrics.BATCH_QUEUE_DEPTH.get() == 0
+
+
 def test_fetch_remote_data():
     with patch(
         "rates.service.batch_processor.get_exchange_rate_data"
@@ -102,3 +136,81 @@ def test_fetch_remote_data():
         )
         assert batch_process_updated.processes_counter == 1
         assert batch_process_updated.status == BatchProcess.Status.DONE
+
+
+def test_triangulate_rates():
+    pivot_rates = {
+        (date(2025, 3, 10), "EUR"): Decimal("0.8"),
+        (date(2025, 3, 10), "GBP"): Decimal("0.5"),
+        (date(2025, 3, 11), "GBP"): Decimal("0.5"),
+    }
+
+    data = triangulate_rates(
+        pivot_rates,
+        "USD",
+        "EUR",
+        {"USD", "EUR", "GBP"},
+        [date(2025, 3, 10), date(2025, 3, 11)],
+    )
+
+    assert data == {
+        date(2025, 3, 10): {"USD": Decimal("1.25"), "GBP": Decimal("0.625")},
+    }
+
+
+def mock_rate_data(source_currency, exchanged_currency, date_from, date_to):
+    """
+    USD rates for every day but the 2025-03-03, and EUR rates for every day.
+    """
+    rates = {"USD": {"EUR": 0.8, "GBP": 0.5}, "EUR": {"USD": 1.2, "GBP": 0.6}}
+    data = {}
+    valuation_date = date_from
+    while valuation_date <= date_to:
+        if source_currency == "EUR" or valuation_date != date(2025, 3, 3):
+            data[valuation_date.isoformat()] = dict(rates[source_currency])
+        valuation_date += timedelta(days=1)
+    return data, "MockProvider"
+
+
+@pytest.mark.asyncio
+@override_settings(BATCH_PROCESS_SLEEP_TIME=0)
+async def test_batch_backfill(clear_db, create_currencies):
+    await sync_to_async(Currency.objects.get_or_create)(
+        code="GBP", name="Pound Sterlin", symbol="£"
+    )
+
+    with patch(
+        "rates.service.batch_processor.get_exchange_rate_data",
+        side_effect=mock_rate_data,
+    ) as get_exchange_rate_data:
+        process_id = await batch_backfill(
+            source_currencies=["EUR", "USD"],
+            valid_currencies={"USD", "EUR", "GBP"},
+            date_from=date(2025, 3, 1),
+            date_to=date(2025, 3, 5),
+        )
+
+    # The pivot range, then only the EUR date the pivot couldn't cover
+    assert [
+        call.kwargs["source_currency"] for call in get_exchange_rate_data.mock_calls
+    ] == [
+        "USD",
+        "EUR",
+    ]
+    assert get_exchange_rate_data.mock_calls[1].kwargs["date_from"] == date(2025, 3, 3)
+    eur_rates = await sync_to_async(get_exchange_rates_by_date_and_currency)(
+        "EUR", date(2025, 3, 1), date(2025, 3, 5)
+    )
+    assert eur_rates[(date(2025, 3, 1), "GBP")] == Decimal("0.625")
+    assert eur_rates[(date(2025, 3, 3), "GBP")] == Decimal("0.6")
+    assert len(eur_rates) == 10
+
+    process = await sync_to_async(BatchProcess.objects.get)(process_id=process_id)
+    assert process.status == BatchProcess.Status.DONE
+    assert (
+        process.source_currency_id
+        == (await sync_to_async(Currency.objects.get)(code="USD")).id
+    )
+    assert process.source_currencies == "EUR,USD"
+    # A USD chunk, the EUR triangulation and the EUR chunk left
+    assert process.processes == process.processes_counter == 3
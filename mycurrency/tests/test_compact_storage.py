@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import override_settings
+
+from rates.domain.db import (
+    get_exchange_rates_by_date_and_currency,
+    get_exchange_rates_grouped_by_date_and_currency,
+)
+from rates.models import (
+    BatchProcess,
+    CompactExchangeRate,
+    Currency,
+    CurrencyExchangeRate,
+)
+from rates.service.common import get_missing_rate_dates, save_data
+from rates.service.rater import get_exchange_convertion
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+    CompactExchangeRate.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="GBP", name="Pound Sterlin", symbol="£")
+
+
+@pytest.mark.parametrize(
+    "rate, scaled_rate",
+    [
+        (0.92, 92000000),
+        (1.08509501, 108509501),
+        (Decimal("0.841883"), 84188300),
+        (123.456789129, 12345678913),
+    ],
+)
+def test_compact_rate_scaling(rate, scaled_rate):
+    assert CompactExchangeRate.scale(rate) == scaled_rate
+    assert float(
+        CompactExchangeRate(scaled_rate=scaled_rate).rate_value
+    ) == pytest.approx(float(rate), abs=1e-8)
+
+
+@pytest.mark.django_db
+@override_settings(RATES_COMPACT_STORAGE=True)
+def test_compact_storage_round_trip(clear_db, create_currencies):
+    created_rows = save_data(
+        data={
+            "2025-03-10": {"EUR": 1.08509501, "GBP": 0.84188273},
+            "2025-03-11": {"EUR": 1.08970418},
+        },
+        source_currency="USD",
+    )
+
+    assert created_rows == 3
+    assert not CurrencyExchangeRate.objects.filter(source_currency__code="USD")
+    assert get_exchange_rates_grouped_by_date_and_currency(
+        "USD", date(2025, 3, 10), date(2025, 3, 12)
+    ) == {
+        "2025-03-10": {"USD/EUR": 1.08509501, "USD/GBP": 0.84188273},
+        "2025-03-11": {"USD/EUR": 1.08970418},
+    }
+    assert get_missing_rate_dates("USD", date(2025, 3, 10), date(2025, 3, 12)) == [
+        [date(2025, 3, 12)]
+    ]
+
+
+@pytest.mark.django_db
+@override_settings(RATES_COMPACT_STORAGE=True)
+def test_compact_storage_convertion(clear_db, create_currencies):
+    today = date.today()
+    save_data(data={today.isoformat(): {"EUR": 0.5}}, source_currency="USD")
+
+    convertion = get_exchange_convertion("USD", "EUR", Decimal("10"))
+
+    assert convertion["value"] == 5.0
+    assert convertion["date"] == today.strftime("%Y-%m-%d")
+
+
+@pytest.mark.django_db
+@override_settings(RATES_COMPACT_STORAGE=True)
+def test_compact_rates_of_deleted_currencies(clear_db, create_currencies):
+    save_data(data={"2025-03-10": {"EUR": 1.08, "GBP": 0.84}}, source_currency="USD")
+    gbp_id = Currency.objects.get(code="GBP").id
+
+    Currency.objects.get(code="GBP").delete()
+
+    assert not CompactExchangeRate.objects.filter(exchanged_currency_id=gbp_id)
+    assert get_exchange_rates_grouped_by_date_and_currency(
+        "USD", date(2025, 3, 10), date(2025, 3, 10)
+    ) == {"2025-03-10": {"USD/EUR": 1.08}}
+
+
+@pytest.mark.django_db
+@override_settings(RATES_COMPACT_STORAGE=True)
+def test_orphan_compact_rates_are_skipped(clear_db, create_currencies):
+    save_data(data={"2025-03-10": {"EUR": 1.08}}, source_currency="USD")
+    # Left by a currency deleted before the compact rates were deleted with it
+    CompactExchangeRate.objects.create(
+        source_currency_id=Currency.objects.get(code="USD").id,
+        exchanged_currency_id=32000,
+        valuation_date=date(2025, 3, 10),
+        scaled_rate=CompactExchangeRate.scale(2),
+    )
+
+    assert get_exchange_rates_grouped_by_date_and_currency(
+        "USD", date(2025, 3, 10), date(2025, 3, 10)
+    ) == {"2025-03-10": {"USD/EUR": 1.08}}
+    assert get_exchange_rates_by_date_and_currency(
+        "USD", date(2025, 3, 10), date(2025, 3, 10)
+    ) == {(date(2025, 3, 10), "EUR"): Decimal("1.08")}
+
+
+@pytest.mark.django_db
+def test_compact_rates_command(clear_db, create_currencies):
+    usd = Currency.objects.get(code="USD")
+    eur = Currency.objects.get(code="EUR")
+    CurrencyExchangeRate.objects.create(
+        source_currency=usd,
+        exchanged_currency=eur,
+        valuation_date=date(2025, 3, 10),
+        rate_value=Decimal("0.920000"),
+    )
+
+    call_command("compact_rates", chunk_size=1)
+
+    compact_rate = CompactExchangeRate.objects.get()
+    assert compact_rate.source_currency_id == usd.id
+    assert compact_rate.exchanged_currency_id == eur.id
+    assert compact_rate.scaled_rate == 92000000
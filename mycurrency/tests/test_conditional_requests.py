@@ -0,0 +1,119 @@
+import pytest
+from asgiref.sync import async_to_sync
+from datetime import datetime
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from unittest.mock import patch
+
+from rates.models import BatchProcess, Currency
+from rates.service.common import save_data
+from rates.views import AsyncCurrencyRateView
+from tests.query_budget import assert_max_queries
+
+
+PAST_RANGE = {
+    "source_currency": "USD",
+    "date_from": "2025-03-10",
+    "date_to": "2025-03-11",
+}
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def api_client():
+    """Fixture for the Django REST Framework API client."""
+    return APIClient()
+
+
+@pytest.fixture
+def create_rates():
+    """Fixture storing USD/EUR rates for 2025-03-10 and 2025-03-11."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    save_data(
+        data={"2025-03-10": {"EUR": 0.92}, "2025-03-11": {"EUR": 0.93}},
+        source_currency="USD",
+    )
+
+
+@pytest.mark.django_db
+def test_past_range_not_modified(clear_db, api_client, create_rates):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    response = api_client.get(url, PAST_RANGE)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Cache-Control"] == "public, max-age=2592000"
+    assert "Last-Modified" in response
+
+    with assert_max_queries(1):
+        response = api_client.get(url, PAST_RANGE, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    response = api_client.get(
+        url, PAST_RANGE, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_past_range_modified_by_ingest(clear_db, api_client, create_rates):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    params = dict(PAST_RANGE, date_to="2025-03-12")
+    with patch("rates.service.rater.get_exchange_rate_data", return_value=({}, "Mock")):
+        etag = api_client.get(url, params)["ETag"]
+
+    save_data(data={"2025-03-12": {"EUR": 0.94}}, source_currency="USD")
+    response = api_client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+    assert len(response.json()) == 3
+
+
+@pytest.mark.django_db
+def test_past_range_filled_by_the_request(clear_db, api_client, create_rates):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    params = dict(PAST_RANGE, date_to="2025-03-12")
+    with patch(
+        "rates.service.rater.get_exchange_rate_data",
+        return_value=({"2025-03-12": {"EUR": 0.94}}, "Mock"),
+    ):
+        response = api_client.get(url, params)
+    assert len(response.json()) == 3
+
+    # The validators describe the rates served, filled gap included
+    response = api_client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_current_range_is_revalidated(clear_db, api_client, create_rates):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    today = datetime.now().date().isoformat()
+    params = dict(PAST_RANGE, date_to=today)
+    with patch("rates.views.get_exchange_rates", return_value={}):
+        response = api_client.get(url, params)
+        assert response["Cache-Control"] == "public, max-age=0"
+
+        response = api_client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_async_past_range_not_modified(clear_db, api_client, create_rates):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    etag = api_client.get(url, PAST_RANGE)["ETag"]
+
+    request = APIRequestFactory().get(url, PAST_RANGE, HTTP_IF_NONE_MATCH=etag)
+    response = async_to_sync(AsyncCurrencyRateView.as_view())(request, version="v1")
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
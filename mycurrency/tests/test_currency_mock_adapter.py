@@ -0,0 +1,109 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.test import override_settings
+
+from rates.adapters.currencymock_adapter import CurrencyMockAdapter
+from rates.adapters.exceptions import ProviderError, ProviderThrottledError
+
+
+@override_settings(MOCK_PROVIDER_SEED=42)
+def test_seeded_rates_are_reproducible():
+    adapter = CurrencyMockAdapter(api_key="mock_key")
+    first = adapter.get_exchange_rate_data(
+        source_currency="USD",
+        exchanged_currency="EUR,GBP",
+        date_from=date(2025, 3, 1),
+        date_to=date(2025, 3, 10),
+    )
+    # Same rates no matter the order of the symbols or the range boundaries
+    second = CurrencyMockAdapter(api_key="mock_key").get_exchange_rate_data(
+        source_currency="USD",
+        exchanged_currency="GBP,EUR",
+        date_from=date(2025, 3, 5),
+        date_to=date(2025, 3, 5),
+    )
+
+    assert len(first) == 10
+    assert second["2025-03-05"] == first["2025-03-05"]
+
+
+def test_seeded_rates_depend_on_the_seed():
+    with override_settings(MOCK_PROVIDER_SEED=1):
+        rate_1 = CurrencyMockAdapter(api_key="").get_rate(
+            "USD", "EUR", date(2025, 3, 1)
+        )
+    with override_settings(MOCK_PROVIDER_SEED=2):
+        rate_2 = CurrencyMockAdapter(api_key="").get_rate(
+            "USD", "EUR", date(2025, 3, 1)
+        )
+
+    assert rate_1 != rate_2
+    assert 0.5 <= rate_1 <= 1.5
+
+
+def test_mock_config_from_provider_key():
+    adapter = CurrencyMockAdapter(
+        api_key="latency=fixed:5;error_rate=0.1;throttle_rate=0.2;retry_after=3;max_span_days=30;seed=7"
+    )
+
+    assert adapter.latency(adapter.generator) == 5
+    assert adapter.error_rate == 0.1
+    assert adapter.throttle_rate == 0.2
+    assert adapter.retry_after == 3
+    assert adapter.max_span_days == 30
+    assert adapter.seed == "7"
+
+
+@override_settings(MOCK_PROVIDER_CONFIG={"latency": "fixed:1", "error_rate": 1})
+def test_mock_config_from_settings_overridden_by_key():
+    adapter = CurrencyMockAdapter(api_key="error_rate=0")
+
+    assert adapter.latency(adapter.generator) == 1
+    assert adapter.error_rate == 0
+
+
+def test_mock_throttling():
+    adapter = CurrencyMockAdapter(api_key="throttle_rate=1;retry_after=2")
+
+    with pytest.raises(ProviderThrottledError) as error:
+        adapter.get_exchange_convertion_data(
+            source_currency="USD", exchanged_currency="EUR", amount=Decimal("1")
+        )
+
+    assert error.value.retry_after == 2
+
+
+def test_mock_errors_and_span_limit():
+    with pytest.raises(ProviderError):
+        CurrencyMockAdapter(api_key="error_rate=1").get_exchange_rate_data(
+            source_currency="USD",
+            exchanged_currency="EUR",
+            date_from=date(2025, 3, 1),
+            date_to=date(2025, 3, 1),
+        )
+
+    with pytest.raises(ProviderError, match="limited to 5 days"):
+        CurrencyMockAdapter(api_key="max_span_days=5").get_exchange_rate_data(
+            source_currency="USD",
+            exchanged_currency="EUR",
+            date_from=date(2025, 3, 1),
+            date_to=date(2025, 3, 6),
+        )
+
+
+def test_mock_fault_sequence_depends_on_the_seed():
+    def outcomes(seed):
+        results = []
+        for _ in range(50):
+            adapter = CurrencyMockAdapter(api_key="error_rate=0.3;seed={}".format(seed))
+            try:
+                adapter.simulate_call()
+                results.append(True)
+            except ProviderError:
+                results.append(False)
+        return results
+
+    first = outcomes("reproducible-a")
+    assert outcomes("reproducible-b") != first
+    assert 0 < first.count(False) < 50
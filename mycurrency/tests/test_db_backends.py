@@ -0,0 +1,104 @@
+import pytest
+from datetime import date
+from django.db import connection
+
+from rates.domain.backends import bulk_insert_rates
+from rates.domain.db import get_exchange_rates_queryset
+from rates.models import BatchProcess, Currency, CurrencyExchangeRate
+from rates.service.common import save_data
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="GBP", name="Pound Sterlin", symbol="£")
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite profile only")
+def test_sqlite_connection_pragmas():
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+        cursor.execute("PRAGMA busy_timeout")
+        busy_timeout = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous")
+        synchronous = cursor.fetchone()[0]
+
+    assert journal_mode == "wal"
+    assert busy_timeout == 5000
+    assert synchronous == 1  # NORMAL
+
+
+@pytest.mark.django_db
+def test_save_data_skips_stored_rates(clear_db, create_currencies):
+    CurrencyExchangeRate.objects.create(
+        source_currency=Currency.objects.get(code="USD"),
+        exchanged_currency=Currency.objects.get(code="EUR"),
+        valuation_date=date(2025, 3, 10),
+        rate_value=0.9,
+    )
+
+    created_rows = save_data(
+        data={
+            "2025-03-10": {"EUR": 0.92, "GBP": 0.77},
+            "2025-03-11": {"EUR": 0.93, "GBP": None},
+        },
+        source_currency="USD",
+    )
+
+    assert created_rows == 2
+    rates = CurrencyExchangeRate.objects.filter(source_currency__code="USD")
+    assert sorted(
+        (rate.exchanged_currency.code, rate.valuation_date, float(rate.rate_value))
+        for rate in rates
+    ) == [
+        ("EUR", date(2025, 3, 10), 0.9),
+        ("EUR", date(2025, 3, 11), 0.93),
+        ("GBP", date(2025, 3, 10), 0.77),
+    ]
+
+
+@pytest.mark.django_db
+def test_bulk_insert_rates_ignores_conflicts(clear_db, create_currencies):
+    usd = Currency.objects.get(code="USD")
+    eur = Currency.objects.get(code="EUR")
+    rate = dict(
+        source_currency=usd,
+        exchanged_currency=eur,
+        valuation_date=date(2025, 3, 10),
+        rate_value="0.920000",
+    )
+    CurrencyExchangeRate.objects.create(**rate)
+
+    bulk_insert_rates(
+        [
+            CurrencyExchangeRate(**rate),
+            CurrencyExchangeRate(**dict(rate, valuation_date=date(2025, 3, 11))),
+        ]
+    )
+
+    assert CurrencyExchangeRate.objects.filter(source_currency=usd).count() == 2
+
+
+@pytest.mark.django_db
+def test_range_queries_use_rate_partitions():
+    plan = get_exchange_rates_queryset(
+        "USD", date(2025, 1, 1), date(2025, 3, 1)
+    ).explain()
+
+    if connection.vendor == "postgresql":
+        assert "rates_currencyexchangerate_y2025" in plan
+        assert "rates_currencyexchangerate_y2024" not in plan
+    else:
+        assert "rates_rate_source_date_idx" in plan
@@ -0,0 +1,124 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from rates.models import BatchProcess, Currency
+from rates.service.common import save_data
+from rates.service.history import RateSeries, get_rate_series
+from rates.service.rater import get_historical_convertion
+from tests.query_budget import assert_max_queries
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+@pytest.fixture
+def create_rates():
+    # Friday and Monday, nothing on the weekend
+    save_data(
+        data={"2025-03-07": {"EUR": 0.90}, "2025-03-10": {"EUR": 0.96}},
+        source_currency="USD",
+    )
+
+
+SERIES = RateSeries(
+    [date(2025, 3, 7), date(2025, 3, 10), date(2025, 3, 20)],
+    [Decimal("0.90"), Decimal("0.96"), Decimal("1.00")],
+)
+
+
+@pytest.mark.parametrize(
+    "valuation_date, policy, expected",
+    [
+        (date(2025, 3, 10), "exact", Decimal("0.96")),
+        (date(2025, 3, 8), "exact", None),
+        (date(2025, 3, 9), "previous", Decimal("0.90")),
+        (date(2025, 3, 8), "nearest", Decimal("0.90")),
+        (date(2025, 3, 9), "nearest", Decimal("0.96")),
+        (date(2025, 3, 9), "linear", Decimal("0.94")),
+        (date(2025, 3, 6), "nearest", Decimal("0.90")),
+        (date(2025, 3, 6), "linear", None),
+        (date(2025, 3, 15), "linear", Decimal("0.98")),
+        (date(2025, 3, 22), "linear", Decimal("1.00")),
+        (date(2025, 3, 18), "previous", None),
+        (date(2025, 3, 28), "previous", None),
+    ],
+)
+def test_rate_series_policies(valuation_date, policy, expected):
+    assert SERIES.get_rate(valuation_date, policy) == expected
+
+
+@pytest.mark.django_db
+def test_historical_convertion_from_series(clear_db, create_currencies, create_rates):
+    get_rate_series("USD", "EUR")
+
+    with assert_max_queries(0):
+        convertion = get_historical_convertion(
+            "USD", "EUR", Decimal("10"), date(2025, 3, 9), policy="linear"
+        )
+
+    assert convertion["date"] == "2025-03-09"
+    assert convertion["value"] == Decimal("9.40")
+
+
+@pytest.mark.django_db
+def test_save_data_invalidates_series(clear_db, create_currencies, create_rates):
+    assert get_rate_series("USD", "EUR").get_rate(date(2025, 3, 8), "exact") is None
+
+    save_data(data={"2025-03-08": {"EUR": 0.92}}, source_currency="USD")
+
+    assert get_rate_series("USD", "EUR").get_rate(date(2025, 3, 8), "exact") == (
+        Decimal("0.92")
+    )
+
+
+@pytest.mark.django_db
+@override_settings(RATES_HISTORY_MAX_GAP_DAYS=2)
+def test_historical_convertion_fills_missing_rates_once(
+    clear_db, create_currencies, create_rates
+):
+    with patch("rates.service.rater.fill_missing_rates") as fill_missing_rates:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                get_historical_convertion(
+                    "USD", "EUR", Decimal("1"), date(2025, 1, 15), policy="exact"
+                )
+
+    fill_missing_rates.assert_called_once_with(
+        "USD", date(2025, 1, 13), date(2025, 1, 17)
+    )
+
+
+@pytest.mark.django_db
+def test_converter_at_a_past_date(clear_db, create_currencies, create_rates):
+    url = reverse("currency-converter", kwargs={"version": "v1"})
+    query = {"source_currency": "USD", "exchanged_currency": "EUR", "amount": "10"}
+    client = APIClient()
+
+    response = client.get(url, {**query, "date": "2025-03-08", "policy": "previous"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["value"] == Decimal("9.00")
+
+    response = client.get(url, {**query, "policy": "sideways"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    tomorrow = date.today() + timedelta(days=1)
+    response = client.get(url, {**query, "date": tomorrow.isoformat()})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "future" in response.json()["date"][0]
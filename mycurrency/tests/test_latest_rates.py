@@ -0,0 +1,129 @@
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from django.test import override_settings
+from unittest.mock import patch
+
+from rates.models import BatchProcess, Currency, LatestExchangeRate
+from rates.service.common import save_data
+from rates.service.latest import get_latest_rate
+from rates.service.rater import get_exchange_convertion
+from tests.query_budget import assert_max_queries
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="GBP", name="Pound Sterlin", symbol="£")
+
+
+@pytest.mark.parametrize(
+    "valuation_date, fetched_at, fresh, description",
+    [
+        (
+            date(2025, 3, 10),
+            datetime(2025, 3, 10, 12, tzinfo=timezone.utc),
+            True,
+            "Rate fetched during its valuation date",
+        ),
+        (
+            date(2025, 3, 10),
+            datetime(2025, 3, 10, 6, tzinfo=timezone.utc),
+            False,
+            "Rate fetched too long ago",
+        ),
+        (
+            date(2025, 3, 9),
+            datetime(2025, 3, 10, 12, tzinfo=timezone.utc),
+            False,
+            "Rate of the previous day, aged from the end of its day",
+        ),
+        (
+            date(2025, 3, 1),
+            datetime(2025, 3, 10, 12, tzinfo=timezone.utc),
+            False,
+            "Old rate fetched recently",
+        ),
+    ],
+)
+def test_latest_rate_freshness(valuation_date, fetched_at, fresh, description):
+    latest_rate = LatestExchangeRate(
+        valuation_date=valuation_date, fetched_at=fetched_at
+    )
+    now = datetime(2025, 3, 10, 15, tzinfo=timezone.utc)
+
+    assert latest_rate.is_fresh(timedelta(hours=6), now=now) == fresh, description
+
+
+@pytest.mark.django_db
+def test_save_data_keeps_newest_latest_rate(clear_db, create_currencies):
+    save_data(data={"2025-03-11": {"EUR": 0.93, "GBP": 0.77}}, source_currency="USD")
+    save_data(
+        data={"2025-03-10": {"EUR": 0.92}, "2025-03-12": {"GBP": 0.78}},
+        source_currency="USD",
+    )
+
+    latest_rates = {
+        latest_rate.exchanged_currency.code: (
+            latest_rate.valuation_date,
+            latest_rate.rate_value,
+        )
+        for latest_rate in LatestExchangeRate.objects.filter(
+            source_currency__code="USD"
+        )
+    }
+    assert latest_rates == {
+        "EUR": (date(2025, 3, 11), Decimal("0.93")),
+        "GBP": (date(2025, 3, 12), Decimal("0.78")),
+    }
+
+
+@pytest.mark.django_db
+def test_converter_serves_cached_latest_rate(clear_db, create_currencies):
+    save_data(data={date.today().isoformat(): {"EUR": 0.5}}, source_currency="USD")
+
+    with patch(
+        "rates.service.rater.get_exchange_convertion_data"
+    ) as get_exchange_convertion_data:
+        with assert_max_queries(0):
+            convertion = get_exchange_convertion("USD", "EUR", Decimal("10"))
+
+    get_exchange_convertion_data.assert_not_called()
+    assert convertion["value"] == Decimal("5")
+
+
+@pytest.mark.django_db
+@override_settings(RATES_LATEST_MAX_AGE=3600)
+def test_converter_refreshes_stale_latest_rate(clear_db, create_currencies):
+    save_data(data={"2025-03-10": {"EUR": 0.5}}, source_currency="USD")
+    today = date.today()
+
+    with patch(
+        "rates.service.rater.get_exchange_convertion_data",
+        return_value=(
+            {
+                "date": today.isoformat(),
+                "source_currency": "USD",
+                "exchanged_currency": "EUR",
+                "amount": Decimal("10"),
+                "value": 6.0,
+            },
+            "MockProvider",
+        ),
+    ) as get_exchange_convertion_data:
+        convertion = get_exchange_convertion("USD", "EUR", Decimal("10"))
+
+    get_exchange_convertion_data.assert_called_once()
+    assert convertion["value"] == 6.0
+    latest_rate = get_latest_rate("USD", "EUR")
+    assert latest_rate.valuation_date == today
+    assert latest_rate.rate_value == Decimal("0.6")
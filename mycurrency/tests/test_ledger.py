@@ -0,0 +1,174 @@
+import json
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from rates.models import BatchProcess, Currency
+from rates.service.common import save_data
+from rates.service.ledger import (
+    CSV_FORMAT,
+    convert_ledger,
+    read_ledger,
+    write_ledger,
+)
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="GBP", name="Pound Sterlin", symbol="£")
+
+
+@pytest.fixture
+def create_rates():
+    save_data(
+        data={
+            "2025-03-10": {"USD": 1.25, "GBP": 0.8},
+            "2025-03-11": {"USD": 1.0},
+        },
+        source_currency="EUR",
+    )
+
+
+LEDGER_CSV = (
+    "id,date,currency,amount\n"
+    "1,2025-03-10,USD,100.00\n"
+    "2,2025-03-10,GBP,10\n"
+    "3,2025-03-11,USD,7.5\n"
+    "4,2025-03-11,EUR,3.333\n"
+    "5,2025-03-11,GBP,1\n"
+    "6,2025-03-32,USD,1\n"
+)
+
+
+@pytest.mark.django_db
+@override_settings(RATES_LEDGER_CHUNK_SIZE=2)
+def test_convert_ledger(clear_db, create_currencies, create_rates):
+    stats = {}
+    with patch("rates.service.ledger.fill_missing_rates") as fill_missing_rates:
+        chunks = list(
+            convert_ledger(
+                read_ledger(LEDGER_CSV.splitlines(True), CSV_FORMAT), "EUR", stats=stats
+            )
+        )
+
+    rows = [row for chunk in chunks for row in chunk]
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2]
+    assert [(row["id"], row.get("value"), row.get("error")) for row in rows] == [
+        ("1", "80.00", None),
+        ("2", "12.50", None),
+        ("3", "7.50", None),
+        ("4", "3.33", None),
+        ("5", None, "No rate for GBP on 2025-03-11"),
+        ("6", None, "day is out of range for month"),
+    ]
+    assert Decimal(rows[0]["rate"]) == Decimal("0.8")
+    # The provider is asked once per date range of new dates
+    assert [call.args for call in fill_missing_rates.call_args_list] == [
+        ("EUR", date(2025, 3, 10), date(2025, 3, 10)),
+        ("EUR", date(2025, 3, 11), date(2025, 3, 11)),
+    ]
+    assert stats["rows"] == 6 and stats["failed"] == 2
+    assert stats["rows_per_second"] > 0
+
+
+def test_write_ledger_csv():
+    chunks = [
+        [{"date": "2025-03-10", "value": "1.00", "rate": "1"}],
+        [{"date": "2025-03-11", "error": "No rate"}],
+    ]
+
+    content = b"".join(write_ledger(chunks, CSV_FORMAT)).decode()
+
+    assert content.splitlines() == [
+        "date,value,rate,error",
+        "2025-03-10,1.00,1,",
+        "2025-03-11,,,No rate",
+    ]
+
+
+def test_read_ledger_ndjson_invalid_lines():
+    rows = list(read_ledger(['{"amount": 1}\n', "\n", "[1]\n", "{bad\n"], "ndjson"))
+
+    assert rows == [
+        {"amount": 1},
+        {"error": "Invalid ledger row: [1]"},
+        {"error": "Invalid ledger row: {bad"},
+    ]
+
+
+@pytest.mark.django_db
+def test_ledger_endpoint_ndjson(clear_db, create_currencies, create_rates):
+    body = "\n".join(
+        json.dumps(row)
+        for row in (
+            {"date": "2025-03-10", "currency": "USD", "amount": 12.34},
+            {"date": "2025-03-10", "currency": "GBP"},
+        )
+    )
+
+    with patch("rates.service.ledger.fill_missing_rates"):
+        response = APIClient().post(
+            reverse("currency-ledger", kwargs={"version": "v1"})
+            + "?reporting_currency=EUR",
+            body,
+            content_type="application/x-ndjson; charset=utf-8",
+        )
+        content = b"".join(response.streaming_content).decode()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in content.splitlines()]
+    assert rows[0]["value"] == "9.87"
+    assert rows[1]["error"] == "Missing field: amount"
+
+
+@pytest.mark.django_db
+def test_ledger_endpoint_validation(clear_db, create_currencies):
+    url = reverse("currency-ledger", kwargs={"version": "v1"})
+    client = APIClient()
+
+    response = client.post(
+        url + "?reporting_currency=XXX", LEDGER_CSV, content_type="text/csv"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post(
+        url + "?reporting_currency=EUR", LEDGER_CSV, content_type="text/plain"
+    )
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+@pytest.mark.django_db
+def test_convert_ledger_command(clear_db, create_currencies, create_rates, tmp_path):
+    input_path = tmp_path / "ledger.csv"
+    input_path.write_text(LEDGER_CSV)
+    output_path = tmp_path / "ledger_eur.csv"
+
+    call_command(
+        "convert_ledger",
+        str(input_path),
+        reporting_currency="EUR",
+        output=str(output_path),
+        no_fill=True,
+    )
+
+    lines = output_path.read_text().splitlines()
+    assert lines[0] == "id,date,currency,amount,value,rate,error"
+    assert lines[1].startswith("1,2025-03-10,USD,100.00,80.00,")
+    assert len(lines) == 7
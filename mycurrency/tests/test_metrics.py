@@ -0,0 +1,87 @@
+import pytest
+from datetime import date
+from django.test import override_settings
+from django.urls import reverse
+from unittest.mock import patch
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from rates.adapters.adapter_factory import get_exchange_rate_data
+from rates.models import Provider
+from rates.service import metrics
+
+
+@pytest.fixture
+def api_client():
+    """Fixture for the Django REST Framework API client."""
+    return APIClient()
+
+
+@pytest.fixture
+def clear_metrics():
+    """Resets every metric before each test."""
+    metrics.REGISTRY.clear()
+
+
+def test_histogram_rendering(clear_metrics):
+    histogram = metrics.Histogram(
+        "test_latency_seconds", "Test latency.", ("provider",), buckets=(0.1, 1.0)
+    )
+    histogram.observe(0.05, provider="Mock")
+    histogram.observe(0.5, provider="Mock")
+    histogram.observe(5, provider="Mock")
+
+    rendered = histogram.render()
+
+    assert "# TYPE test_latency_seconds histogram" in rendered
+    assert 'test_latency_seconds_bucket{provider="Mock",le="0.1"} 1' in rendered
+    assert 'test_latency_seconds_bucket{provider="Mock",le="1"} 2' in rendered
+    assert 'test_latency_seconds_bucket{provider="Mock",le="+Inf"} 3' in rendered
+    assert 'test_latency_seconds_count{provider="Mock"} 3' in rendered
+    assert 'test_latency_seconds_sum{provider="Mock"} 5.55' in rendered
+
+
+def test_counter_label_escaping(clear_metrics):
+    counter = metrics.Counter("test_total", "Test counter.", ("name",))
+    counter.inc(name='quo"te')
+
+    assert 'test_total{name="quo\\"te"} 1' in counter.render()
+
+
+def test_provider_call_latency_is_recorded(clear_metrics):
+    provider = Provider(name="MockProvider", key="mock_key", priority=2)
+    with patch("rates.adapters.adapter_factory.get_provider", return_value=provider):
+        get_exchange_rate_data(
+            source_currency="USD",
+            exchanged_currency="EUR",
+            date_from=date(2025, 3, 1),
+            date_to=date(2025, 3, 2),
+        )
+
+    assert (
+        metrics.PROVIDER_CALL_SECONDS.count(
+            provider="MockProvider", operation="timeseries", outcome="success"
+        )
+        == 1
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(clear_metrics, api_client):
+    metrics.record_cache_lookup(cache="rates_db", hit=True)
+
+    response = api_client.get(reverse("metrics"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.content.decode()
+    assert 'mycurrency_cache_requests_total{cache="rates_db",result="hit"} 1' in body
+    assert "# TYPE mycurrency_provider_call_seconds histogram" in body
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_disabled(api_client):
+    with override_settings(METRICS_ENABLED=False):
+        response = api_client.get(reverse("metrics"))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,114 @@
+import pytest
+import threading
+from datetime import datetime
+from decimal import Decimal
+from django.test import override_settings
+from unittest.mock import patch
+
+from rates.adapters.exceptions import ProviderError
+from rates.models import BatchProcess, Currency, CurrencyExchangeRate
+from rates.service import microbatch
+from rates.service.latest import get_cache
+from rates.service.rater import get_exchange_convertion
+
+
+RATES = {"EUR": 0.9, "GBP": 0.8, "CHF": 0.95}
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+def fetch_rates(source_currency, exchanged_currency, date_from, date_to):
+    return {
+        date_from.isoformat(): {
+            currency: RATES[currency] for currency in exchanged_currency.split(",")
+        }
+    }, "MockProvider"
+
+
+def request_concurrently(currencies):
+    """Requests the USD rate of every currency from its own thread."""
+    results = {}
+
+    def request(currency):
+        try:
+            results[currency] = microbatch.get_rate("USD", currency)
+        except Exception as e:
+            results[currency] = e
+
+    threads = [
+        threading.Thread(target=request, args=(currency,)) for currency in currencies
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@override_settings(RATES_MICROBATCH_MAX_DELAY=0.5, RATES_MICROBATCH_MAX_BATCH=3)
+def test_concurrent_requests_are_merged():
+    with patch(
+        "rates.service.microbatch.get_exchange_rate_data", side_effect=fetch_rates
+    ) as get_exchange_rate_data, patch(
+        "rates.service.microbatch.store_rates"
+    ) as store_rates:
+        results = request_concurrently(["EUR", "GBP", "CHF"])
+
+    get_exchange_rate_data.assert_called_once()
+    assert get_exchange_rate_data.call_args.kwargs["exchanged_currency"] == (
+        "CHF,EUR,GBP"
+    )
+    store_rates.assert_called_once()
+    assert results == {currency: Decimal(str(rate)) for currency, rate in RATES.items()}
+
+
+@override_settings(RATES_MICROBATCH_MAX_DELAY=0.5, RATES_MICROBATCH_MAX_BATCH=2)
+def test_full_batches_are_fetched_right_away():
+    with patch(
+        "rates.service.microbatch.get_exchange_rate_data", side_effect=fetch_rates
+    ) as get_exchange_rate_data, patch("rates.service.microbatch.store_rates"):
+        results = request_concurrently(["EUR", "GBP", "CHF"])
+
+    assert get_exchange_rate_data.call_count == 2
+    assert set(results) == set(RATES)
+
+
+@override_settings(RATES_MICROBATCH_MAX_DELAY=0.2)
+def test_errors_are_raised_to_every_request():
+    with patch(
+        "rates.service.microbatch.get_exchange_rate_data",
+        side_effect=ProviderError("API request failed: 500"),
+    ) as get_exchange_rate_data:
+        results = request_concurrently(["EUR", "GBP"])
+
+    get_exchange_rate_data.assert_called_once()
+    assert all(isinstance(error, ProviderError) for error in results.values())
+
+
+@pytest.mark.django_db
+@override_settings(RATES_MICROBATCH_ENABLED=True, RATES_MICROBATCH_MAX_DELAY=0)
+def test_convertion_uses_the_merged_rates(clear_db, create_currencies):
+    get_cache().clear()
+    with patch(
+        "rates.service.microbatch.get_exchange_rate_data", side_effect=fetch_rates
+    ), patch("rates.service.rater.get_exchange_convertion_data") as convert:
+        data = get_exchange_convertion("USD", "EUR", Decimal("10"))
+
+    convert.assert_not_called()
+    assert data["value"] == Decimal("9.00")
+    assert data["date"] == datetime.now().date().isoformat()
+    assert CurrencyExchangeRate.objects.get(
+        exchanged_currency__code="EUR"
+    ).rate_value == Decimal("0.9")
@@ -0,0 +1,113 @@
+import pytest
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from rates.models import BatchProcess, Currency
+from rates.service.common import save_data
+from rates.service.latest import get_latest_rate
+from rates.service.money import convert, convert_many, implied_rate, to_decimal
+from rates.service.rater import get_exchange_convertion
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="JPY", name="Japanese Yen", symbol="¥")
+
+
+@pytest.mark.parametrize(
+    "amount, rate, currency, expected, description",
+    [
+        ("10", "0.921234", "EUR", Decimal("9.21"), "Rounded to cents"),
+        (Decimal("0.10"), 0.1, "EUR", Decimal("0.01"), "Float rate read exactly"),
+        ("0.125", "1", "EUR", Decimal("0.12"), "Half even rounding"),
+        ("100", "149.567", "JPY", Decimal("14957"), "No minor unit"),
+        ("100", "0.307123", "KWD", Decimal("30.712"), "Three decimal places"),
+    ],
+)
+def test_convert(amount, rate, currency, expected, description):
+    converted = convert(amount, rate, currency)
+
+    assert converted == expected, description
+    assert converted.as_tuple().exponent == expected.as_tuple().exponent, description
+
+
+def test_convert_many_matches_convert():
+    amounts = [Decimal(cents).scaleb(-2) for cents in range(1, 1000)] + ["12.5", 7]
+
+    assert convert_many(amounts, "0.921234", "EUR") == [
+        convert(amount, "0.921234", "EUR") for amount in amounts
+    ]
+
+
+@override_settings(
+    RATES_ROUNDING=ROUND_HALF_UP, RATES_CURRENCY_DECIMAL_PLACES={"EUR": 3}
+)
+def test_rounding_settings():
+    assert convert_many(["0.1245", "1"], "1", "EUR") == [
+        Decimal("0.125"),
+        Decimal("1.000"),
+    ]
+
+
+@pytest.mark.parametrize("value", ["dummy value", "NaN", Decimal("Infinity"), None])
+def test_invalid_numbers(value):
+    with pytest.raises(ValueError):
+        to_decimal(value)
+
+
+def test_implied_rate():
+    assert implied_rate(Decimal("3"), 1.0) == Decimal("0.333333")
+    with pytest.raises(ValueError):
+        implied_rate(Decimal("0"), 1.0)
+
+
+@pytest.mark.django_db
+def test_converter_keeps_the_string_amount_exact(clear_db, create_currencies):
+    save_data(data={date.today().isoformat(): {"EUR": 0.1}}, source_currency="USD")
+
+    response = APIClient().get(
+        reverse("currency-converter", kwargs={"version": "v1"}),
+        {"source_currency": "USD", "exchanged_currency": "EUR", "amount": "0.30"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["amount"] == Decimal("0.30")
+    assert response.data["value"] == Decimal("0.03")
+
+
+@pytest.mark.django_db
+def test_provider_convertion_is_rounded_after_storing_its_rate(
+    clear_db, create_currencies
+):
+    with patch(
+        "rates.service.rater.get_exchange_convertion_data",
+        return_value=(
+            {
+                "date": date.today().isoformat(),
+                "source_currency": "USD",
+                "exchanged_currency": "EUR",
+                "amount": Decimal("1"),
+                "value": 0.9212345,
+            },
+            "MockProvider",
+        ),
+    ):
+        convertion = get_exchange_convertion("USD", "EUR", Decimal("1"))
+
+    assert convertion["value"] == Decimal("0.92")
+    assert get_latest_rate("USD", "EUR").rate_value == Decimal("0.921234")
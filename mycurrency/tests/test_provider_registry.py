@@ -0,0 +1,70 @@
+import pytest
+from django.test import override_settings
+from unittest.mock import patch
+
+from rates.adapters.adapter_factory import aget_provider, get_adapter, get_provider
+from rates.adapters.provider_registry import (
+    get_enabled_providers,
+    invalidate_provider_registry,
+)
+from rates.models import Provider
+
+from .query_budget import assert_max_queries
+
+
+@pytest.fixture
+def clear_registry():
+    """Empties the provider registry before each test."""
+    invalidate_provider_registry()
+
+
+@pytest.mark.django_db
+def test_providers_are_cached(clear_registry):
+    provider = get_provider()
+
+    with assert_max_queries(0):
+        assert get_provider() == provider
+        assert get_adapter(provider) is get_adapter(get_provider())
+
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_providers_are_cached_async(clear_registry):
+    provider = await aget_provider()
+
+    with patch("rates.adapters.provider_registry.Provider.objects") as objects:
+        assert await aget_provider() == provider
+    objects.filter.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_saving_a_provider_refreshes_the_registry(clear_registry):
+    provider = Provider.objects.get(name="SnapshotProvider")
+    was_enabled = provider.is_enabled
+    try:
+        provider.is_enabled = not was_enabled
+        provider.save()
+        assert (provider in get_enabled_providers()) is not was_enabled
+
+        provider.is_enabled = was_enabled
+        provider.save()
+        assert (provider in get_enabled_providers()) is was_enabled
+    finally:
+        Provider.objects.filter(pk=provider.pk).update(is_enabled=was_enabled)
+
+
+@pytest.mark.django_db
+@override_settings(RATES_PROVIDER_REGISTRY_TIMEOUT=0)
+def test_providers_expire(clear_registry):
+    get_enabled_providers()
+
+    with assert_max_queries(1) as context:
+        get_enabled_providers()
+    assert len(context.captured_queries) == 1
+
+
+def test_adapters_depend_on_the_provider_key(clear_registry):
+    adapter = get_adapter(Provider(name="MockProvider", key="seed=1"))
+
+    assert get_adapter(Provider(name="MockProvider", key="seed=1")) is adapter
+    assert get_adapter(Provider(name="MockProvider", key="seed=2")) is not adapter
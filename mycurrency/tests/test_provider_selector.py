@@ -0,0 +1,100 @@
+import pytest
+from datetime import date
+from django.test import override_settings
+from unittest.mock import patch
+
+from rates.adapters import provider_selector
+from rates.adapters.adapter_factory import get_exchange_rate_data
+from rates.adapters.exceptions import ProviderError
+from rates.adapters.provider_selector import choose_provider, record_call
+from rates.models import Provider
+from rates.service import metrics
+
+PRIMARY = Provider(name="Primary", key="", priority=1)
+SECONDARY = Provider(name="Secondary", key="", priority=2)
+FALLBACK = Provider(name="Fallback", key="", priority=100)
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    """Forgets the statistics of the providers before each test."""
+    provider_selector.reset_stats()
+    metrics.REGISTRY.clear()
+    yield
+    provider_selector.reset_stats()
+
+
+def record_calls(provider: Provider, seconds: float, successes: int, errors: int = 0):
+    for _ in range(successes):
+        record_call(provider.name, seconds, True)
+    for _ in range(errors):
+        record_call(provider.name, seconds, False)
+
+
+def test_priority_wins_without_statistics():
+    assert choose_provider([PRIMARY, SECONDARY]) == (PRIMARY, "priority")
+
+
+def test_unhealthy_primary_is_demoted():
+    record_calls(PRIMARY, 0.1, successes=2, errors=3)
+    assert choose_provider([PRIMARY, SECONDARY, FALLBACK]) == (SECONDARY, "failover")
+
+    record_calls(SECONDARY, 0.1, successes=0, errors=5)
+    assert choose_provider([PRIMARY, SECONDARY, FALLBACK]) == (FALLBACK, "failover")
+
+    record_calls(FALLBACK, 0.1, successes=0, errors=5)
+    assert choose_provider([PRIMARY, SECONDARY, FALLBACK]) == (PRIMARY, "fallback")
+
+
+def test_few_errors_keep_the_primary():
+    record_calls(PRIMARY, 0.1, successes=0, errors=4)
+    assert choose_provider([PRIMARY, SECONDARY]) == (PRIMARY, "priority")
+
+
+@override_settings(RATES_PROVIDER_STATS_MAX_AGE=0)
+def test_failures_age_out():
+    record_calls(PRIMARY, 0.1, successes=0, errors=5)
+    assert choose_provider([PRIMARY, SECONDARY]) == (PRIMARY, "priority")
+
+
+def test_faster_provider_wins_within_the_band():
+    record_calls(PRIMARY, 1.0, successes=5)
+    record_calls(SECONDARY, 0.5, successes=5)
+    record_calls(FALLBACK, 0.01, successes=5)
+    assert choose_provider([PRIMARY, SECONDARY, FALLBACK]) == (PRIMARY, "priority")
+
+    with override_settings(RATES_PROVIDER_PRIORITY_BAND=10):
+        assert choose_provider([PRIMARY, SECONDARY, FALLBACK]) == (
+            SECONDARY,
+            "latency",
+        )
+        # Within the margin, the priority breaks the tie
+        record_calls(PRIMARY, 0.6, successes=45)
+        assert choose_provider([PRIMARY, SECONDARY]) == (PRIMARY, "priority")
+
+
+@override_settings(BASE_DIR="/nonexistent")
+def test_provider_calls_feed_the_selection():
+    def fail(**kwargs):
+        raise ProviderError("API request failed: 500")
+
+    primary = Provider(name="MockProvider", key="", priority=1)
+    secondary = Provider(name="SnapshotProvider", key="", priority=2)
+    with patch(
+        "rates.adapters.adapter_factory.get_enabled_providers",
+        return_value=[primary, secondary],
+    ), patch(
+        "rates.adapters.currencymock_adapter.CurrencyMockAdapter.get_exchange_rate_data",
+        side_effect=fail,
+    ):
+        for _ in range(5):
+            with pytest.raises(ProviderError):
+                get_exchange_rate_data("USD", "EUR", date(2025, 3, 1), date(2025, 3, 2))
+        with pytest.raises(ProviderError, match="snapshot not found"):
+            get_exchange_rate_data("USD", "EUR", date(2025, 3, 1), date(2025, 3, 2))
+
+    assert metrics.PROVIDER_ERROR_RATE.get(provider="MockProvider") == 1
+    assert (
+        metrics.PROVIDER_SELECTIONS.get(provider="SnapshotProvider", reason="failover")
+        == 1
+    )
@@ -0,0 +1,147 @@
+import pytest
+from datetime import date, datetime, timedelta
+from django.test import override_settings
+from django.urls import reverse
+from unittest.mock import patch
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from rates.models import (
+    BatchProcess,
+    Currency,
+    CurrencyExchangeRate,
+    LatestExchangeRate,
+)
+from tests.query_budget import assert_max_queries
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def api_client():
+    """Fixture for the Django REST Framework API client."""
+    return APIClient()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+@pytest.fixture
+def create_rates(create_currencies):
+    """
+    Fixture storing USD/EUR rates from 2025-03-10 to 2025-03-15 and for today, which
+    is also the latest rate.
+    """
+    usd = Currency.objects.get(code="USD")
+    eur = Currency.objects.get(code="EUR")
+    valuation_dates = [date(2025, 3, 10) + timedelta(days=i) for i in range(6)]
+    valuation_dates.append(datetime.now().date())
+    for valuation_date in valuation_dates:
+        CurrencyExchangeRate.objects.get_or_create(
+            source_currency=usd,
+            exchanged_currency=eur,
+            valuation_date=valuation_date,
+            defaults={"rate_value": 0.92},
+        )
+    LatestExchangeRate.objects.update_or_create(
+        source_currency=usd,
+        exchanged_currency=eur,
+        defaults={"rate_value": 0.92, "valuation_date": valuation_dates[-1]},
+    )
+
+
+@pytest.mark.django_db
+def test_currency_rates_query_budget(clear_db, api_client, create_rates):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    with assert_max_queries(4):
+        response = api_client.get(
+            url,
+            {
+                "source_currency": "USD",
+                "date_from": "2025-03-10",
+                "date_to": "2025-03-15",
+            },
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 6
+
+
+@pytest.mark.django_db
+def test_currency_converter_query_budget(clear_db, api_client, create_rates):
+    url = reverse("currency-converter", kwargs={"version": "v1"})
+    with assert_max_queries(2):
+        response = api_client.get(
+            url, {"source_currency": "USD", "exchanged_currency": "EUR", "amount": 10}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["exchanged_currency"] == "EUR"
+
+
+@pytest.mark.django_db
+def test_converter_form_query_budget(clear_db, api_client, create_currencies):
+    with assert_max_queries(2):
+        response = api_client.get(reverse("converter"))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_currency_history_rates_query_budget(clear_db, api_client, create_currencies):
+    url = reverse("currency-history-rates", kwargs={"version": "v2"})
+    with patch("rates.views.batch_process", return_value="process-id"):
+        with assert_max_queries(1):
+            response = api_client.post(
+                url,
+                {
+                    "source_currency": "USD",
+                    "date_from": "2025-03-10",
+                    "date_to": "2025-03-15",
+                },
+            )
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_server_timing_header(clear_db, api_client, create_rates):
+    url = reverse("currency-converter", kwargs={"version": "v1"})
+    response = api_client.get(
+        url,
+        {"source_currency": "USD", "exchanged_currency": "EUR", "amount": 10},
+        HTTP_X_PROFILE_REQUEST="1",
+    )
+
+    server_timing = response["Server-Timing"]
+    assert 'desc="2 queries"' in server_timing
+    assert 'provider;dur=0.00;desc="0 calls"' in server_timing
+    assert "total;dur=" in server_timing
+
+
+@pytest.mark.django_db
+def test_slow_request_profile_dump(clear_db, api_client, create_rates, tmp_path):
+    url = reverse("currency-converter", kwargs={"version": "v1"})
+    with override_settings(
+        REQUEST_PROFILING_ENABLED=True,
+        REQUEST_PROFILING_SLOW_MS=0,
+        REQUEST_PROFILING_DUMP_DIR=str(tmp_path),
+    ):
+        response = api_client.get(
+            url, {"source_currency": "USD", "exchanged_currency": "EUR", "amount": 10}
+        )
+
+    assert "Server-Timing" in response
+    dumps = list(tmp_path.iterdir())
+    assert len(dumps) == 1
+    assert "-currency-converter-" in dumps[0].name
+    assert dumps[0].suffix == ".prof"
@@ -0,0 +1,139 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from decimal import Decimal
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from rates.models import BatchProcess, Currency
+from rates.renderers import ORJSONRenderer
+from rates.views import AsyncFastCurrencyConverterView, FastCurrencyRateView
+
+
+RATES = {
+    "2025-03-{:02d}".format(day): {"USD/EUR": 0.92, "USD/GBP": 0.84}
+    for day in range(1, 32)
+}
+RATES_QUERY = {
+    "source_currency": "USD",
+    "date_from": "2025-03-01",
+    "date_to": "2025-03-31",
+}
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def api_client():
+    """Fixture for the Django REST Framework API client."""
+    return APIClient()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+def test_orjson_renderer_matches_json_renderer():
+    data = {
+        "amount": Decimal("10.50"),
+        "error": gettext_lazy("Invalid date range"),
+        "rates": RATES,
+    }
+    rendered = ORJSONRenderer().render(data)
+
+    assert json.loads(rendered) == json.loads(JSONRenderer().render(data))
+    assert json.loads(rendered)["amount"] == 10.5
+
+
+@pytest.mark.django_db
+def test_rates_are_gzip_compressed(clear_db, api_client, create_currencies):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    with patch("rates.views.get_exchange_rates", return_value=RATES), patch(
+        "rates.middleware.brotli", None
+    ):
+        response = api_client.get(url, RATES_QUERY, HTTP_ACCEPT_ENCODING="gzip, br")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Encoding"] == "gzip"
+    assert response["ETag"].startswith('W/"')
+    assert "Accept-Encoding" in response["Vary"]
+
+
+@pytest.mark.django_db
+def test_rates_are_brotli_compressed(clear_db, api_client, create_currencies):
+    brotli = MagicMock()
+    brotli.compress.return_value = b"compressed"
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    with patch("rates.views.get_exchange_rates", return_value=RATES), patch(
+        "rates.middleware.brotli", brotli
+    ):
+        response = api_client.get(url, RATES_QUERY, HTTP_ACCEPT_ENCODING="gzip, br")
+
+    assert response["Content-Encoding"] == "br"
+    assert response.content == b"compressed"
+
+
+@pytest.mark.django_db
+def test_small_responses_are_not_compressed(clear_db, api_client, create_currencies):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    response = api_client.get(
+        url, dict(RATES_QUERY, source_currency="XXX"), HTTP_ACCEPT_ENCODING="gzip"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not response.has_header("Content-Encoding")
+
+
+@pytest.mark.django_db
+def test_fast_currency_rates_view(clear_db, create_currencies):
+    request = APIRequestFactory().get("/api/v1/currency-rates/", RATES_QUERY)
+    with patch("rates.views.get_exchange_rates", return_value=RATES):
+        response = FastCurrencyRateView.as_view()(request, version="v1")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/json"
+    assert response.has_header("ETag")
+    assert json.loads(response.content) == RATES
+
+    request = APIRequestFactory().get(
+        "/api/v1/currency-rates/", dict(RATES_QUERY, source_currency="XXX")
+    )
+    response = FastCurrencyRateView.as_view()(request, version="v1")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert json.loads(response.content) == {"error": "Invalid source_currency: XXX"}
+
+
+@pytest.mark.django_db
+def test_async_fast_currency_converter_view(clear_db, create_currencies):
+    request = APIRequestFactory().get(
+        "/api/v1/currency-converter/",
+        {"source_currency": "USD", "exchanged_currency": "EUR", "amount": "10"},
+    )
+    convertion = {
+        "date": "2025-03-10",
+        "source_currency": "USD",
+        "exchanged_currency": "EUR",
+        "amount": Decimal("10.00"),
+        "value": Decimal("9.2"),
+    }
+    with patch(
+        "rates.views.aget_exchange_convertion", new=AsyncMock(return_value=convertion)
+    ):
+        response = async_to_sync(AsyncFastCurrencyConverterView.as_view())(
+            request, version="v1"
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert json.loads(response.content)["value"] == 9.2
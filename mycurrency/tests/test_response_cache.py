@@ -0,0 +1,135 @@
+import pytest
+from datetime import date, timedelta
+from django.test import override_settings
+from django.utils import timezone
+from unittest.mock import MagicMock, patch
+
+from rates.adapters import adapter_factory, provider_selector
+from rates.adapters.currencybeacon_adapter import CurrencyBeaconAdapter
+from rates.adapters.response_cache import ResponseCache, fingerprint
+from rates.models import Provider
+from rates.service import metrics
+
+
+@pytest.fixture
+def clear_metrics():
+    """Resets every metric before each test."""
+    metrics.REGISTRY.clear()
+
+
+@pytest.fixture
+def cache_settings(tmp_path):
+    """Enables the provider response cache in a temporary database."""
+    with override_settings(
+        RATES_PROVIDER_CACHE_PATH=str(tmp_path / "provider_cache.sqlite3"),
+        RATES_PROVIDER_CACHE_TTL=3600,
+    ):
+        yield
+
+
+def mock_response(data: dict):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"response": data}
+    return response
+
+
+def get_time_series(date_from: date, date_to: date) -> dict:
+    """Fetches a time series like the adapter factory, cached response first."""
+    adapter = CurrencyBeaconAdapter(api_key="key")
+    params = dict(
+        source_currency="USD",
+        exchanged_currency="EUR",
+        date_from=date_from,
+        date_to=date_to,
+    )
+    data = adapter.get_cached_exchange_rate_data(**params)
+    return adapter.get_exchange_rate_data(**params) if data is None else data
+
+
+def test_fingerprint_ignores_the_order_of_the_params():
+    assert fingerprint("P", "timeseries", {"a": 1, "b": 2}) == fingerprint(
+        "P", "timeseries", {"b": 2, "a": 1}
+    )
+    assert fingerprint("P", "timeseries", {"a": 1}) != fingerprint(
+        "Q", "timeseries", {"a": 1}
+    )
+
+
+def test_past_time_series_are_served_from_the_cache(cache_settings, clear_metrics):
+    data = {"2025-03-10": {"EUR": 0.92}}
+    with patch("rates.adapters.currencybeacon_adapter.get_session") as get_session:
+        get_session.return_value.get.return_value = mock_response(data)
+        assert get_time_series(date(2025, 3, 10), date(2025, 3, 10)) == data
+        assert get_time_series(date(2025, 3, 10), date(2025, 3, 10)) == data
+        get_time_series(date(2025, 3, 10), date(2025, 3, 11))
+
+    assert get_session.return_value.get.call_count == 2
+    assert metrics.CACHE_REQUESTS.get(cache="provider_response", result="hit") == 1
+    assert metrics.CACHE_REQUESTS.get(cache="provider_response", result="miss") == 2
+
+
+def test_current_time_series_expire(cache_settings):
+    today = timezone.now().date()
+    with override_settings(RATES_PROVIDER_CACHE_TTL=0), patch(
+        "rates.adapters.currencybeacon_adapter.get_session"
+    ) as get_session:
+        get_session.return_value.get.return_value = mock_response({})
+        get_time_series(today - timedelta(days=1), today)
+        get_time_series(today - timedelta(days=1), today)
+
+    assert get_session.return_value.get.call_count == 2
+
+
+def test_failed_requests_are_not_cached(cache_settings):
+    with patch("rates.adapters.currencybeacon_adapter.get_session") as get_session:
+        get_session.return_value.get.return_value = MagicMock(
+            status_code=500, text='{"meta": {"error_detail": "Server error"}}'
+        )
+        for _ in range(2):
+            with pytest.raises(ValueError, match="500"):
+                get_time_series(date(2025, 3, 10), date(2025, 3, 10))
+
+    assert get_session.return_value.get.call_count == 2
+
+
+def test_least_recently_used_responses_are_evicted(tmp_path, clear_metrics):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=10**6)
+    for key in ("a", "b", "c"):
+        cache.set(key, {"rates": [key * 100]})
+    cache.get("a")
+    cache.max_bytes = cache.get_size() - 1
+
+    cache.set("d", {"rates": ["d"]})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
+    assert metrics.PROVIDER_CACHE_BYTES.get() == cache.get_size() <= cache.max_bytes
+
+
+def test_cached_responses_are_not_tracked_as_provider_calls(
+    cache_settings, clear_metrics
+):
+    provider_selector.reset_stats()
+    provider = Provider(name="CurrencyBeacon", key="key", priority=1)
+    with patch(
+        "rates.adapters.adapter_factory.get_provider", return_value=provider
+    ), patch("rates.adapters.currencybeacon_adapter.get_session") as get_session:
+        get_session.return_value.get.return_value = mock_response({})
+        for _ in range(2):
+            adapter_factory.get_exchange_rate_data(
+                source_currency="USD",
+                exchanged_currency="EUR",
+                date_from=date(2025, 3, 10),
+                date_to=date(2025, 3, 10),
+            )
+
+    assert get_session.return_value.get.call_count == 1
+    assert (
+        metrics.PROVIDER_CALL_SECONDS.count(
+            provider="CurrencyBeacon", operation="timeseries", outcome="success"
+        )
+        == 1
+    )
+    with provider_selector._stats_lock:
+        assert len(provider_selector.get_stats("CurrencyBeacon").calls) == 1
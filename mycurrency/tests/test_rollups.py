@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from rates.models import BatchProcess, Currency, RateRollup
+from rates.service.common import save_data
+from rates.service.rollups import get_period_end, get_period_start, refresh_rollups
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def api_client():
+    """Fixture for the Django REST Framework API client."""
+    return APIClient()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+def march_rates(days):
+    """USD/EUR rates of March 2025, 1.0 + day / 100."""
+    return {date(2025, 3, day).isoformat(): {"EUR": 1 + day / 100} for day in days}
+
+
+def get_rollups():
+    return {
+        (rollup.resolution, rollup.period_start): rollup
+        for rollup in RateRollup.objects.filter(source_currency__code="USD")
+    }
+
+
+@pytest.mark.parametrize(
+    "valuation_date, resolution, period_start, period_end",
+    [
+        (date(2025, 3, 12), "week", date(2025, 3, 10), date(2025, 3, 16)),
+        (date(2025, 3, 10), "week", date(2025, 3, 10), date(2025, 3, 16)),
+        (date(2025, 3, 16), "week", date(2025, 3, 10), date(2025, 3, 16)),
+        (date(2025, 2, 12), "month", date(2025, 2, 1), date(2025, 2, 28)),
+        (date(2024, 12, 31), "month", date(2024, 12, 1), date(2024, 12, 31)),
+    ],
+)
+def test_rollup_periods(valuation_date, resolution, period_start, period_end):
+    assert get_period_start(valuation_date, resolution) == period_start
+    assert get_period_end(valuation_date, resolution) == period_end
+
+
+@pytest.mark.django_db
+def test_rollups_are_incremental(clear_db, create_currencies):
+    save_data(data=march_rates([12, 13]), source_currency="USD")
+    save_data(data=march_rates([10, 11, 14, 15, 16]), source_currency="USD")
+
+    week = get_rollups()[("week", date(2025, 3, 10))]
+    values = [1 + day / 100 for day in range(10, 17)]
+    mean = sum(values) / len(values)
+    assert (week.open_date, week.open_value) == (date(2025, 3, 10), Decimal("1.1"))
+    assert (week.close_date, week.close_value) == (date(2025, 3, 16), Decimal("1.16"))
+    assert (week.low_value, week.high_value) == (Decimal("1.1"), Decimal("1.16"))
+    assert week.count == 7
+    assert week.mean == pytest.approx(mean)
+    assert week.stddev == pytest.approx(
+        (sum((value - mean) ** 2 for value in values) / len(values)) ** 0.5
+    )
+
+    incremental = {
+        key: (rollup.open_value, rollup.close_value, rollup.count)
+        for key, rollup in get_rollups().items()
+    }
+    call_command("rebuild_rollups", "USD")
+    assert incremental == {
+        key: (rollup.open_value, rollup.close_value, rollup.count)
+        for key, rollup in get_rollups().items()
+    }
+
+
+@pytest.mark.django_db
+def test_rollups_count_stored_rates_once(clear_db, create_currencies):
+    save_data(data=march_rates([10, 11]), source_currency="USD")
+    # A concurrent ingestion of the same rates, past its check of the stored ones
+    usd, eur = Currency.objects.get(code="USD"), Currency.objects.get(code="EUR")
+    refresh_rollups(usd.id, [(eur.id, date(2025, 3, 10)), (eur.id, date(2025, 3, 11))])
+
+    assert get_rollups()[("week", date(2025, 3, 10))].count == 2
+    assert get_rollups()[("month", date(2025, 3, 1))].count == 2
+
+
+@pytest.mark.django_db
+def test_currency_rates_monthly_resolution(clear_db, api_client, create_currencies):
+    save_data(data=march_rates(range(1, 32)), source_currency="USD")
+
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    response = api_client.get(
+        url,
+        {
+            "source_currency": "USD",
+            "date_from": "2025-03-10",
+            "date_to": "2025-03-15",
+            "resolution": "month",
+        },
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    month = response.json()["2025-03-01"]["USD/EUR"]
+    assert month["open"] == 1.01
+    assert month["close"] == 1.31
+    assert month["high"] == 1.31
+    assert month["low"] == 1.01
+    assert month["count"] == 31
+    assert month["mean"] == pytest.approx(1.16)
+
+
+@pytest.mark.django_db
+def test_currency_rates_invalid_resolution(clear_db, api_client, create_currencies):
+    url = reverse("currency-rates", kwargs={"version": "v1"})
+    response = api_client.get(
+        url,
+        {
+            "source_currency": "USD",
+            "date_from": "2025-03-10",
+            "date_to": "2025-03-15",
+            "resolution": "year",
+        },
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["error"] == "Invalid resolution: year"
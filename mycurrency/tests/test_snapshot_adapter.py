@@ -0,0 +1,107 @@
+import math
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.test import override_settings
+
+from rates.adapters.adapter_factory import get_adapter
+from rates.adapters.exceptions import ProviderError
+from rates.adapters.snapshot_adapter import SnapshotAdapter, get_snapshot
+from rates.models import BatchProcess, Currency, Provider
+from rates.service.archive import export_rates
+from rates.service.common import save_data
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="GBP", name="Pound Sterling", symbol="£")
+
+
+@pytest.fixture
+def snapshot_path(clear_db, create_currencies, tmp_path):
+    """Snapshot of USD and EUR rates, without rates on 2025-03-12 and 2025-03-13."""
+    days = [10, 11, 14]
+    save_data(
+        data={
+            date(2025, 3, day).isoformat(): {"EUR": 0.5, "GBP": 0.4 + day / 100}
+            for day in days
+        },
+        source_currency="USD",
+    )
+    save_data(data={"2025-03-14": {"GBP": 0.9}}, source_currency="EUR")
+    path = str(tmp_path / "rates.snapshot")
+    assert export_rates(path) == 7
+    return path
+
+
+@pytest.mark.django_db
+def test_snapshot_rates(snapshot_path):
+    adapter = SnapshotAdapter(api_key=snapshot_path)
+    data = adapter.get_exchange_rate_data(
+        source_currency="USD",
+        exchanged_currency="EUR,GBP",
+        date_from=date(2025, 3, 1),
+        date_to=date(2025, 3, 31),
+    )
+
+    assert list(data) == ["2025-03-10", "2025-03-11", "2025-03-14"]
+    assert data["2025-03-11"] == {"EUR": 0.5, "GBP": 0.51}
+    # EUR has its own rates, only on 2025-03-14
+    assert adapter.get_exchange_rate_data(
+        source_currency="EUR",
+        exchanged_currency="GBP",
+        date_from=date(2025, 3, 10),
+        date_to=date(2025, 3, 14),
+    ) == {"2025-03-14": {"GBP": 0.9}}
+
+
+@pytest.mark.django_db
+def test_snapshot_triangulates_other_source_currencies(snapshot_path):
+    rates = get_snapshot(snapshot_path).get_rates("GBP", date(2025, 3, 10))
+
+    assert math.isclose(rates["EUR"], 0.5 / 0.5)
+    assert math.isclose(rates["USD"], 1 / 0.5)
+    assert get_snapshot(snapshot_path).get_rates("JPY", date(2025, 3, 10)) == {}
+
+
+@pytest.mark.django_db
+def test_snapshot_convertion_uses_the_latest_rate(snapshot_path):
+    data = SnapshotAdapter(api_key=snapshot_path).get_exchange_convertion_data(
+        source_currency="USD", exchanged_currency="GBP", amount=Decimal("10")
+    )
+
+    assert data["date"] == "2025-03-14"
+    assert math.isclose(data["value"], 5.4)
+    with pytest.raises(ProviderError, match="Convertion rate not found"):
+        SnapshotAdapter(api_key=snapshot_path).get_exchange_convertion_data(
+            source_currency="USD", exchanged_currency="JPY", amount=Decimal("10")
+        )
+
+
+@pytest.mark.django_db
+def test_snapshot_is_reopened_when_exported_again(snapshot_path):
+    snapshot = get_snapshot(snapshot_path)
+    assert get_snapshot(snapshot_path) is snapshot
+
+    export_rates(snapshot_path, source_currencies=["EUR"])
+    assert get_snapshot(snapshot_path) is not snapshot
+    assert list(get_snapshot(snapshot_path).sources) == ["EUR"]
+
+
+@override_settings(BASE_DIR="/nonexistent")
+def test_snapshot_provider_without_snapshot():
+    adapter = get_adapter(Provider(name="SnapshotProvider", key="rates.snapshot"))
+
+    assert adapter.path == "/nonexistent/rates.snapshot"
+    with pytest.raises(ProviderError, match="not found"):
+        adapter.warm_up(timeout=1)
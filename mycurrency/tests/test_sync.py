@@ -0,0 +1,101 @@
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.test import override_settings
+from unittest.mock import patch
+
+from rates.models import BatchProcess, Currency, LatestExchangeRate, SyncWatermark
+from rates.service.latest import get_cache, get_cache_key
+from rates.service.sync import get_sync_date_from, sync_latest_rates
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+    get_cache().clear()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+def fake_rates(source_currency, exchanged_currency, date_from, date_to):
+    rate = 0.9 if source_currency == "USD" else 1.1
+    data = {
+        date.fromordinal(ordinal).isoformat(): {
+            code: rate for code in exchanged_currency.split(",")
+        }
+        for ordinal in range(date_from.toordinal(), date_to.toordinal() + 1)
+    }
+    return data, "MockProvider"
+
+
+@pytest.mark.parametrize(
+    "synced_until, expected",
+    [
+        (None, date(2025, 3, 3)),
+        (date(2025, 3, 8), date(2025, 3, 8)),
+        (date(2025, 3, 10), date(2025, 3, 10)),
+        (date(2025, 1, 1), date(2025, 3, 3)),
+    ],
+)
+@override_settings(RATES_SYNC_MAX_DAYS=7)
+def test_sync_date_from(synced_until, expected):
+    watermark = SyncWatermark(synced_until=synced_until)
+    assert get_sync_date_from(watermark, date(2025, 3, 10)) == expected
+
+
+@pytest.mark.django_db
+@override_settings(RATES_SYNC_MAX_DAYS=2, RATES_SYNC_SLEEP_TIME=0)
+def test_sync_latest_rates(clear_db, create_currencies):
+    with patch(
+        "rates.service.sync.get_exchange_rate_data", side_effect=fake_rates
+    ) as mock_get_exchange_rate_data:
+        results = sync_latest_rates(today=date(2025, 3, 10))
+        assert results == {"EUR": 3, "USD": 3}
+        assert mock_get_exchange_rate_data.call_args.kwargs["date_from"] == date(
+            2025, 3, 8
+        )
+
+        # Next run only fetches the current day again
+        results = sync_latest_rates(["USD"], today=date(2025, 3, 10))
+        assert results == {"USD": 0}
+        assert mock_get_exchange_rate_data.call_args.kwargs["date_from"] == date(
+            2025, 3, 10
+        )
+
+    watermark = SyncWatermark.objects.get(source_currency__code="USD")
+    assert watermark.synced_until == date(2025, 3, 10)
+    assert watermark.last_error == ""
+    latest_rate = get_cache().get(get_cache_key("USD", "EUR"))
+    assert latest_rate.valuation_date == date(2025, 3, 10)
+    assert LatestExchangeRate.objects.count() == 2
+
+
+@pytest.mark.django_db
+@override_settings(RATES_SYNC_SLEEP_TIME=0)
+def test_sync_latest_rates_failure(clear_db, create_currencies):
+    def fail_for_eur(source_currency, **kwargs):
+        if source_currency == "EUR":
+            raise ValueError("Provider unavailable")
+        return fake_rates(source_currency, **kwargs)
+
+    with patch("rates.service.sync.get_exchange_rate_data", side_effect=fail_for_eur):
+        results = sync_latest_rates(today=date(2025, 3, 10))
+
+    assert results["EUR"] is None
+    assert results["USD"] > 0
+    watermark = SyncWatermark.objects.get(source_currency__code="EUR")
+    assert watermark.synced_until is None
+    assert watermark.last_error == "Provider unavailable"
+
+
+@pytest.mark.django_db
+def test_sync_latest_rates_command_unknown_currency(clear_db, create_currencies):
+    with pytest.raises(Exception, match="Unknown currencies: XXX"):
+        call_command("sync_latest_rates", "XXX")
@@ -0,0 +1,108 @@
+import pytest
+from datetime import date
+from django.test import override_settings
+from unittest.mock import patch
+
+from rates.adapters.currencybeacon_adapter import CurrencyBeaconAdapter
+from rates.models import (
+    BatchProcess,
+    Currency,
+    LatestExchangeRate,
+    Provider,
+    RatePairUsage,
+)
+from rates.service.currencies import get_currency_codes
+from rates.service.latest import get_cache, get_cache_key
+from rates.service.usage import flush_pair_usage, record_pair_usage, take_pending
+from rates.service.warmup import warm_up
+from tests.query_budget import assert_max_queries
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+    get_cache().clear()
+    take_pending()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+    Currency.objects.get_or_create(code="GBP", name="Pound Sterlin", symbol="£")
+
+
+@pytest.mark.django_db
+@override_settings(RATES_USAGE_FLUSH_SIZE=1000, RATES_USAGE_FLUSH_INTERVAL=3600)
+def test_pair_usage_is_flushed_in_batches(clear_db, create_currencies):
+    for _ in range(3):
+        record_pair_usage("USD", "EUR")
+    record_pair_usage("USD", "GBP")
+    assert not RatePairUsage.objects.exists()
+
+    assert flush_pair_usage() == 2
+    record_pair_usage("USD", "EUR")
+    assert flush_pair_usage() == 1
+
+    hits = dict(RatePairUsage.objects.values_list("exchanged_currency__code", "hits"))
+    assert hits == {"EUR": 4, "GBP": 1}
+
+
+@pytest.mark.django_db
+def test_currency_registry_is_cached(clear_db, create_currencies):
+    assert get_currency_codes() == {"USD", "EUR", "GBP"}
+    with assert_max_queries(0):
+        get_currency_codes()
+
+    Currency.objects.create(code="JPY", name="Yen", symbol="¥")
+    assert "JPY" in get_currency_codes()
+
+
+@pytest.mark.django_db
+@override_settings(RATES_WARMUP_TOP_PAIRS=1)
+def test_warm_up_loads_top_pairs(clear_db, create_currencies):
+    currencies = Currency.objects.in_bulk(field_name="code")
+    for code, hits in (("EUR", 10), ("GBP", 1)):
+        RatePairUsage.objects.create(
+            source_currency=currencies["USD"],
+            exchanged_currency=currencies[code],
+            hits=hits,
+        )
+        LatestExchangeRate.objects.create(
+            source_currency=currencies["USD"],
+            exchanged_currency=currencies[code],
+            rate_value="0.9",
+            valuation_date=date(2025, 3, 10),
+        )
+    get_cache().clear()
+
+    with patch(
+        "rates.service.warmup.get_provider",
+        return_value=Provider(name="MockProvider", key=""),
+    ):
+        report = warm_up(budget=10)
+
+    assert list(report["steps"]) == ["currencies", "latest_rates", "provider"]
+    assert report["steps"]["latest_rates"]["items"] == 1
+    assert get_cache().get(get_cache_key("USD", "EUR")) is not None
+    assert get_cache().get(get_cache_key("USD", "GBP")) is None
+    with assert_max_queries(0):
+        get_currency_codes()
+
+
+def test_warm_up_budget():
+    report = warm_up(budget=0)
+    assert report["steps"] == {}
+    assert report["skipped"] == ["currencies", "latest_rates", "provider"]
+
+
+def test_currencybeacon_warm_up_opens_connection():
+    with patch("rates.adapters.currencybeacon_adapter.get_session") as mock_get_session:
+        CurrencyBeaconAdapter(api_key="key").warm_up(timeout=2)
+
+    mock_get_session.return_value.head.assert_called_once_with(
+        CurrencyBeaconAdapter.BASE_URL, timeout=2
+    )
@@ -0,0 +1,175 @@
+import json
+import os
+import pytest
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from django.test import override_settings
+from unittest.mock import patch
+
+from rates.domain.db import get_exchange_rates_grouped_by_date_and_currency
+from rates.models import BatchProcess, Currency, CurrencyExchangeRate
+from rates.service import write_behind
+from rates.service.latest import get_cache
+from rates.service.rater import get_exchange_convertion, get_exchange_rates
+
+
+@pytest.fixture
+def clear_db():
+    """Clears the database before each test to avoid UNIQUE constraint errors."""
+    BatchProcess.objects.all().delete()
+    Currency.objects.all().delete()
+
+
+@pytest.fixture
+def create_currencies():
+    """Fixture to create test currencies in the database."""
+    Currency.objects.get_or_create(code="USD", name="US Dollar", symbol="$")
+    Currency.objects.get_or_create(code="EUR", name="Euro", symbol="€")
+
+
+@pytest.fixture
+def enabled(tmp_path):
+    """Enables the write-behind with an empty queue, flushed by the tests only."""
+    write_behind._pending.clear()
+    write_behind._overlay.clear()
+    with override_settings(
+        RATES_WRITE_BEHIND_ENABLED=True, RATES_WRITE_BEHIND_JOURNAL_DIR=tmp_path
+    ), patch("rates.service.write_behind.start_worker"):
+        yield tmp_path
+    write_behind._pending.clear()
+    write_behind._overlay.clear()
+
+
+def fetch_rates(source_currency, exchanged_currency, date_from, date_to):
+    return {
+        "2024-01-01": {"EUR": 0.9},
+        "2024-01-02": {"EUR": 0.91},
+    }, "MockProvider"
+
+
+def stored_rates():
+    return CurrencyExchangeRate.objects.filter(source_currency__code="USD").count()
+
+
+@pytest.mark.django_db
+def test_rates_are_stored_right_away_when_disabled(clear_db, create_currencies):
+    write_behind.store_rates({date(2024, 1, 1): {"EUR": 0.9}}, "USD")
+
+    assert stored_rates() == 1
+
+
+@pytest.mark.django_db
+def test_rates_are_served_before_being_stored(clear_db, create_currencies, enabled):
+    with patch(
+        "rates.service.rater.get_exchange_rate_data", side_effect=fetch_rates
+    ) as get_exchange_rate_data:
+        rates = get_exchange_rates("USD", date(2024, 1, 1), date(2024, 1, 2))
+        # The queued dates aren't fetched again
+        assert get_exchange_rates("USD", date(2024, 1, 1), date(2024, 1, 2)) == rates
+
+    get_exchange_rate_data.assert_called_once()
+    assert rates == {"2024-01-01": {"USD/EUR": 0.9}, "2024-01-02": {"USD/EUR": 0.91}}
+    assert stored_rates() == 0
+    with open(write_behind.get_journal_path()) as journal:
+        assert len(journal.readlines()) == 1
+
+    assert write_behind.flush() == 2
+
+    assert stored_rates() == 2
+    assert not os.path.exists(write_behind.get_journal_path())
+    assert write_behind.get_pending_rates("USD", date(2024, 1, 1), date.max) == {}
+    assert get_exchange_rates("USD", date(2024, 1, 1), date(2024, 1, 2)) == rates
+
+
+@pytest.mark.django_db
+def test_rates_are_stored_right_away_when_the_queue_is_full(
+    clear_db, create_currencies, enabled
+):
+    with override_settings(RATES_WRITE_BEHIND_MAX_QUEUE=1):
+        write_behind.store_rates({date(2024, 1, 1): {"EUR": 0.9}}, "USD")
+        write_behind.store_rates({date(2024, 1, 2): {"EUR": 0.91}}, "USD")
+
+    assert stored_rates() == 1
+    assert list(write_behind.get_pending_rates("USD", date.min, date.max)) == [
+        date(2024, 1, 1)
+    ]
+
+
+@pytest.mark.django_db
+def test_failed_flushes_keep_the_rates_queued(clear_db, create_currencies, enabled):
+    write_behind.store_rates({date(2024, 1, 1): {"EUR": 0.9}}, "USD")
+
+    with patch(
+        "rates.service.write_behind.save_data", side_effect=RuntimeError("locked")
+    ), pytest.raises(RuntimeError):
+        write_behind.flush()
+
+    assert write_behind.get_pending_rate("USD", "EUR", date(2024, 1, 1)) == Decimal(
+        "0.9"
+    )
+    assert write_behind.flush() == 1
+
+
+@pytest.mark.django_db
+def test_journals_of_dead_processes_are_recovered(clear_db, create_currencies, enabled):
+    orphan = write_behind.get_journal_path(pid=4242)
+    with open(orphan, "w") as journal:
+        journal.write(
+            json.dumps(
+                {"source_currency": "USD", "data": {"2024-01-01": {"EUR": "0.9"}}}
+            )
+            + "\n"
+        )
+        journal.write('{"source_currency": "USD", "da')  # Cut by the crash
+
+    with patch("rates.service.write_behind.is_alive", return_value=False):
+        assert write_behind.recover_journals() == 1
+
+    assert not os.path.exists(orphan)
+    assert write_behind.flush() == 1
+    assert stored_rates() == 1
+
+
+@pytest.mark.django_db
+def test_convertion_uses_the_queued_rate(clear_db, create_currencies, enabled):
+    get_cache().clear()
+    write_behind.store_rates({datetime.now().date(): {"EUR": Decimal("0.9")}}, "USD")
+
+    with patch("rates.service.rater.get_exchange_convertion_data") as convert:
+        data = get_exchange_convertion("USD", "EUR", Decimal("10"))
+
+    convert.assert_not_called()
+    assert data["value"] == Decimal("9.00")
+
+
+def test_starting_the_worker_doesnt_wait_for_a_flush():
+    with write_behind._flush_lock, patch(
+        "rates.service.write_behind.recover_journals"
+    ), patch("rates.service.write_behind.run_worker"), patch.object(
+        write_behind, "_worker", None
+    ):
+        starting = threading.Thread(target=write_behind.start_worker)
+        starting.start()
+        starting.join(timeout=1)
+
+        assert not starting.is_alive()
+
+
+@pytest.mark.django_db
+def test_rates_flushed_while_reading_are_served(clear_db, create_currencies, enabled):
+    def flush_after_query(**kwargs):
+        grouped_rates = get_exchange_rates_grouped_by_date_and_currency(**kwargs)
+        write_behind.flush()
+        return grouped_rates
+
+    with patch(
+        "rates.service.rater.get_exchange_rate_data", side_effect=fetch_rates
+    ), patch(
+        "rates.service.rater.get_exchange_rates_grouped_by_date_and_currency",
+        side_effect=flush_after_query,
+    ):
+        rates = get_exchange_rates("USD", date(2024, 1, 1), date(2024, 1, 2))
+
+    assert rates == {"2024-01-01": {"USD/EUR": 0.9}, "2024-01-02": {"USD/EUR": 0.91}}
+    assert stored_rates() == 2